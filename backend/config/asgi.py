@@ -0,0 +1,11 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+application = get_asgi_application()
+
+# Each worker imports this module after forking: build its near-duplicate index now,
+# in the background, rather than on its first ticket create.
+from tickets import similarity  # noqa: E402
+
+similarity.warm()
@@ -15,6 +15,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
     "django_filters",
@@ -22,6 +23,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack.
+    "tickets.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -51,6 +54,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 DATABASES = {
     "default": {
@@ -80,6 +84,9 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Migrations for the tickets app live in the top-level migrations/ package.
+MIGRATION_MODULES = {"tickets": "migrations"}
+
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -91,5 +98,100 @@ REST_FRAMEWORK = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
-
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
\ No newline at end of file
+CORS_EXPOSE_HEADERS = ["Link", "X-Next-Cursor"]
+
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
+# Overrides the Groq endpoint, e.g. to point at a local stub server in tests.
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL", "")
+# Per-call deadline (seconds) for the single Groq attempt made per classification.
+GROQ_TIMEOUT = float(os.environ.get("GROQ_TIMEOUT", 5))
+GROQ_MAX_CONNECTIONS = int(os.environ.get("GROQ_MAX_CONNECTIONS", 10))
+# Consecutive failures that open the circuit breaker, and how long it stays open.
+GROQ_BREAKER_THRESHOLD = int(os.environ.get("GROQ_BREAKER_THRESHOLD", 5))
+GROQ_BREAKER_COOLDOWN = float(os.environ.get("GROQ_BREAKER_COOLDOWN", 30))
+# Groq's per-model limits (free tier llama-3.1-8b-instant: 30 requests and 6000
+# tokens per minute), shared by every process; 0 leaves a dimension unmetered.
+# Calls wait at most GROQ_RATE_MAX_WAIT seconds for capacity, then fall back.
+GROQ_RATE_RPM = int(os.environ.get("GROQ_RATE_RPM", 30))
+GROQ_RATE_TPM = int(os.environ.get("GROQ_RATE_TPM", 6000))
+GROQ_RATE_MAX_WAIT = float(os.environ.get("GROQ_RATE_MAX_WAIT", 10))
+# POST /api/tickets/classify/batch/: concurrent Groq calls per batch, and batch size limit.
+LLM_BATCH_CONCURRENCY = int(os.environ.get("LLM_BATCH_CONCURRENCY", 4))
+LLM_BATCH_MAX_ITEMS = int(os.environ.get("LLM_BATCH_MAX_ITEMS", 100))
+# Cache misses arriving within this window (ms) share one multi-ticket prompt,
+# up to LLM_COALESCE_MAX_BATCH tickets. 0 sends every description on its own.
+LLM_COALESCE_WINDOW_MS = int(os.environ.get("LLM_COALESCE_WINDOW_MS", 20))
+LLM_COALESCE_MAX_BATCH = int(os.environ.get("LLM_COALESCE_MAX_BATCH", 8))
+# POST /api/tickets/bulk/: rows per INSERT batch/transaction, and how many
+# per-row errors are listed in the response (the rest are only counted).
+TICKET_BULK_BATCH_SIZE = int(os.environ.get("TICKET_BULK_BATCH_SIZE", 2000))
+TICKET_BULK_MAX_ERRORS = int(os.environ.get("TICKET_BULK_MAX_ERRORS", 1000))
+# PATCH /api/tickets/bulk/: most ids accepted in one request (filters are unbounded).
+TICKET_BULK_UPDATE_MAX_IDS = int(os.environ.get("TICKET_BULK_UPDATE_MAX_IDS", 10000))
+# GET /api/tickets/export/: rows fetched per server-side cursor round trip
+# (and encoded per flushed chunk).
+TICKET_EXPORT_CHUNK_SIZE = int(os.environ.get("TICKET_EXPORT_CHUNK_SIZE", 2000))
+# GET /api/tickets/?fields=...,description_preview: characters kept before the
+# preview is cut off with an ellipsis (matches TicketCard's collapsed view).
+TICKET_DESCRIPTION_PREVIEW_LENGTH = int(os.environ.get("TICKET_DESCRIPTION_PREVIEW_LENGTH", 160))
+# Change feed (see tickets/changes.py): most tickets per /changes/ page or
+# stream event; seconds between keep-alive comments on an idle stream; and how
+# long one stream stays open before the browser is told to reconnect (it
+# resumes from its last event id, so nothing is missed).
+TICKET_CHANGES_PAGE_SIZE = int(os.environ.get("TICKET_CHANGES_PAGE_SIZE", 500))
+TICKET_CHANGES_HEARTBEAT = float(os.environ.get("TICKET_CHANGES_HEARTBEAT", 15))
+TICKET_CHANGES_STREAM_SECONDS = float(os.environ.get("TICKET_CHANGES_STREAM_SECONDS", 300))
+# Near-duplicate detection (see tickets/similarity.py): estimated Jaccard
+# similarity at which two descriptions count as the same problem; how many of
+# the most recent tickets each process indexes (0 turns detection off); and how
+# often, in seconds, the index catches up with other processes' writes.
+TICKET_SIMILARITY_THRESHOLD = float(os.environ.get("TICKET_SIMILARITY_THRESHOLD", 0.5))
+TICKET_SIMILARITY_INDEX_SIZE = int(os.environ.get("TICKET_SIMILARITY_INDEX_SIZE", 10000))
+TICKET_SIMILARITY_SYNC_INTERVAL = float(os.environ.get("TICKET_SIMILARITY_SYNC_INTERVAL", 1))
+# `manage.py archive_tickets` (see tickets/archive.py): closed tickets unchanged
+# for this many days move to the archive table, this many per transaction.
+TICKET_ARCHIVE_AFTER_DAYS = int(os.environ.get("TICKET_ARCHIVE_AFTER_DAYS", 365))
+TICKET_ARCHIVE_BATCH_SIZE = int(os.environ.get("TICKET_ARCHIVE_BATCH_SIZE", 5000))
+# Local classifier (see tickets/local_classifier.py), written by
+# `manage.py train_classifier`. Predictions whose confidence reaches the
+# threshold skip Groq entirely; set it above 1 to only use the model as a fallback.
+LOCAL_CLASSIFIER_PATH = os.environ.get(
+    "LOCAL_CLASSIFIER_PATH", str(BASE_DIR / "var" / "ticket_classifier.json.gz")
+)
+LOCAL_CLASSIFIER_THRESHOLD = float(os.environ.get("LOCAL_CLASSIFIER_THRESHOLD", 0.9))
+# Async classification queue (see tickets/jobs.py). A failed job is retried after
+# RETRY_DELAY * 2**(attempt-1) seconds, up to MAX_ATTEMPTS; a running job whose
+# lock is older than LOCK_TIMEOUT seconds is assumed orphaned and reclaimed.
+CLASSIFICATION_JOB_MAX_ATTEMPTS = int(os.environ.get("CLASSIFICATION_JOB_MAX_ATTEMPTS", 5))
+CLASSIFICATION_JOB_RETRY_DELAY = float(os.environ.get("CLASSIFICATION_JOB_RETRY_DELAY", 10))
+CLASSIFICATION_JOB_LOCK_TIMEOUT = float(os.environ.get("CLASSIFICATION_JOB_LOCK_TIMEOUT", 300))
+CLASSIFICATION_WORKER_POLL_INTERVAL = float(os.environ.get("CLASSIFICATION_WORKER_POLL_INTERVAL", 1))
+# Request/SQL/classification metrics served at GET /api/metrics (see
+# tickets/metrics.py). METRICS_SERVER_TIMING also reports each request's total
+# and SQL time in a Server-Timing response header.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True") == "True"
+METRICS_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "False") == "True"
+
+# Classification results (see tickets/llm_cache.py). "llm" is per process and
+# LRU-bounded; "llm-shared" is a database table every worker can read, created
+# by `manage.py createcachetable` — set LLM_SHARED_CACHE=False to disable it.
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 60 * 60))
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "llm": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "llm-classifications",
+        "TIMEOUT": LLM_CACHE_TTL,
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 10_000))},
+    },
+}
+if os.environ.get("LLM_SHARED_CACHE", "True") == "True":
+    CACHES["llm-shared"] = {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "llm_classification_cache",
+        "TIMEOUT": LLM_CACHE_TTL,
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("LLM_SHARED_CACHE_MAX_ENTRIES", 200_000))},
+    }
\ No newline at end of file
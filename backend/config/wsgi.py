@@ -3,3 +3,9 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 application = get_wsgi_application()
+
+# Each worker imports this module after forking: build its near-duplicate index now,
+# in the background, rather than on its first ticket create.
+from tickets import similarity  # noqa: E402
+
+similarity.warm()
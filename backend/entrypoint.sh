@@ -22,11 +22,31 @@ done
 
 echo "PostgreSQL is ready."
 
-python manage.py makemigrations tickets --noinput
+# Any other command (e.g. the classification worker) runs once the backend
+# service has applied migrations.
+if [ "$#" -gt 0 ]; then
+  until python manage.py migrate --check >/dev/null 2>&1; do
+    echo "  Migrations pending — retrying in 2s..."
+    sleep 2
+  done
+  exec "$@"
+fi
+
 python manage.py migrate --noinput
+python manage.py createcachetable
 python manage.py collectstatic --noinput
 
-exec gunicorn config.wsgi:application \
+# ASGI under uvicorn workers by default, so async views (classify) wait on
+# Groq without blocking the worker; APP_SERVER=wsgi runs the sync workers instead.
+if [ "${APP_SERVER:-asgi}" = "wsgi" ]; then
+  exec gunicorn config.wsgi:application \
+      --bind 0.0.0.0:8000 \
+      --workers "${WEB_CONCURRENCY:-2}" \
+      --timeout 60
+fi
+
+exec gunicorn config.asgi:application \
+    --worker-class uvicorn.workers.UvicornWorker \
     --bind 0.0.0.0:8000 \
-    --workers 2 \
+    --workers "${WEB_CONCURRENCY:-2}" \
     --timeout 60
\ No newline at end of file
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+    dependencies = [("tickets", "0001_initial")]
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["-created_at", "-id"], name="ticket_recent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["category", "-created_at", "-id"], name="ticket_category_recent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["priority", "-created_at", "-id"], name="ticket_priority_recent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["status", "-created_at", "-id"], name="ticket_status_recent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["status", "category", "-created_at", "-id"], name="ticket_status_cat_recent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["-created_at", "-id"], name="ticket_open_recent_idx", condition=models.Q(status="open")),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import migrations
+
+# The vector is maintained by a trigger rather than in Python so that every
+# write path (ORM save, queryset.update(), bulk_create, COPY) keeps it current.
+SEARCH_VECTOR_SQL = """
+setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B')
+"""
+
+CREATE_TRIGGER = f"""
+CREATE FUNCTION tickets_ticket_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tickets_ticket_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description ON tickets_ticket
+FOR EACH ROW EXECUTE FUNCTION tickets_ticket_search_vector_update();
+
+UPDATE tickets_ticket SET search_vector =
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B');
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS tickets_ticket_search_vector_trigger ON tickets_ticket;
+DROP FUNCTION IF EXISTS tickets_ticket_search_vector_update();
+"""
+
+class Migration(migrations.Migration):
+    dependencies = [("tickets", "0002_ticket_indexes")]
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="search_vector",
+            field=SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=GinIndex(fields=["search_vector"], name="ticket_search_vector_idx"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+INSERT INTO tickets_ticketstatscounter (category, priority, status, count)
+SELECT category, priority, status, COUNT(*) FROM tickets_ticket
+GROUP BY category, priority, status;
+"""
+
+class Migration(migrations.Migration):
+    dependencies = [("tickets", "0003_ticket_search_vector")]
+    operations = [
+        migrations.CreateModel(
+            name="TicketStatsCounter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("category", models.CharField(choices=[("billing","Billing"),("technical","Technical"),("account","Account"),("general","General")], max_length=20)),
+                ("priority", models.CharField(choices=[("low","Low"),("medium","Medium"),("high","High"),("critical","Critical")], max_length=10)),
+                ("status", models.CharField(choices=[("open","Open"),("in_progress","In Progress"),("resolved","Resolved"),("closed","Closed")], max_length=15)),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="ticketstatscounter",
+            constraint=models.UniqueConstraint(fields=("category", "priority", "status"), name="ticket_stats_counter_key"),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill(apps, schema_editor):
+    Ticket = apps.get_model("tickets", "Ticket")
+    TicketDailyRollup = apps.get_model("tickets", "TicketDailyRollup")
+    rows = (
+        Ticket.objects.order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values_list("day", "category", "priority", "status")
+        .annotate(n=Count("id"))
+    )
+    TicketDailyRollup.objects.bulk_create(
+        (TicketDailyRollup(day=d, category=c, priority=p, status=s, count=n) for d, c, p, s, n in rows.iterator()),
+        batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+    dependencies = [("tickets", "0004_ticket_stats_counter")]
+    operations = [
+        migrations.CreateModel(
+            name="TicketDailyRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("category", models.CharField(choices=[("billing","Billing"),("technical","Technical"),("account","Account"),("general","General")], max_length=20)),
+                ("priority", models.CharField(choices=[("low","Low"),("medium","Medium"),("high","High"),("critical","Critical")], max_length=10)),
+                ("status", models.CharField(choices=[("open","Open"),("in_progress","In Progress"),("resolved","Resolved"),("closed","Closed")], max_length=15)),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="ticketdailyrollup",
+            constraint=models.UniqueConstraint(fields=("day", "category", "priority", "status"), name="ticket_daily_rollup_key"),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
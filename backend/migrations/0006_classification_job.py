@@ -0,0 +1,38 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+    dependencies = [("tickets", "0005_ticket_daily_rollup")]
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="suggested_category",
+            field=models.CharField(blank=True, choices=[("billing","Billing"),("technical","Technical"),("account","Account"),("general","General")], max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="suggested_priority",
+            field=models.CharField(blank=True, choices=[("low","Low"),("medium","Medium"),("high","High"),("critical","Critical")], max_length=10, null=True),
+        ),
+        migrations.CreateModel(
+            name="ClassificationJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("status", models.CharField(choices=[("pending","Pending"),("running","Running"),("done","Done"),("failed","Failed")], default="pending", max_length=10)),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now)),
+                ("locked_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("ticket", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="classification_jobs", to="tickets.ticket")),
+            ],
+            options={
+                "indexes": [
+                    models.Index(condition=models.Q(status="pending"), fields=["run_after"], name="classify_job_pending_idx"),
+                    models.Index(condition=models.Q(status="running"), fields=["locked_at"], name="classify_job_running_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations, models
+
+# Both versions are kept by triggers rather than in Python so that every write
+# path (ORM save, queryset.update(), bulk_create, raw UPDATEs, COPY) bumps them.
+CREATE_TRIGGERS = """
+ALTER TABLE tickets_ticket ALTER COLUMN version SET DEFAULT 1;
+
+CREATE FUNCTION tickets_ticket_version_bump() RETURNS trigger AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tickets_ticket_version_trigger
+BEFORE UPDATE ON tickets_ticket
+FOR EACH ROW EXECUTE FUNCTION tickets_ticket_version_bump();
+
+CREATE SEQUENCE tickets_ticket_table_version_seq;
+
+CREATE FUNCTION tickets_ticket_table_version_bump() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO tickets_tickettableversion (id, version)
+    VALUES (1, nextval('tickets_ticket_table_version_seq'))
+    ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tickets_ticket_table_version_trigger
+AFTER INSERT OR UPDATE OR DELETE ON tickets_ticket
+FOR EACH STATEMENT EXECUTE FUNCTION tickets_ticket_table_version_bump();
+
+INSERT INTO tickets_tickettableversion (id, version)
+VALUES (1, nextval('tickets_ticket_table_version_seq'));
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS tickets_ticket_table_version_trigger ON tickets_ticket;
+DROP FUNCTION IF EXISTS tickets_ticket_table_version_bump();
+DROP SEQUENCE IF EXISTS tickets_ticket_table_version_seq;
+DROP TRIGGER IF EXISTS tickets_ticket_version_trigger ON tickets_ticket;
+DROP FUNCTION IF EXISTS tickets_ticket_version_bump();
+"""
+
+class Migration(migrations.Migration):
+    dependencies = [("tickets", "0006_classification_job")]
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="version",
+            field=models.BigIntegerField(default=1, editable=False),
+        ),
+        migrations.CreateModel(
+            name="TicketTableVersion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("version", models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,55 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+# updated_at comes from the database clock at the moment the row is written,
+# not from Python, and covers every write path like the triggers in 0003/0007.
+# The change feed relies on both: see tickets/changes.py.
+CREATE_TRIGGERS = """
+UPDATE tickets_ticket SET updated_at = created_at;
+
+CREATE FUNCTION tickets_ticket_touch() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tickets_ticket_touch_trigger
+BEFORE INSERT OR UPDATE ON tickets_ticket
+FOR EACH ROW EXECUTE FUNCTION tickets_ticket_touch();
+
+-- Delivered on commit, and repeats within a transaction are folded into one,
+-- so a bulk write wakes each listener once.
+CREATE FUNCTION tickets_ticket_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('tickets_changed', '');
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tickets_ticket_notify_trigger
+AFTER INSERT OR UPDATE ON tickets_ticket
+FOR EACH STATEMENT EXECUTE FUNCTION tickets_ticket_notify();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS tickets_ticket_notify_trigger ON tickets_ticket;
+DROP FUNCTION IF EXISTS tickets_ticket_notify();
+DROP TRIGGER IF EXISTS tickets_ticket_touch_trigger ON tickets_ticket;
+DROP FUNCTION IF EXISTS tickets_ticket_touch();
+"""
+
+class Migration(migrations.Migration):
+    dependencies = [("tickets", "0007_ticket_versions")]
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="updated_at",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["updated_at", "id"], name="ticket_updated_idx"),
+        ),
+    ]
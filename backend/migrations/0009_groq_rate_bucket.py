@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+    dependencies = [("tickets", "0008_ticket_updated_at")]
+    operations = [
+        migrations.CreateModel(
+            name="GroqRateBucket",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("requests", models.FloatField()),
+                ("tokens", models.FloatField()),
+                ("refilled_at", models.DateTimeField()),
+                ("blocked_until", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
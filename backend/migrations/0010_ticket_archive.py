@@ -0,0 +1,68 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.utils.timezone
+from django.db import migrations, models
+
+COLUMNS = (
+    "id, title, description, category, priority, status, created_at, "
+    "suggested_category, suggested_priority, search_vector, version, updated_at"
+)
+
+# AnyTicket reads through this view. It names its columns, so adding one to the
+# ticket tables means recreating it.
+CREATE_VIEW = f"""
+CREATE VIEW tickets_anyticket AS
+SELECT {COLUMNS} FROM tickets_ticket
+UNION ALL
+SELECT {COLUMNS} FROM tickets_archivedticket;
+"""
+
+DROP_VIEW = "DROP VIEW IF EXISTS tickets_anyticket;"
+
+CATEGORIES = [("billing","Billing"),("technical","Technical"),("account","Account"),("general","General")]
+PRIORITIES = [("low","Low"),("medium","Medium"),("high","High"),("critical","Critical")]
+STATUSES = [("open","Open"),("in_progress","In Progress"),("resolved","Resolved"),("closed","Closed")]
+
+
+def ticket_fields():
+    return [
+        ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+        ("title", models.CharField(max_length=200)),
+        ("description", models.TextField()),
+        ("category", models.CharField(choices=CATEGORIES, default="general", max_length=20)),
+        ("priority", models.CharField(choices=PRIORITIES, default="medium", max_length=10)),
+        ("status", models.CharField(choices=STATUSES, default="open", max_length=15)),
+        ("created_at", models.DateTimeField(auto_now_add=True)),
+        ("suggested_category", models.CharField(blank=True, choices=CATEGORIES, max_length=20, null=True)),
+        ("suggested_priority", models.CharField(blank=True, choices=PRIORITIES, max_length=10, null=True)),
+        ("search_vector", django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+        ("version", models.BigIntegerField(default=1, editable=False)),
+        ("updated_at", models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+    ]
+
+class Migration(migrations.Migration):
+    dependencies = [("tickets", "0009_groq_rate_bucket")]
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedTicket",
+            fields=ticket_fields(),
+            options={
+                "indexes": [
+                    models.Index(fields=["-created_at", "-id"], name="archived_recent_idx"),
+                    models.Index(fields=["category", "-created_at", "-id"], name="archived_category_recent_idx"),
+                    models.Index(fields=["priority", "-created_at", "-id"], name="archived_priority_recent_idx"),
+                    django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="archived_search_vector_idx"),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="archivedticket",
+            constraint=models.CheckConstraint(check=models.Q(status="closed"), name="archived_ticket_closed"),
+        ),
+        migrations.RunSQL(CREATE_VIEW, DROP_VIEW),
+        migrations.CreateModel(
+            name="AnyTicket",
+            fields=ticket_fields(),
+            options={"db_table": "tickets_anyticket", "managed": False},
+        ),
+    ]
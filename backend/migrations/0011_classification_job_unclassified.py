@@ -0,0 +1,11 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+    dependencies = [("tickets", "0010_ticket_archive")]
+    operations = [
+        migrations.AlterField(
+            model_name="classificationjob",
+            name="status",
+            field=models.CharField(choices=[("pending","Pending"),("running","Running"),("done","Done"),("failed","Failed"),("unclassified","Unclassified")], default="pending", max_length=12),
+        ),
+    ]
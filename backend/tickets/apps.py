@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class TicketsConfig(AppConfig):
+    name = "tickets"
+
+    def ready(self):
+        from .middleware import install_query_timer
+
+        install_query_timer()
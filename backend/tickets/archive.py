@@ -0,0 +1,79 @@
+"""
+Hot/cold storage for tickets.
+
+`manage.py archive_tickets` moves closed tickets that have not changed for
+TICKET_ARCHIVE_AFTER_DAYS days from tickets_ticket into tickets_archivedticket,
+a table with the same columns. The list, search, export and change feed then
+scan only the tickets still in use, however much history piles up.
+
+Each batch of TICKET_ARCHIVE_BATCH_SIZE tickets is moved by one statement: a
+DELETE ... RETURNING feeding an INSERT, so a ticket is in exactly one table at
+any moment, and its id, timestamps, version and search vector move unchanged.
+Rows are claimed with SKIP LOCKED, so archiving never waits on (or blocks) a
+PATCH of some other ticket. Classification jobs of moved tickets are deleted
+with them.
+
+Reads include the archive only when asked (?include_archived=1): the list,
+detail and export then read AnyTicket, a UNION ALL view over both tables.
+Archived tickets are read-only.
+
+The stats tables count tickets in both tables, so archiving leaves them alone,
+and `manage.py ticket_stats` checks them against both.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AnyTicket, ArchivedTicket, ClassificationJob, Ticket
+
+PARAM = "include_archived"
+
+_COLUMNS = ", ".join(field.column for field in Ticket._meta.concrete_fields)
+
+
+def requested(request) -> bool:
+    """True if the request asked for archived tickets too (?include_archived=1)."""
+    return request.query_params.get(PARAM, "").lower() in ("1", "true", "yes")
+
+
+def model_for(request):
+    """The model a read should query: AnyTicket with ?include_archived=1, else Ticket."""
+    return AnyTicket if requested(request) else Ticket
+
+
+def archive(days=None, batch_size=None):
+    """Move closed tickets unchanged for `days` days to the archive; returns how many moved."""
+    days = settings.TICKET_ARCHIVE_AFTER_DAYS if days is None else days
+    batch_size = batch_size or settings.TICKET_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=days)
+    moved = 0
+    while True:
+        count = _move_batch(cutoff, batch_size)
+        moved += count
+        if count < batch_size:
+            return moved
+
+
+def _move_batch(cutoff, batch_size):
+    tickets = Ticket._meta.db_table
+    sql = f"""
+    WITH batch AS (
+        SELECT id FROM {tickets}
+        WHERE status = %s AND updated_at < %s
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    ), jobs AS (
+        DELETE FROM {ClassificationJob._meta.db_table} WHERE ticket_id IN (SELECT id FROM batch)
+    ), moved AS (
+        DELETE FROM {tickets} WHERE id IN (SELECT id FROM batch)
+        RETURNING {_COLUMNS}
+    )
+    INSERT INTO {ArchivedTicket._meta.db_table} ({_COLUMNS})
+    SELECT {_COLUMNS} FROM moved
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, [Ticket.Status.CLOSED, cutoff, batch_size])
+        return cursor.rowcount
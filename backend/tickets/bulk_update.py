@@ -0,0 +1,70 @@
+"""
+Set-based bulk update for PATCH /api/tickets/bulk/.
+
+A triage sweep is one SQL statement: a CTE locks the matching tickets whose
+values actually change (in id order, so concurrent sweeps cannot deadlock), a
+single UPDATE rewrites them, and the old (day, category, priority, status) of
+every updated row is returned already grouped. Those groups become the stats
+deltas, applied in the same transaction, so the aggregates stay exact without
+loading a single ticket into Python.
+"""
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import stats
+from .models import Ticket
+
+BUCKET_FIELDS = ("category", "priority", "status")
+
+
+def apply(queryset, changes):
+    """
+    Set `changes` ({field: value}, fields from BUCKET_FIELDS) on every ticket in
+    `queryset`. Returns the number of tickets that changed.
+    """
+    unknown = set(changes).difference(BUCKET_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot bulk update {', '.join(sorted(unknown))}")
+    if not changes:
+        return 0
+
+    table = Ticket._meta.db_table
+    target_sql, target_params = queryset.order_by().values("pk").query.sql_with_params()
+    columns = list(changes)
+    values = [changes[column] for column in columns]
+    changed = " OR ".join(f"{column} IS DISTINCT FROM %s" for column in columns)
+    assignments = ", ".join(f"{column} = %s" for column in columns)
+
+    sql = f"""
+        WITH target AS (
+            SELECT id, created_at, category, priority, status FROM {table}
+            WHERE id IN ({target_sql}) AND ({changed})
+            ORDER BY id
+            FOR UPDATE
+        ), updated AS (
+            UPDATE {table} AS ticket SET {assignments}
+            FROM target WHERE ticket.id = target.id
+            RETURNING target.created_at, target.category, target.priority, target.status
+        )
+        SELECT (created_at AT TIME ZONE %s)::date, category, priority, status, COUNT(*)
+        FROM updated
+        GROUP BY 1, 2, 3, 4
+    """
+    params = [*target_params, *values, *values, timezone.get_current_timezone_name()]
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            groups = cursor.fetchall()
+
+        deltas = {}
+        for day, category, priority, status, count in groups:
+            old = {"category": category, "priority": priority, "status": status}
+            new = {**old, **changes}
+            old_key = (day, category, priority, status)
+            new_key = (day, new["category"], new["priority"], new["status"])
+            deltas[old_key] = deltas.get(old_key, 0) - count
+            deltas[new_key] = deltas.get(new_key, 0) + count
+        stats.apply_deltas(deltas)
+    return sum(count for *_, count in groups)
@@ -0,0 +1,303 @@
+"""
+Incremental change feed for GET /api/tickets/changes/ and its Server-Sent
+Events variant, GET /api/tickets/changes/stream/.
+
+Every INSERT and UPDATE stamps the row's `updated_at` with the database clock
+at the moment of the write (trigger, migration 0008), and the feed pages
+through (updated_at, id) in ascending order. A cursor is the position after the
+last change a client has seen.
+
+Timestamps alone would skip rows: a transaction can stamp a row, then commit
+after a reader has already moved its cursor past that time. So each read is
+capped at a horizon, the start of the oldest transaction still open in the
+database. No row stamped before the horizon can still be uncommitted, and rows
+held back are returned by a later read instead of being skipped. A session
+left idle in a transaction therefore delays the feed (but never loses rows)
+until it ends. The horizon is taken before the tickets are read, and only
+ever moves the cursor forward.
+
+The stream waits for the notification the same migration sends when a write
+to the ticket table commits. On each notification, and every
+TICKET_CHANGES_HEARTBEAT seconds, it reads the feed again. Each event's id is
+the cursor, so a reconnecting EventSource resumes from Last-Event-ID. Streams
+close after TICKET_CHANGES_STREAM_SECONDS and the browser reconnects.
+
+Open streams cost no database connection of their own. Each process LISTENs
+on one connection, watched by a thread that wakes every stream when a
+notification arrives, and the streams read through a pool of READ_THREADS
+threads, which connect only for the read. The stream is ASGI-only: under WSGI each one would hold a worker for
+its whole life, so there the view answers 501 and clients poll /changes/.
+"""
+
+import asyncio
+import base64
+import binascii
+import logging
+import os
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.models import BooleanField, F
+from django.db.models.expressions import RawSQL
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+
+from . import read_path
+from .models import Ticket
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "tickets_changed"
+CONTENT_TYPE = "text/event-stream"
+INVALID_CURSOR = "Invalid cursor"
+
+# How long the browser waits before reconnecting a closed stream.
+RECONNECT_MS = 1000
+# Threads (and so database connections) per process reading the feed for streams.
+READ_THREADS = 4
+# How often the listener thread checks whether any stream is still open.
+IDLE_CHECK_SECONDS = 1
+
+_OLDEST_OPEN_TRANSACTION = """
+SELECT min(xact_start) FROM pg_stat_activity
+WHERE datname = current_database()
+  AND backend_type = 'client backend'
+  AND pid <> pg_backend_pid()
+"""
+
+
+def encode_cursor(cursor):
+    updated_at, pk = cursor
+    raw = f"{updated_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+
+def decode_cursor(encoded):
+    """(updated_at, id) from encode_cursor(); None if `encoded` is empty."""
+    if not encoded:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+        updated_at, pk = raw.split("|")
+        updated_at, pk = parse_datetime(updated_at), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise NotFound(INVALID_CURSOR)
+    if updated_at is None or updated_at.tzinfo is None:
+        raise NotFound(INVALID_CURSOR)
+    return updated_at, pk
+
+
+def horizon(using=DEFAULT_DB_ALIAS):
+    """The newest updated_at below which every row has already committed."""
+    with connections[using].cursor() as cursor:
+        # The clock is read first: a transaction missing from the list below
+        # either finished before it was read, or started (and stamps) later.
+        # Statistics views are cached for the rest of a transaction once read.
+        cursor.execute("SELECT clock_timestamp(), pg_stat_clear_snapshot()")
+        now = cursor.fetchone()[0]
+        cursor.execute(_OLDEST_OPEN_TRANSACTION)
+        oldest = cursor.fetchone()[0]
+    return now if oldest is None else min(now, oldest)
+
+
+def read(since, fields=None, using=DEFAULT_DB_ALIAS):
+    """
+    The next page of changes after `since`, a decoded cursor (None starts from
+    now): (ticket dicts as read_path.represent() makes them, next cursor, has_more).
+    """
+    upper = horizon(using)
+    if since is None:
+        return [], (upper, 0), False
+    after, pk = since
+    if upper <= after:
+        return [], since, False
+
+    size = settings.TICKET_CHANGES_PAGE_SIZE
+    table = Ticket._meta.db_table
+    ops = connections[using].ops
+    later = RawSQL(
+        f'("{table}"."updated_at", "{table}"."id") > (%s, %s)',
+        (ops.adapt_datetimefield_value(after), pk),
+        output_field=BooleanField(),
+    )
+    queryset = (
+        Ticket.objects.using(using)
+        .filter(later, updated_at__lt=upper)
+        .annotate(changed_at=F("updated_at"))
+        .order_by("updated_at", "id")
+    )
+    rows = list(read_path.values(queryset, fields)[: size + 1])
+    if len(rows) > size:
+        rows = rows[:size]
+        return read_path.represent(rows, fields), (rows[-1].changed_at, rows[-1].pk), True
+    # Everything below the horizon has been returned; (upper, 0) sorts before any row stamped at upper.
+    return read_path.represent(rows, fields), (upper, 0), False
+
+
+def page(tickets, cursor, has_more):
+    """The response body of /changes/, and the data of each stream event."""
+    return {"tickets": tickets, "cursor": encode_cursor(cursor), "has_more": has_more}
+
+
+def _event(tickets, cursor, has_more):
+    body = page(tickets, cursor, has_more)
+    return f"id: {body['cursor']}\nevent: tickets\ndata: {orjson.dumps(body).decode()}\n\n"
+
+
+_KEEP_ALIVE = ": keep-alive\n\n"
+
+
+class _Listener:
+    """A connection of its own, in autocommit, LISTENing on CHANNEL."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        wrapper = connections[using]
+        self.connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        self.connection.autocommit = True
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+    def fileno(self):
+        return self.connection.fileno()
+
+    def drain(self):
+        """Consume pending notifications; True if there were any."""
+        self.connection.poll()
+        notified = bool(self.connection.notifies)
+        self.connection.notifies.clear()
+        return notified
+
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+
+class _Hub:
+    """
+    The process's one LISTEN connection, shared by its open streams. A thread
+    waits on the listener and sets every subscribed stream's asyncio.Event when
+    a notification arrives. It starts with the first stream, closes the
+    connection once the last one has gone, and reconnects if the connection
+    drops (waking every stream, since notifications may have been missed).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()   # (event loop, asyncio.Event)
+        self._thread = None
+        self._pid = None
+
+    def subscribe(self, loop, event):
+        with self._lock:
+            self._subscribers.add((loop, event))
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="changes-listener", daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, loop, event):
+        with self._lock:
+            self._subscribers.discard((loop, event))
+
+    def _run(self):
+        listener = None
+        try:
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                if listener is None:
+                    try:
+                        listener = _Listener()
+                    except Exception as exc:
+                        logger.error("Could not LISTEN for ticket changes: %s", exc)
+                        time.sleep(IDLE_CHECK_SECONDS)
+                        continue
+                    self._wake()
+                try:
+                    if select.select([listener], [], [], IDLE_CHECK_SECONDS)[0] and listener.drain():
+                        self._wake()
+                except Exception as exc:
+                    logger.warning("Ticket change listener lost its connection: %s", exc)
+                    listener.close()
+                    listener = None
+        finally:
+            if listener is not None:
+                listener.close()
+
+    def _wake(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, event in subscribers:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # that stream's loop has closed
+
+
+hub = _Hub()
+
+_readers_lock = threading.Lock()
+_readers = (None, None)   # (pid, executor)
+
+
+def _reader_pool():
+    global _readers
+    with _readers_lock:
+        if _readers[0] != os.getpid():
+            _readers = (
+                os.getpid(),
+                ThreadPoolExecutor(max_workers=READ_THREADS, thread_name_prefix="changes-read"),
+            )
+        return _readers[1]
+
+
+def _pooled_read(since, fields):
+    # The pool's threads outlive any request, so nothing else would notice
+    # their connections going stale or close them.
+    close_old_connections()
+    try:
+        return read(since, fields)
+    finally:
+        connections.close_all()
+
+
+async def astream(since, fields=None):
+    """
+    Event stream for ASGI. It waits on the event loop for the hub's wake-up,
+    so an idle stream holds no thread and no database connection.
+    """
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    hub.subscribe(loop, wake)
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n"
+        deadline = time.monotonic() + settings.TICKET_CHANGES_STREAM_SECONDS
+        first = True
+        while True:
+            wake.clear()
+            tickets, since, has_more = await loop.run_in_executor(
+                _reader_pool(), _pooled_read, since, fields
+            )
+            if tickets or first:
+                yield _event(tickets, since, has_more)
+                first = False
+            if has_more:
+                continue
+            timeout = min(settings.TICKET_CHANGES_HEARTBEAT, deadline - time.monotonic())
+            if timeout <= 0:
+                return
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                yield _KEEP_ALIVE
+    finally:
+        hub.unsubscribe(loop, wake)
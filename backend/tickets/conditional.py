@@ -0,0 +1,76 @@
+"""
+Conditional GET (ETag / If-None-Match) for the ticket list, detail and stats.
+
+The validators are versions kept by database triggers (migration 0007):
+TicketTableVersion changes with every write to the ticket table and covers the
+list and stats; Ticket.version changes with every update of one row and covers
+its detail. Checking one costs a single-row primary-key read, taken before the
+view's own query, so a matching If-None-Match is answered with 304 Not Modified
+without running the main query or the serializer.
+
+The version is read first: if a write commits between that read and the main
+query, the body is newer than its ETag, which only costs the client one extra
+full response later — never a stale 304.
+
+Responses carry `Cache-Control: no-cache`, so browsers keep the body but
+revalidate every time; the frontend's refetches turn into 304s without any
+client-side changes.
+"""
+
+import hashlib
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Ticket, TicketTableVersion
+
+# Part of every ETag — bump whenever the JSON shape of these responses changes
+# so clients holding a copy in the old shape refetch.
+REPRESENTATION_VERSION = "1"
+
+
+def table_version():
+    """The current TicketTableVersion, or 0 before the first write (e.g. after a flush)."""
+    return TicketTableVersion.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+
+
+def ticket_version(pk, model=Ticket):
+    """The ticket's current row version, or None if it does not exist."""
+    return model.objects.filter(pk=pk).values_list("version", flat=True).first()
+
+
+def etag(request, *parts):
+    """
+    A strong ETag for `parts` as rendered for this request: the negotiated
+    format and the absolute URL (query string and host, which ends up in Link
+    headers) are part of it.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    fmt = getattr(renderer, "format", "")
+    key = "\0".join(map(str, (REPRESENTATION_VERSION, fmt, request.build_absolute_uri(), *parts)))
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def not_modified(request, tag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    # If-None-Match uses the weak comparison: W/"x" matches "x".
+    candidates = parse_etags(header)
+    return "*" in candidates or any(candidate.removeprefix("W/") == tag for candidate in candidates)
+
+
+def respond(request, tag, build):
+    """304 if the client already has `tag`, else build() with the validators attached."""
+    if not_modified(request, tag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=_validators(tag))
+    response = build()
+    if response.status_code == status.HTTP_200_OK:
+        for name, value in _validators(tag).items():
+            response[name] = value
+    return response
+
+
+def _validators(tag):
+    return {"ETag": tag, "Cache-Control": "no-cache"}
@@ -0,0 +1,95 @@
+"""
+Streaming ticket export for GET /api/tickets/export/.
+
+Rows are read as tuples through a server-side cursor (`.iterator()`), so only
+one chunk of settings.TICKET_EXPORT_CHUNK_SIZE rows is in memory at a time,
+and each chunk is encoded and flushed to the client as soon as it has been
+fetched. The header (CSV) goes out before the query runs.
+
+Under ASGI, Django would read a plain iterator to the end before sending any of
+it, so the view hands the server as_async() instead: each chunk is produced in
+the request's worker thread (where its cursor lives) and sent as it comes.
+"""
+
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from rest_framework import serializers
+
+FIELDS = [
+    "id",
+    "title",
+    "description",
+    "category",
+    "priority",
+    "status",
+    "created_at",
+    "suggested_category",
+    "suggested_priority",
+    "updated_at",
+]
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+_timestamp = serializers.DateTimeField()
+_TIMESTAMPS = [FIELDS.index("created_at"), FIELDS.index("updated_at")]
+
+
+class _Line:
+    """File-like sink for csv.writer that hands back each encoded line."""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset, chunk_size):
+    for row in queryset.values_list(*FIELDS).iterator(chunk_size=chunk_size):
+        row = list(row)
+        # Same timestamp format as the JSON API.
+        for index in _TIMESTAMPS:
+            row[index] = _timestamp.to_representation(row[index])
+        yield row
+
+
+def _chunked(lines, size):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= size:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_csv(queryset, chunk_size):
+    writer = csv.writer(_Line())
+    yield writer.writerow(FIELDS)
+    yield from _chunked((writer.writerow(row) for row in _rows(queryset, chunk_size)), chunk_size)
+
+
+def stream_ndjson(queryset, chunk_size):
+    lines = (
+        json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n"
+        for row in _rows(queryset, chunk_size)
+    )
+    yield from _chunked(lines, chunk_size)
+
+
+STREAMS = {"csv": stream_csv, "ndjson": stream_ndjson}
+
+_DONE = object()
+
+
+async def as_async(chunks):
+    """An async iterator over a stream above, pulling one chunk at a time in a thread."""
+    chunks = iter(chunks)
+    pull = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await pull(chunks, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
@@ -0,0 +1,92 @@
+"""
+Facet counts for GET /api/tickets/?facets=category,priority,status.
+
+The counts cover every ticket matching the list's filters and search, not just
+the page being returned, so the filter bar can show how many tickets each
+choice holds. All requested facets come from one statement: the filtered
+queryset's own SQL, grouped BY GROUPING SETS with one set per facet plus the
+empty set for the total, so Postgres reads the matching rows once instead of
+once per facet.
+
+A request without filters or search reads the TicketStatsCounter table (at
+most 64 rows, see tickets.stats) instead of counting the whole ticket table.
+The counters include archived tickets, so that holds for live tickets only
+while nothing is archived.
+"""
+
+from django.db import connections
+from rest_framework.exceptions import ValidationError
+
+from . import stats
+from .models import AnyTicket, ArchivedTicket, TicketStatsCounter
+
+FACETS = {
+    "category": stats.CATEGORIES,
+    "priority": stats.PRIORITIES,
+    "status": stats.STATUSES,
+}
+
+
+def parse_facets(raw):
+    """The facet names in ?facets=, in FACETS order; None if none were asked for."""
+    if not raw:
+        return None
+    names = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = names - FACETS.keys()
+    if unknown:
+        raise ValidationError(
+            {"facets": [f"Unknown facet(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(FACETS)}."]}
+        )
+    return [name for name in FACETS if name in names] or None
+
+
+def counts(queryset, facets):
+    """
+    (number of tickets, {facet: {choice: count}}) for the tickets in the
+    filtered `queryset`. Every choice is listed, with 0 when no ticket has it.
+    """
+    result = {name: dict.fromkeys(FACETS[name], 0) for name in facets}
+    if queryset.query.where or not _counters_cover(queryset):
+        rows, total = _grouped(queryset, facets)
+    else:
+        rows, total = _from_counters(facets)
+    for name, value, count in rows:
+        result[name][value] += count
+    return total, result
+
+
+def _grouped(queryset, facets):
+    inner, params = queryset.order_by().values(*facets).query.sql_with_params()
+    columns = ", ".join(facets)
+    grouping = ", ".join(f"GROUPING({name})" for name in facets)
+    sets = ", ".join(f"({name})" for name in facets)
+    sql = (
+        f"SELECT {columns}, {grouping}, COUNT(*) FROM ({inner}) AS filtered "
+        f"GROUP BY GROUPING SETS ({sets}, ())"
+    )
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        grouped = cursor.fetchall()
+
+    width = len(facets)
+    rows, total = [], 0
+    for row in grouped:
+        values, flags, count = row[:width], row[width : 2 * width], row[-1]
+        if all(flags):
+            total = count  # the empty grouping set
+            continue
+        position = flags.index(0)
+        rows.append((facets[position], values[position], count))
+    return rows, total
+
+
+def _counters_cover(queryset):
+    return queryset.model is AnyTicket or not ArchivedTicket.objects.exists()
+
+
+def _from_counters(facets):
+    rows, total = [], 0
+    for *values, count in TicketStatsCounter.objects.filter(count__gt=0).values_list(*facets, "count"):
+        total += count
+        rows.extend((name, value, count) for name, value in zip(facets, values))
+    return rows, total
@@ -0,0 +1,89 @@
+"""
+Filter and search backends for the ticket list.
+
+`?search=` keeps DRF's SearchFilter semantics: every term must appear as a
+case-insensitive substring of the title or the description. That is an
+unindexable ILIKE '%term%' scan, so clients that search as the user types
+(FilterBar) opt into `?search_mode=fulltext`, which matches whole words and
+word prefixes against the trigger-maintained `search_vector` column through
+its GIN index and ranks title hits above description hits.
+
+TicketFilterSet holds the exact-match and created_at range filters. It names no
+model, so it filters archived tickets (AnyTicket) the same way as live ones.
+
+`?ordering=` is validated rather than applied: pages are keyset-paginated on
+(created_at, id), newest first, so that is the only order the list can serve.
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from django_filters import rest_framework as django_filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+from .models import Ticket
+
+SEARCH_MODES = ("contains", "fulltext")
+
+
+class TicketFilterSet(django_filters.FilterSet):
+    category = django_filters.ChoiceFilter(choices=Ticket.Category.choices)
+    priority = django_filters.ChoiceFilter(choices=Ticket.Priority.choices)
+    status = django_filters.ChoiceFilter(choices=Ticket.Status.choices)
+    created_before = django_filters.DateTimeFilter(field_name="created_at", lookup_expr="lt")
+    created_after = django_filters.DateTimeFilter(field_name="created_at", lookup_expr="gte")
+
+
+# Letters and digits only — everything else would be tsquery syntax.
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+class TicketSearchFilter(SearchFilter):
+    search_mode_param = "search_mode"
+    search_config = "english"
+    rank_annotation = "search_rank"
+
+    def filter_queryset(self, request, queryset, view):
+        mode = request.query_params.get(self.search_mode_param, "contains")
+        if mode not in SEARCH_MODES:
+            raise ValidationError(
+                {self.search_mode_param: [f"Must be one of: {', '.join(SEARCH_MODES)}."]}
+            )
+        if mode == "contains":
+            return super().filter_queryset(request, queryset, view)
+
+        words = [w for term in self.get_search_terms(request) for w in _WORD_RE.findall(term)]
+        if not words:
+            return queryset
+
+        # "word:*" is a prefix match, so "charg" already finds "charged".
+        query = SearchQuery(
+            " & ".join(f"{word}:*" for word in words),
+            search_type="raw",
+            config=self.search_config,
+        )
+        # Cast to double precision so the rank survives a round trip through
+        # the pagination cursor exactly.
+        rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+        return queryset.filter(search_vector=query).annotate(**{self.rank_annotation: rank})
+
+
+class TicketOrderingFilter(BaseFilterBackend):
+    """
+    Accepts `?ordering=-created_at`, the list's own order, and rejects any other
+    ordering with a 400 instead of silently ignoring it.
+    """
+
+    ordering_param = "ordering"
+    supported = ("-created_at",)
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = request.query_params.get(self.ordering_param)
+        if ordering is not None and ordering not in self.supported:
+            raise ValidationError(
+                {self.ordering_param: [f"Must be one of: {', '.join(self.supported)}."]}
+            )
+        return queryset
@@ -0,0 +1,178 @@
+"""
+Streaming bulk ticket ingestion for POST /api/tickets/bulk/.
+
+The request body is read incrementally — NDJSON line by line, a JSON array one
+element at a time — so memory stays bounded by one insert batch no matter how
+large the upload is. Each row goes through TicketSerializer's own validation
+(the same title/description rules and choice fields as POST /api/tickets/);
+valid rows are inserted with bulk_create in batches of
+settings.TICKET_BULK_BATCH_SIZE, each batch committed together with its stats
+counter update. Invalid rows are reported by row number and skipped.
+"""
+
+import json
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from . import stats
+from .models import Ticket
+from .serializers import TicketSerializer
+
+READ_SIZE = 64 * 1024
+# A single row larger than this is rejected rather than buffered indefinitely.
+MAX_ROW_BYTES = 1024 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+class MalformedBody(Exception):
+    """The body can no longer be parsed; rows after this point are lost."""
+
+
+def iter_ndjson(stream):
+    """Yield (row number, parsed value or exception) for each non-blank line."""
+    number = 0
+    while True:
+        line = stream.readline(MAX_ROW_BYTES + 1)
+        if not line:
+            return
+        if len(line) > MAX_ROW_BYTES and not line.endswith(b"\n"):
+            raise MalformedBody(f"Row {number + 1} exceeds {MAX_ROW_BYTES} bytes.")
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line)
+        except ValueError as exc:
+            yield number, exc
+
+
+def iter_json_array(stream, read_size=READ_SIZE):
+    """
+    Yield (row number, parsed value) for each element of a top-level JSON array,
+    decoding elements as soon as they are complete.
+    """
+    buffer = ""
+    pending = b""
+    eof = False
+    position = 0
+    number = 0
+    expect = "["
+
+    def fill():
+        nonlocal buffer, pending, eof, position
+        chunk = stream.read(read_size)
+        if not chunk:
+            eof = True
+        data = pending + chunk
+        # Don't split a multi-byte UTF-8 character across reads.
+        cut = len(data) if eof else _utf8_boundary(data)
+        try:
+            buffer = buffer[position:] + data[:cut].decode("utf-8")
+        except UnicodeDecodeError as exc:
+            raise MalformedBody(f"Body is not valid UTF-8: {exc}") from exc
+        pending = data[cut:]
+        position = 0
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n":
+            position += 1
+        if position == len(buffer):
+            if eof:
+                raise MalformedBody("Unexpected end of JSON array.")
+            fill()
+            continue
+
+        char = buffer[position]
+        if expect == "[":
+            if char != "[":
+                raise MalformedBody("Expected a JSON array of tickets.")
+            position += 1
+            expect = "value_or_end"
+        elif expect in ("separator", "value_or_end") and char == "]":
+            return
+        elif expect == "separator":
+            if char != ",":
+                raise MalformedBody(f"Expected ',' or ']' after row {number}.")
+            position += 1
+            expect = "value"
+        else:
+            try:
+                value, end = _decoder.raw_decode(buffer, position)
+            except ValueError as exc:
+                # Probably an element split across reads: read more and retry.
+                if eof or len(buffer) - position > MAX_ROW_BYTES:
+                    raise MalformedBody(f"Row {number + 1} is not valid JSON: {exc}") from exc
+                fill()
+                continue
+            if end == len(buffer) and not eof:
+                # A number at the end of the buffer may continue in the next read.
+                fill()
+                continue
+            number += 1
+            position = end
+            expect = "separator"
+            yield number, value
+
+
+def _utf8_boundary(data):
+    """Length of the longest prefix of `data` that doesn't end mid-character."""
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte & 0xC0 != 0x80:
+            # Lead byte: keep it only if its whole sequence is present.
+            needed = 1 if byte < 0x80 else 2 if byte >> 5 == 0b110 else 3 if byte >> 4 == 0b1110 else 4
+            return len(data) if needed <= back else len(data) - back
+    return len(data)
+
+
+def ingest(rows):
+    """
+    Validate and insert rows from iter_ndjson()/iter_json_array().
+    Returns {"created", "failed", "errors", "errors_truncated"}; only the first
+    settings.TICKET_BULK_MAX_ERRORS errors are listed.
+    """
+    validator = TicketSerializer()
+    batch_size = settings.TICKET_BULK_BATCH_SIZE
+    max_errors = settings.TICKET_BULK_MAX_ERRORS
+    summary = {"created": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    batch = []
+
+    def fail(number, detail):
+        summary["failed"] += 1
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append({"row": number, "errors": detail})
+        else:
+            summary["errors_truncated"] = True
+
+    try:
+        for number, value in rows:
+            if isinstance(value, Exception):
+                fail(number, {"non_field_errors": [f"Invalid JSON: {value}"]})
+                continue
+            if not isinstance(value, dict):
+                fail(number, {"non_field_errors": ["Each row must be a JSON object."]})
+                continue
+            try:
+                batch.append(Ticket(**validator.run_validation(value)))
+            except serializers.ValidationError as exc:
+                fail(number, exc.detail)
+                continue
+            if len(batch) >= batch_size:
+                summary["created"] += _insert(batch)
+                batch = []
+    except MalformedBody as exc:
+        fail(None, {"non_field_errors": [str(exc)]})
+
+    if batch:
+        summary["created"] += _insert(batch)
+    return summary
+
+
+def _insert(batch):
+    with transaction.atomic():
+        created = Ticket.objects.bulk_create(batch)
+        stats.record_created(created)
+    return len(created)
@@ -0,0 +1,162 @@
+"""
+Postgres-backed queue for asynchronous ticket classification.
+
+Creating a ticket enqueues a ClassificationJob in the same transaction, so the
+POST returns without waiting on the LLM and a job exists exactly when its
+ticket does. Workers (`manage.py classification_worker`) claim one job at a
+time with SELECT ... FOR UPDATE SKIP LOCKED, mark it running and commit, call
+the classifier outside any transaction, then either write the suggestion back
+onto the ticket or schedule a retry with exponential backoff. A job whose
+worker died mid-flight is reclaimed once its lock is older than
+CLASSIFICATION_JOB_LOCK_TIMEOUT, unless it has used up its attempts: then it
+is marked failed, so a job that keeps killing its worker is not rerun forever.
+
+Without GROQ_API_KEY, retrying cannot help. A job the local model and the
+near-duplicate index cannot answer confidently takes the local model's best
+guess, or without a model ends as unclassified, leaving the ticket's
+suggestion empty.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import local_classifier
+from .llm import classify_ticket, groq_configured
+from .models import ClassificationJob, Ticket
+
+logger = logging.getLogger(__name__)
+
+Status = ClassificationJob.Status
+
+
+def enqueue(ticket):
+    return ClassificationJob.objects.create(ticket=ticket)
+
+
+def claim_next():
+    """Claim the next runnable job, or return None if the queue is empty."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.CLASSIFICATION_JOB_LOCK_TIMEOUT)
+    claimable = [
+        ClassificationJob.objects.filter(status=Status.PENDING, run_after__lte=now).order_by("run_after"),
+        ClassificationJob.objects.filter(status=Status.RUNNING, locked_at__lt=stale).order_by("locked_at"),
+    ]
+    with transaction.atomic():
+        abandoned = ClassificationJob.objects.filter(
+            status=Status.RUNNING,
+            locked_at__lt=stale,
+            attempts__gte=settings.CLASSIFICATION_JOB_MAX_ATTEMPTS,
+        ).update(
+            status=Status.FAILED,
+            locked_at=None,
+            last_error="Worker stopped responding on the last attempt.",
+            updated_at=now,
+        )
+        if abandoned:
+            logger.error("Gave up on %s classification job(s) whose workers stopped responding.", abandoned)
+        for queryset in claimable:
+            job = (
+                queryset.select_for_update(skip_locked=True)
+                .only("id", "ticket_id", "attempts")
+                .first()
+            )
+            if job is not None:
+                job.status = Status.RUNNING
+                job.attempts += 1
+                job.locked_at = now
+                job.save(update_fields=["status", "attempts", "locked_at", "updated_at"])
+                return job
+    return None
+
+
+def process(job):
+    description = (
+        Ticket.objects.filter(pk=job.ticket_id).values_list("description", flat=True).first()
+    )
+    if description is None:
+        return _finish(job, Status.FAILED, "Ticket no longer exists.")
+
+    result = classify_ticket(description, fallback=False)
+    if result is None and not groq_configured():
+        result, _ = local_classifier.predict(description)
+        if result is None:
+            return _finish(job, Status.UNCLASSIFIED, "No GROQ_API_KEY and no local model.")
+    if result is None:
+        return _retry_or_fail(job, "Classification failed; see worker log.")
+
+    with transaction.atomic():
+        Ticket.objects.filter(pk=job.ticket_id).update(
+            suggested_category=result["suggested_category"],
+            suggested_priority=result["suggested_priority"],
+        )
+        _finish(job, Status.DONE)
+
+
+def _retry_or_fail(job, error):
+    if job.attempts >= settings.CLASSIFICATION_JOB_MAX_ATTEMPTS:
+        logger.error("Giving up on classification job %s after %s attempts.", job.pk, job.attempts)
+        return _finish(job, Status.FAILED, error)
+    delay = settings.CLASSIFICATION_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+    ClassificationJob.objects.filter(pk=job.pk).update(
+        status=Status.PENDING,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        locked_at=None,
+        last_error=error,
+        updated_at=timezone.now(),
+    )
+
+
+def _finish(job, status, error=""):
+    ClassificationJob.objects.filter(pk=job.pk).update(
+        status=status,
+        locked_at=None,
+        last_error=error,
+        updated_at=timezone.now(),
+    )
+
+
+def work(stop, poll_interval, drain=False):
+    """
+    Process jobs until `stop` is set. With drain=True, return as soon as the
+    queue is empty instead of polling.
+    """
+    try:
+        while not stop.is_set():
+            try:
+                job = claim_next()
+                if job is None:
+                    if drain:
+                        return
+                    stop.wait(poll_interval)
+                    continue
+                process(job)
+            except Exception:
+                logger.exception("Classification worker error; backing off.")
+                connections.close_all()
+                stop.wait(poll_interval)
+    finally:
+        connections.close_all()
+
+
+def run_workers(concurrency, poll_interval, stop=None, drain=False):
+    stop = stop or threading.Event()
+    threads = [
+        threading.Thread(
+            target=work,
+            args=(stop, poll_interval, drain),
+            name=f"classification-worker-{n}",
+            daemon=True,
+        )
+        for n in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        # join() with a timeout keeps the main thread responsive to signals.
+        while thread.is_alive():
+            thread.join(timeout=0.5)
@@ -7,16 +7,44 @@ Chosen because:
     response times are under 200ms, ideal for real-time ticket classification.
   - The Groq SDK is OpenAI-compatible, keeping the integration simple and portable.
   - The free tier is generous enough for development and moderate production use.
+
+Each worker reuses one pooled client (llm_client.py); calls are bounded by
+GROQ_TIMEOUT, guarded by a circuit breaker and metered against Groq's rate
+limits by a scheduler shared across processes (llm_rate.py), and answers are
+cached (llm_cache.py). A trained local model (local_classifier.py) answers confident
+cases without calling Groq and replaces the fixed default on failure, and a
+near-duplicate of a recent classified ticket (similarity.py) reuses its answer.
 """
 
 import json
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from groq import APIError, APITimeoutError, RateLimitError
 
-from groq import Groq, APIError
+from . import local_classifier, metrics, similarity
+from .llm_batcher import MicroBatcher
+from .llm_cache import cache_key, classification_cache
+from .llm_client import breaker, call_timeout, get_async_client, get_client
+from .llm_rate import RateLimiter, estimate_tokens, retry_after
 
 logger = logging.getLogger(__name__)
 
+GROQ_MODEL = "llama-3.1-8b-instant"   # Free, extremely fast (~150-200ms)
+
+# Part of every classification cache key — bump whenever CLASSIFY_PROMPT or the
+# parsing rules change so stale answers are never served.
+PROMPT_VERSION = "2"
+
+# Attempts per call when Groq answers 429: the first, plus one after its retry-after.
+RATE_LIMIT_ATTEMPTS = 2
+
 VALID_CATEGORIES = {"billing", "technical", "account", "general"}
 VALID_PRIORITIES = {"low", "medium", "high", "critical"}
 
@@ -28,11 +56,13 @@ VALID_PRIORITIES = {"low", "medium", "high", "critical"}
 #     explanation.  A tight max_tokens (64) enforces this.
 #  3. We validate the parsed values against the allowed choice sets before using
 #     them, so garbage output is caught cleanly.
+#  4. Literal braces in the JSON example are doubled — the template goes through
+#     str.format().
+#  5. Concurrent requests are coalesced (llm_batcher.py) into BATCH_CLASSIFY_PROMPT,
+#     which sends the rubric once for up to LLM_COALESCE_MAX_BATCH tickets and
+#     asks for an array; each element is validated on its own.
 # ---------------------------------------------------------------------------
-CLASSIFY_PROMPT = """\
-You are a support ticket triage assistant. Given a user's support ticket description, \
-classify it into exactly one category and one priority level.
-
+TRIAGE_RUBRIC = """\
 Categories:
 - billing   : payment issues, invoices, charges, refunds, subscriptions, pricing
 - technical : bugs, errors, crashes, performance problems, API/integration issues
@@ -44,71 +74,420 @@ Priority levels:
 - high     : major feature broken, significant business impact, many users affected
 - medium   : partial functionality impaired, moderate inconvenience, workaround exists
 - low      : cosmetic issue, general question, feature request, no time pressure
+"""
+
+CLASSIFY_PROMPT = """\
+You are a support ticket triage assistant. Given a user's support ticket description, \
+classify it into exactly one category and one priority level.
 
+""" + TRIAGE_RUBRIC + """
 Respond with ONLY a valid JSON object — no markdown, no explanation, no extra text:
-{"category": "<billing|technical|account|general>", "priority": "<low|medium|high|critical>"}
+{{"category": "<billing|technical|account|general>", "priority": "<low|medium|high|critical>"}}
 
 Ticket description:
 {description}
 """
 
+BATCH_CLASSIFY_PROMPT = """\
+You are a support ticket triage assistant. Classify EACH of the numbered support ticket \
+descriptions below into exactly one category and one priority level.
+
+""" + TRIAGE_RUBRIC + """
+Respond with ONLY a valid JSON array containing one object per ticket, in the same order — \
+no markdown, no explanation, no extra text:
+[{{"ticket": 1, "category": "<billing|technical|account|general>", "priority": "<low|medium|high|critical>"}}, ...]
+
+{tickets}
+"""
 
-def classify_ticket(description: str) -> dict:
+
+def classify_ticket(description: str, *, fallback: bool = True) -> dict:
     """
-    Call the Groq API to classify a ticket description.
+    Classify a ticket description: a confident local prediction first, then the
+    classification of a recent near-duplicate ticket, then the result cache,
+    then Groq.
     Returns {"suggested_category": ..., "suggested_priority": ...}.
-    Falls back to safe defaults on any failure so ticket submission is never blocked.
+    Falls back to the local model's best guess (or safe defaults without one) on
+    any failure so ticket submission is never blocked; with fallback=False it
+    returns None instead, so the job queue can retry.
+    """
+    started = time.perf_counter()
+    answer, pending = _before_groq(description, started, fallback)
+    if pending is None:
+        return answer
+    if batcher.enabled:
+        result = batcher.classify(description)
+    else:
+        result = _request_classification(pending.api_key, description)
+    return _after_groq(result, pending, started, fallback)
+
+
+async def aclassify_ticket(description: str, *, fallback: bool = True) -> dict:
+    """
+    classify_ticket() for async views, with the same steps and results. The
+    steps before and after Groq run in a thread (they may touch the database);
+    Groq is awaited on the async client (or on the coalescing batcher), so a
+    slow upstream holds no thread.
+    """
+    started = time.perf_counter()
+    answer, pending = await sync_to_async(_before_groq)(description, started, fallback)
+    if pending is None:
+        return answer
+    if batcher.enabled:
+        result = await batcher.aclassify(description)
+    else:
+        result = await _arequest_classification(pending.api_key, description)
+    return await sync_to_async(_after_groq)(result, pending, started, fallback)
+
+
+def groq_configured() -> bool:
+    """Whether GROQ_API_KEY is set; without it no retry can get a classification from Groq."""
+    return bool(_api_key())
+
+
+def _api_key() -> str:
+    return os.environ.get("GROQ_API_KEY", "")
+
+
+class _Pending(NamedTuple):
+    api_key: str
+    cache_key: str
+    local: dict
+
+
+def _before_groq(description, started, fallback):
+    """
+    Every step ahead of Groq: the local model, a near-duplicate, the API key
+    and the cache. Returns (answer, None) when one of them settles the
+    classification, otherwise (None, _Pending) for _after_groq().
     """
-    api_key = os.environ.get("GROQ_API_KEY", "")
+    local, confidence = local_classifier.predict(description)
+    if local is not None and confidence >= settings.LOCAL_CLASSIFIER_THRESHOLD:
+        _observe(started, "local")
+        return local, None
+
+    duplicate = similarity.classified_duplicate(description)
+    if duplicate is not None:
+        _observe(started, "duplicate")
+        return duplicate, None
+
+    api_key = _api_key()
     if not api_key:
         logger.warning("GROQ_API_KEY not set — skipping LLM classification.")
-        return _default_response()
+        return _give_up(started, local, fallback, "no_api_key"), None
+
+    key = cache_key(description, GROQ_MODEL, PROMPT_VERSION)
+    cached = classification_cache.get(key)
+    if cached is not None:
+        _observe(started, "cache_hit")
+        return dict(cached), None
+    return None, _Pending(api_key, key, local)
+
+
+def _after_groq(result, pending, started, fallback):
+    """Cache Groq's answer and return it, or fall back if there was none."""
+    if result is None:
+        # Approximate: the breaker may have opened on this very call.
+        reason = "breaker_open" if breaker.state == breaker.OPEN else "llm_error"
+        return _give_up(started, pending.local, fallback, reason)
+
+    classification_cache.set(pending.cache_key, result)
+    _observe(started, "llm")
+    return dict(result)
+
 
+def classify_tickets(descriptions: list, max_workers: int = None) -> list:
+    """
+    Classify many descriptions concurrently; results come back in input order.
+
+    At most `max_workers` (default settings.LLM_BATCH_CONCURRENCY) Groq calls
+    are in flight at once, so a batch takes about as long as its slowest call.
+    Descriptions that share a cache key are classified once. Every item falls
+    back to the default independently.
+    """
+    max_workers = max_workers or settings.LLM_BATCH_CONCURRENCY
+    unique = {}
+    for description in descriptions:
+        unique.setdefault(cache_key(description, GROQ_MODEL, PROMPT_VERSION), description)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique)))) as pool:
+        futures = {key: pool.submit(_classify_in_thread, text) for key, text in unique.items()}
+
+    results = {}
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except Exception as exc:
+            logger.error("Batch classification item failed: %s", exc)
+            results[key] = _default_response()
+    return [
+        dict(results[cache_key(description, GROQ_MODEL, PROMPT_VERSION)])
+        for description in descriptions
+    ]
+
+
+def _classify_in_thread(description: str) -> dict:
     try:
-        client = Groq(api_key=api_key)
+        return classify_ticket(description)
+    finally:
+        # The shared cache tier opens a DB connection per thread; don't leak it.
+        connections.close_all()
 
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",   # Free, extremely fast (~150-200ms)
-            max_tokens=64,
-            temperature=0,                   # Deterministic output for classification
-            messages=[
-                {
-                    "role": "user",
-                    "content": CLASSIFY_PROMPT.format(description=description.strip()),
-                }
-            ],
-        )
 
-        raw_text = completion.choices[0].message.content.strip()
+def _request_classification(api_key: str, description: str):
+    """
+    One single-ticket Groq round trip. Returns the validated classification, or
+    None on any failure (callers substitute the default — and must not cache it).
+    """
+    return _parse_single(_complete(api_key, _single_prompt(description), max_tokens=64))
 
-        # Strip accidental markdown fences if the model adds them despite instructions
-        if raw_text.startswith("```"):
-            raw_text = raw_text.split("```")[1]
-            if raw_text.startswith("json"):
-                raw_text = raw_text[4:]
-            raw_text = raw_text.strip()
 
-        data = json.loads(raw_text)
+async def _arequest_classification(api_key: str, description: str):
+    """_request_classification() over the async client."""
+    return _parse_single(await _acomplete(api_key, _single_prompt(description), max_tokens=64))
 
-        category = data.get("category", "").lower()
-        priority = data.get("priority", "").lower()
 
-        if category not in VALID_CATEGORIES or priority not in VALID_PRIORITIES:
-            logger.warning("LLM returned out-of-range values: %s", data)
-            return _default_response()
+def _single_prompt(description: str) -> str:
+    return CLASSIFY_PROMPT.format(description=description.strip())
 
-        return {"suggested_category": category, "suggested_priority": priority}
 
+def _parse_single(raw_text):
+    if raw_text is None:
+        return None
+    try:
+        return _validate(json.loads(_strip_fences(raw_text)))
     except json.JSONDecodeError as exc:
         logger.error("LLM response was not valid JSON: %s", exc)
-        return _default_response()
-    except APIError as exc:
-        logger.error("Groq API error: %s", exc)
-        return _default_response()
+        return None
     except Exception as exc:
         logger.error("Unexpected error during LLM classification: %s", exc)
-        return _default_response()
+        return None
+
+
+def _request_batch_classification(descriptions: list) -> list:
+    """
+    Classify several descriptions with one BATCH_CLASSIFY_PROMPT round trip.
+    Returns one validated classification or None per description, in order.
+    """
+    api_key = _api_key()
+    if len(descriptions) == 1:
+        return [_request_classification(api_key, descriptions[0])]
+
+    tickets = "\n\n".join(
+        f"Ticket {number}:\n{description.strip()}"
+        for number, description in enumerate(descriptions, start=1)
+    )
+    raw_text = _complete(
+        api_key,
+        BATCH_CLASSIFY_PROMPT.format(tickets=tickets),
+        max_tokens=32 * len(descriptions) + 16,
+    )
+    results = [None] * len(descriptions)
+    if raw_text is None:
+        return results
+
+    try:
+        data = json.loads(_strip_fences(raw_text))
+    except json.JSONDecodeError as exc:
+        logger.error("Batched LLM response was not valid JSON: %s", exc)
+        return results
+    if not isinstance(data, list):
+        logger.warning("Batched LLM response was not a JSON array: %s", data)
+        return results
+
+    for position, item in enumerate(data):
+        if not isinstance(item, dict):
+            continue
+        # Trust the ticket number when present; otherwise fall back to position.
+        number = item.get("ticket")
+        index = number - 1 if isinstance(number, int) else position
+        if 0 <= index < len(results) and results[index] is None:
+            results[index] = _validate(item)
+    return results
+
+
+def _complete(api_key: str, prompt: str, max_tokens: int):
+    """
+    Send one prompt to Groq, guarded by the circuit breaker, the shared rate
+    limiter and the per-call deadline. A 429 is retried once, after its
+    retry-after. Returns the raw completion text, or None if no answer came back.
+    """
+    steps = _completion_steps(prompt, max_tokens)
+    action, arg = _resume(steps, None)
+    while action is not _DONE:
+        try:
+            if action is _ACQUIRE:
+                outcome = limiter.acquire(*arg)
+            elif action is _BLOCK:
+                outcome = limiter.block(arg)
+            else:
+                outcome = get_client(api_key).chat.completions.create(**arg)
+        except Exception as exc:
+            outcome = exc
+        action, arg = _resume(steps, outcome)
+    return arg
+
+
+async def _acomplete(api_key: str, prompt: str, max_tokens: int):
+    """_complete() on the running event loop's AsyncGroq client."""
+    steps = _completion_steps(prompt, max_tokens)
+    action, arg = _resume(steps, None)
+    while action is not _DONE:
+        try:
+            if action is _ACQUIRE:
+                outcome = await limiter.aacquire(*arg)
+            elif action is _BLOCK:
+                outcome = await limiter.ablock(arg)
+            else:
+                outcome = await get_async_client(api_key).chat.completions.create(**arg)
+        except Exception as exc:
+            outcome = exc
+        action, arg = _resume(steps, outcome)
+    return arg
+
+
+_ACQUIRE, _BLOCK, _CALL, _DONE = "acquire", "block", "call", "done"
+
+
+def _completion_steps(prompt: str, max_tokens: int):
+    """
+    The policy behind _complete() and _acomplete(), written once so the two
+    differ only in how they wait and call Groq. A generator: it yields
+    (_ACQUIRE, (tokens, deadline)), (_CALL, create() kwargs) and
+    (_BLOCK, seconds), is resumed with each step's outcome, and returns the
+    raw completion text or None. A failed _ACQUIRE or _BLOCK step lets the
+    call go ahead unmetered, like the limiter's own database errors.
+    """
+    if not _breaker_allows():
+        return None
+    tokens, deadline = estimate_tokens(prompt, max_tokens), limiter.deadline()
+    for _ in range(RATE_LIMIT_ATTEMPTS):
+        try:
+            admitted = yield _ACQUIRE, (tokens, deadline)
+        except Exception as exc:
+            # The limiter is best effort; a failure of its own must not fail the call.
+            logger.error("Groq rate limiter failed; calling unmetered: %s", exc)
+            admitted = True
+        if not admitted:
+            return _throttled()
+        try:
+            completion = yield _CALL, _completion_args(prompt, max_tokens)
+        except RateLimitError as exc:
+            try:
+                yield _BLOCK, _rate_limited(exc)
+            except Exception as block_exc:
+                logger.error("Could not record Groq retry-after: %s", block_exc)
+            continue
+        except Exception as exc:
+            _record_failure(exc)
+            return None
+        return _answer(completion)
+    return _throttled()
+
+
+def _resume(steps, outcome):
+    """
+    Resume _completion_steps() with the last step's outcome (thrown in if it
+    is an exception) and return its next (action, arg).
+    """
+    try:
+        if isinstance(outcome, Exception):
+            return steps.throw(outcome)
+        return steps.send(outcome)
+    except StopIteration as done:
+        return _DONE, done.value
+
+
+def _completion_args(prompt: str, max_tokens: int) -> dict:
+    return {
+        "model": GROQ_MODEL,
+        "max_tokens": max_tokens,
+        "temperature": 0,                    # Deterministic output for classification
+        "messages": [{"role": "user", "content": prompt}],
+        "timeout": call_timeout(),
+    }
+
+
+def _breaker_allows() -> bool:
+    if breaker.allow():
+        return True
+    metrics.groq_requests.inc(result="breaker_open")
+    logger.warning("Groq circuit breaker is open — skipping LLM classification.")
+    return False
+
+
+def _rate_limited(exc) -> float:
+    metrics.groq_requests.inc(result="rate_limited")
+    seconds = retry_after(exc)
+    logger.warning("Groq rate limit hit; holding calls back for %.1fs.", seconds)
+    return seconds
+
+
+def _throttled():
+    # Being rate limited says nothing about upstream health; a half-open
+    # breaker's trial must not stay in flight forever either.
+    breaker.release_trial()
+    return None
+
+
+def _record_failure(exc):
+    breaker.record_failure()
+    if isinstance(exc, APITimeoutError):
+        metrics.groq_requests.inc(result="timeout")
+        logger.error("Groq call exceeded its %ss deadline.", settings.GROQ_TIMEOUT)
+    elif isinstance(exc, APIError):
+        metrics.groq_requests.inc(result="api_error")
+        logger.error("Groq API error: %s", exc)
+    else:
+        metrics.groq_requests.inc(result="error")
+        logger.error("Unexpected error during LLM classification: %s", exc)
+
+
+def _answer(completion) -> str:
+    # Groq answered, so the upstream is healthy even if the answer is unusable.
+    breaker.record_success()
+    metrics.groq_requests.inc(result="ok")
+    return completion.choices[0].message.content or ""
+
+
+def _strip_fences(raw_text: str) -> str:
+    raw_text = raw_text.strip()
+    # Strip accidental markdown fences if the model adds them despite instructions
+    if raw_text.startswith("```"):
+        raw_text = raw_text.split("```")[1]
+        if raw_text.startswith("json"):
+            raw_text = raw_text[4:]
+        raw_text = raw_text.strip()
+    return raw_text
+
+
+def _validate(data):
+    category = str(data.get("category", "")).lower()
+    priority = str(data.get("priority", "")).lower()
+
+    if category not in VALID_CATEGORIES or priority not in VALID_PRIORITIES:
+        logger.warning("LLM returned out-of-range values: %s", data)
+        return None
+
+    return {"suggested_category": category, "suggested_priority": priority}
+
+
+def _observe(started, outcome, reason=""):
+    metrics.classify_duration.observe(time.perf_counter() - started, outcome=outcome, reason=reason)
+
+
+def _give_up(started, local, fallback, reason):
+    _observe(started, "fallback" if fallback else "failed", reason)
+    return _fallback(local) if fallback else None
+
+
+def _fallback(local) -> dict:
+    return local if local is not None else _default_response()
 
 
 def _default_response() -> dict:
     return {"suggested_category": "general", "suggested_priority": "medium"}
+
+
+limiter = RateLimiter(GROQ_MODEL)
+batcher = MicroBatcher(_request_batch_classification)
@@ -0,0 +1,130 @@
+"""
+Micro-batching in front of the Groq classify call.
+
+Requests that miss the cache are queued here instead of calling Groq directly.
+A collector thread takes the first queued description, waits up to
+settings.LLM_COALESCE_WINDOW_MS for more (at most LLM_COALESCE_MAX_BATCH), and
+hands the batch to `dispatch`, which classifies all of them with a single
+prompt. Each caller blocks on its own Future and receives only its own result.
+
+Batches are dispatched on a small pool so a slow Groq call never stops the
+collector from forming the next batch; each batch opens and closes its own
+database connections. The collector is per process and is restarted after a
+fork. Async views await the same Futures through aclassify(), so waiting for a
+batch never blocks the event loop.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    def __init__(self, dispatch):
+        """`dispatch(descriptions)` returns one result (or None) per description, in order."""
+        self._dispatch = dispatch
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._pool = None
+
+    @property
+    def enabled(self):
+        return settings.LLM_COALESCE_WINDOW_MS > 0 and settings.LLM_COALESCE_MAX_BATCH > 1
+
+    def classify(self, description):
+        """Queue one description and wait for its slice of a batched answer."""
+        future = self._submit(description)
+        wait = self._max_wait()
+        try:
+            return future.result(timeout=wait)
+        except FutureTimeoutError:
+            logger.error("Coalesced classification timed out after %.1fs.", wait)
+            return None
+
+    async def aclassify(self, description):
+        """classify() for coroutines."""
+        future = self._submit(description)
+        wait = self._max_wait()
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), wait)
+        except asyncio.TimeoutError:
+            logger.error("Coalesced classification timed out after %.1fs.", wait)
+            return None
+
+    def _submit(self, description):
+        future = Future()
+        self._ensure_running().put((description, future))
+        return future
+
+    def _max_wait(self):
+        # The window, the rate limiter's longest wait and two Groq deadlines (a
+        # 429 is retried once) bound the wait; the margin covers queueing
+        # behind other batches on the dispatch pool.
+        return (
+            settings.LLM_COALESCE_WINDOW_MS / 1000
+            + settings.GROQ_RATE_MAX_WAIT
+            + settings.GROQ_TIMEOUT * 2
+            + 1
+        )
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                self._pool = ThreadPoolExecutor(
+                    max_workers=settings.LLM_BATCH_CONCURRENCY,
+                    thread_name_prefix="llm-batch",
+                )
+                threading.Thread(
+                    target=self._collect,
+                    args=(self._queue, self._pool),
+                    name="llm-batch-collector",
+                    daemon=True,
+                ).start()
+            return self._queue
+
+    def _collect(self, pending, pool):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + settings.LLM_COALESCE_WINDOW_MS / 1000
+            while len(batch) < settings.LLM_COALESCE_MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            pool.submit(self._run, batch)
+
+    def _run(self, batch):
+        # Skip callers that stopped waiting (a timed-out or cancelled aclassify()).
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        # The dispatch pool's threads outlive any request, so nothing else would
+        # notice their connections (used by the rate limiter) going stale.
+        close_old_connections()
+        try:
+            results = self._dispatch([description for description, _ in batch])
+        except Exception as exc:
+            logger.error("Coalesced classification failed: %s", exc)
+            results = None
+        finally:
+            connections.close_all()
+        if results is None or len(results) != len(batch):
+            results = [None] * len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,123 @@
+"""
+Content-addressed cache for classify_ticket() results.
+
+Classification runs at temperature=0, so the same description sent with the
+same model and prompt always gets the same answer. Results are stored under a
+SHA-256 of (model, prompt version, normalised description) in two tiers, both
+Django cache aliases configured in settings.CACHES:
+
+  "llm"        — in-process LocMemCache: LRU-evicted at MAX_ENTRIES, TTL'd.
+  "llm-shared" — optional DatabaseCache shared by every gunicorn worker. A
+                 local miss that hits here is copied into the local tier.
+
+Only real LLM answers are cached — fallbacks never are, so an outage does not
+pin tickets to general/medium. The shared tier is best effort: if it errors,
+the lookup degrades to a miss rather than failing the classify call.
+"""
+
+import hashlib
+import logging
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+LOCAL_ALIAS = "llm"
+SHARED_ALIAS = "llm-shared"
+
+
+def normalize_description(description: str) -> str:
+    """Fold case, Unicode forms and whitespace so trivially different texts share a key."""
+    return " ".join(unicodedata.normalize("NFKC", description).casefold().split())
+
+
+def cache_key(description: str, model: str, prompt_version: str) -> str:
+    digest = hashlib.sha256(
+        "\0".join([model, prompt_version, normalize_description(description)]).encode("utf-8")
+    ).hexdigest()
+    return f"classify:{digest}"
+
+
+class ClassificationCache:
+    def __init__(self, local_alias=LOCAL_ALIAS, shared_alias=SHARED_ALIAS):
+        self.local_alias = local_alias
+        self.shared_alias = shared_alias
+        self._lock = threading.Lock()
+        self._counts = {"local_hits": 0, "shared_hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    @property
+    def local(self):
+        return caches[self.local_alias]
+
+    @property
+    def shared(self):
+        if self.shared_alias in settings.CACHES:
+            return caches[self.shared_alias]
+        return None
+
+    def get(self, key):
+        value = self._get_local(key)
+        if value is None and self.shared is not None:
+            value = self._get_shared(key)
+        return self._counted_lookup(value)
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            self._set_shared(key, value)
+        self._count("stores")
+
+    def _get_local(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            self._count("local_hits")
+        return value
+
+    def _get_shared(self, key):
+        try:
+            value = self.shared.get(key)
+        except Exception as exc:
+            self._count("errors")
+            logger.warning("Shared classification cache read failed: %s", exc)
+            return None
+        if value is not None:
+            self.local.set(key, value)
+            self._count("shared_hits")
+        return value
+
+    def _set_shared(self, key, value):
+        try:
+            self.shared.set(key, value)
+        except Exception as exc:
+            self._count("errors")
+            logger.warning("Shared classification cache write failed: %s", exc)
+
+    def _counted_lookup(self, value):
+        if value is None:
+            self._count("misses")
+        return value
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["local_hits"] + counts["shared_hits"] + counts["misses"]
+        hits = counts["local_hits"] + counts["shared_hits"]
+        counts["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        counts["shared_tier"] = self.shared is not None
+        return counts
+
+    def clear(self):
+        self.local.clear()
+        with self._lock:
+            for name in self._counts:
+                self._counts[name] = 0
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+
+classification_cache = ClassificationCache()
@@ -0,0 +1,158 @@
+"""
+Process-wide Groq client and circuit breaker.
+
+One Groq client is built per process (per gunicorn worker) on top of a pooled
+httpx transport, so successive classify calls reuse open TLS connections
+instead of handshaking every time. The client is rebuilt only if its
+configuration changes or the process forks. Async views (ASGI) get an AsyncGroq
+client per event loop instead, since httpx async connections belong to the
+loop that opened them; uvicorn runs one loop per worker.
+
+SDK retries are disabled: every call gets a single attempt bounded by
+settings.GROQ_TIMEOUT, and repeated failures trip the circuit breaker, which
+short-circuits further calls to the fallback for GROQ_BREAKER_COOLDOWN
+seconds instead of tying up workers on a struggling upstream.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+import httpx
+from django.conf import settings
+from groq import AsyncGroq, Groq
+
+_client_lock = threading.Lock()
+_client = None
+_client_config = None
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> (config, client)
+
+
+def get_client(api_key: str) -> Groq:
+    global _client, _client_config
+    config = (
+        api_key,
+        settings.GROQ_BASE_URL or None,
+        settings.GROQ_MAX_CONNECTIONS,
+        os.getpid(),
+    )
+    with _client_lock:
+        if _client is None or _client_config != config:
+            if _client is not None and _client_config[-1] == os.getpid():
+                _client.close()
+            _client = _build_client(*config[:3])
+            _client_config = config
+        return _client
+
+
+def get_async_client(api_key: str) -> AsyncGroq:
+    """The AsyncGroq client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    config = (api_key, settings.GROQ_BASE_URL or None, settings.GROQ_MAX_CONNECTIONS)
+    with _client_lock:
+        entry = _async_clients.get(loop)
+        if entry is None or entry[0] != config:
+            # A replaced client is left to the garbage collector; closing it would need the loop.
+            entry = (config, _build_async_client(*config))
+            _async_clients[loop] = entry
+        return entry[1]
+
+
+def _limits(max_connections):
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=60,
+    )
+
+
+def _build_client(api_key, base_url, max_connections):
+    http_client = httpx.Client(limits=_limits(max_connections))
+    return Groq(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
+
+
+def _build_async_client(api_key, base_url, max_connections):
+    http_client = httpx.AsyncClient(limits=_limits(max_connections))
+    return AsyncGroq(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
+
+
+def call_timeout() -> httpx.Timeout:
+    """Per-call deadline; applies to each phase of the single attempt."""
+    return httpx.Timeout(settings.GROQ_TIMEOUT)
+
+
+class CircuitBreaker:
+    """
+    Closed → open after `threshold` consecutive failures; open → half-open once
+    `cooldown` seconds have passed, letting a single trial call through; the
+    trial's outcome closes the breaker again or re-opens it for another cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold=None, cooldown=None, clock=time.monotonic):
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def threshold(self):
+        return self._threshold if self._threshold is not None else settings.GROQ_BREAKER_THRESHOLD
+
+    @property
+    def cooldown(self):
+        return self._cooldown if self._cooldown is not None else settings.GROQ_BREAKER_COOLDOWN
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Let another trial through when the admitted one never reached Groq."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def reset(self):
+        self.record_success()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at < self.cooldown:
+            return self.OPEN
+        return self.HALF_OPEN
+
+
+breaker = CircuitBreaker()
@@ -0,0 +1,201 @@
+"""
+Rate limiting for outbound Groq calls, shared by every process.
+
+Groq meters each model by requests and tokens per minute for the whole
+account, so a per-process limit would let N workers send N times the quota.
+The budget lives instead in one GroqRateBucket row per model: two token
+buckets that refill continuously at GROQ_RATE_RPM and GROQ_RATE_TPM per
+minute, holding at most one minute's worth.
+
+Before each call a caller reserves one request plus the call's estimated
+tokens (prompt characters / 4, plus max_tokens) under the row lock. A
+reservation may take a bucket below zero. The deficit is how long the caller
+must sleep before calling, so callers go in the order they reserved, across
+all processes. A reservation that would have to wait past the caller's
+deadline (GROQ_RATE_MAX_WAIT from its first attempt) takes nothing and is
+refused, and the caller falls back like any other failed call.
+
+A 429 means the estimate and Groq's own count disagree. Its retry-after is
+stored as blocked_until, which holds back every reservation until then, and
+the call is retried once before the same deadline.
+
+The row lock lasts for the reservation's transaction, so callers must not be
+inside a long transaction of their own; the classify paths never are. The
+limiter is best effort: if the database errors (including a dropped
+connection, which Django raises as InterfaceError), the call goes ahead
+unmetered.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import Error as DBError, transaction
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from . import metrics
+from .models import GroqRateBucket
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token in English text; Groq's tokenizer is not available locally.
+CHARS_PER_TOKEN = 4
+# Used when a 429 carries no usable retry-after header.
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    return len(prompt) // CHARS_PER_TOKEN + max_tokens
+
+
+def retry_after(exc) -> float:
+    """Seconds a 429 asks us to wait, from its retry-after header."""
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+class RateLimiter:
+    """Request and token budgets for one model; 0 leaves that dimension unlimited."""
+
+    def __init__(self, name, rpm=None, tpm=None, max_wait=None):
+        self.name = name
+        self._rpm = rpm
+        self._tpm = tpm
+        self._max_wait = max_wait
+
+    @property
+    def rpm(self):
+        return self._rpm if self._rpm is not None else settings.GROQ_RATE_RPM
+
+    @property
+    def tpm(self):
+        return self._tpm if self._tpm is not None else settings.GROQ_RATE_TPM
+
+    @property
+    def max_wait(self):
+        return self._max_wait if self._max_wait is not None else settings.GROQ_RATE_MAX_WAIT
+
+    @property
+    def enabled(self):
+        return self.rpm > 0 or self.tpm > 0
+
+    def deadline(self) -> float:
+        """The time.monotonic() by which a call starting now must have been let through."""
+        return time.monotonic() + self.max_wait
+
+    def reserve(self, tokens: int, max_wait: float):
+        """
+        Reserve one request and `tokens` tokens. Returns how many seconds to
+        wait before calling, or None (reserving nothing) if that is more than
+        `max_wait`.
+        """
+        rpm, tpm = self.rpm, self.tpm
+        # A prompt larger than the whole budget waits for a full bucket, not forever.
+        tokens = min(tokens, tpm)
+        with transaction.atomic():
+            bucket = self._locked()
+            now = bucket.now
+            elapsed = max((now - bucket.refilled_at).total_seconds(), 0.0)
+            requests = _refill(bucket.requests, rpm, elapsed) - 1
+            available = _refill(bucket.tokens, tpm, elapsed) - tokens
+            blocked = (bucket.blocked_until - now).total_seconds() if bucket.blocked_until else 0.0
+            wait = max(_deficit(requests, rpm), _deficit(available, tpm), blocked, 0.0)
+            if wait > max_wait:
+                return None
+            GroqRateBucket.objects.filter(pk=bucket.pk).update(
+                requests=requests, tokens=available, refilled_at=now
+            )
+        return wait
+
+    def acquire(self, tokens: int, deadline: float) -> bool:
+        """Reserve and sleep until the call may go; False if it could not go before `deadline`."""
+        if not self.enabled:
+            return True
+        try:
+            wait = self.reserve(tokens, deadline - time.monotonic())
+        except DBError as exc:
+            logger.error("Groq rate limiter unavailable; calling unmetered: %s", exc)
+            return True
+        if not self._waited(wait):
+            return False
+        time.sleep(wait)
+        return True
+
+    async def aacquire(self, tokens: int, deadline: float) -> bool:
+        """acquire() for coroutines: the reservation runs in a thread and the wait is awaited."""
+        if not self.enabled:
+            return True
+        try:
+            wait = await sync_to_async(self.reserve)(tokens, deadline - time.monotonic())
+        except DBError as exc:
+            logger.error("Groq rate limiter unavailable; calling unmetered: %s", exc)
+            return True
+        if not self._waited(wait):
+            return False
+        await asyncio.sleep(wait)
+        return True
+
+    def block(self, seconds: float):
+        """Hold back every reservation for `seconds` (a 429's retry-after)."""
+        if not self.enabled:
+            return
+        try:
+            with transaction.atomic():
+                bucket = self._locked()
+                until = bucket.now + timedelta(seconds=seconds)
+                if bucket.blocked_until is None or bucket.blocked_until < until:
+                    GroqRateBucket.objects.filter(pk=bucket.pk).update(blocked_until=until)
+        except DBError as exc:
+            logger.error("Could not record Groq retry-after: %s", exc)
+
+    async def ablock(self, seconds: float):
+        await sync_to_async(self.block)(seconds)
+
+    def reset(self):
+        GroqRateBucket.objects.filter(name=self.name).delete()
+
+    def _locked(self):
+        """This model's bucket row, locked, annotated with the database clock as `now`."""
+        rows = GroqRateBucket.objects.select_for_update().annotate(
+            now=RawSQL("clock_timestamp()", ())
+        )
+        bucket = rows.filter(name=self.name).first()
+        if bucket is None:
+            GroqRateBucket.objects.bulk_create(
+                [
+                    GroqRateBucket(
+                        name=self.name,
+                        requests=self.rpm,
+                        tokens=self.tpm,
+                        refilled_at=timezone.now(),
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+            bucket = rows.get(name=self.name)
+        return bucket
+
+    def _waited(self, wait):
+        if wait is None:
+            metrics.groq_requests.inc(result="throttled")
+            logger.warning("Groq rate limit would delay the call past GROQ_RATE_MAX_WAIT; skipping it.")
+            return False
+        metrics.groq_rate_wait.observe(wait)
+        return True
+
+
+def _refill(balance, rate, elapsed):
+    # An unlimited dimension (rate 0) is never charged.
+    return min(rate, balance + rate * elapsed / 60) if rate else 0.0
+
+
+def _deficit(balance, rate):
+    return -balance * 60 / rate if rate and balance < 0 else 0.0
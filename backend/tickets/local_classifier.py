@@ -0,0 +1,206 @@
+"""
+In-process ticket classifier used before and instead of Groq.
+
+Two multinomial naive Bayes models (category, priority) over binary unigram
+and bigram features of the normalised description, trained from the ticket
+table by `manage.py train_classifier`. A trained model is a dict of per-token
+log-likelihoods, so a prediction is a few dict lookups per token — tens of
+microseconds for a typical description, with no third-party dependencies.
+
+classify_ticket() answers from here without calling Groq when the model's
+confidence (the lower of its two posterior probabilities) reaches
+settings.LOCAL_CLASSIFIER_THRESHOLD, and uses a lower-confidence prediction
+in place of the hard-coded general/medium default when Groq is unavailable.
+
+The model is stored as gzipped JSON at settings.LOCAL_CLASSIFIER_PATH and is
+reloaded whenever the file changes; with no file, every call goes to Groq.
+"""
+
+import gzip
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from .llm_cache import normalize_description
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def features(description: str) -> set:
+    words = [w for w in _WORD.findall(normalize_description(description)) if len(w) > 1]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+class NaiveBayes:
+    """Multinomial naive Bayes with binary features and Laplace smoothing."""
+
+    def __init__(self, classes, log_prior, log_likelihood, log_unseen):
+        self.classes = classes
+        self.log_prior = log_prior
+        self.log_likelihood = log_likelihood   # token -> [log P(token|class), ...]
+        self.log_unseen = log_unseen            # [log P(unseen token|class), ...]
+
+    @classmethod
+    def fit(cls, samples, labels, alpha=1.0, min_df=2):
+        """`samples` are feature sets (see features()), `labels` the matching classes."""
+        classes = sorted(set(labels))
+        index = {label: i for i, label in enumerate(classes)}
+        doc_freq = Counter(token for sample in samples for token in sample)
+        vocabulary = {token for token, n in doc_freq.items() if n >= min_df}
+
+        class_docs = Counter(labels)
+        token_counts = defaultdict(lambda: [0] * len(classes))
+        totals = [0] * len(classes)
+        for sample, label in zip(samples, labels):
+            i = index[label]
+            for token in sample & vocabulary:
+                token_counts[token][i] += 1
+                totals[i] += 1
+
+        denominators = [total + alpha * (len(vocabulary) + 1) for total in totals]
+        return cls(
+            classes=classes,
+            log_prior=[math.log(class_docs[c] / len(labels)) for c in classes],
+            log_likelihood={
+                token: [math.log((n + alpha) / d) for n, d in zip(counts, denominators)]
+                for token, counts in token_counts.items()
+            },
+            log_unseen=[math.log(alpha / d) for d in denominators],
+        )
+
+    def predict(self, sample):
+        """Return (class, posterior probability) for one feature set."""
+        scores = list(self.log_prior)
+        known = False
+        for token in sample:
+            row = self.log_likelihood.get(token)
+            if row is not None:
+                known = True
+                for i, value in enumerate(row):
+                    scores[i] += value
+        if not known:
+            # Nothing recognisable: the prior alone is not a prediction.
+            return None, 0.0
+        best = max(range(len(scores)), key=scores.__getitem__)
+        total = sum(math.exp(score - scores[best]) for score in scores)
+        return self.classes[best], 1.0 / total
+
+    def to_dict(self):
+        return {
+            "classes": self.classes,
+            "log_prior": [round(v, 5) for v in self.log_prior],
+            "log_unseen": [round(v, 5) for v in self.log_unseen],
+            "log_likelihood": {
+                token: [round(v, 4) for v in row] for token, row in self.log_likelihood.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["classes"], data["log_prior"], data["log_likelihood"], data["log_unseen"])
+
+
+class LocalClassifier:
+    def __init__(self, category, priority, metadata=None):
+        self.category = category
+        self.priority = priority
+        self.metadata = metadata or {}
+
+    @classmethod
+    def train(cls, rows):
+        """`rows` are (description, category, priority) tuples."""
+        samples, categories, priorities = [], [], []
+        for description, category, priority in rows:
+            samples.append(features(description))
+            categories.append(category)
+            priorities.append(priority)
+        return cls(
+            NaiveBayes.fit(samples, categories),
+            NaiveBayes.fit(samples, priorities),
+            metadata={"samples": len(samples), "trained_at": timezone.now().isoformat()},
+        )
+
+    def predict(self, description: str):
+        """
+        Return (classification, confidence). The classification is None when the
+        description shares no vocabulary with the training data.
+        """
+        sample = features(description)
+        category, category_p = self.category.predict(sample)
+        priority, priority_p = self.priority.predict(sample)
+        if category is None or priority is None:
+            return None, 0.0
+        result = {"suggested_category": category, "suggested_priority": priority}
+        return result, min(category_p, priority_p)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        payload = {
+            "format": FORMAT_VERSION,
+            "metadata": self.metadata,
+            "category": self.category.to_dict(),
+            "priority": self.priority.to_dict(),
+        }
+        # Write then rename so a serving process never loads a half-written file.
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+            json.dump(payload, fh, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            payload = json.load(fh)
+        if payload.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported classifier format {payload.get('format')!r}")
+        return cls(
+            NaiveBayes.from_dict(payload["category"]),
+            NaiveBayes.from_dict(payload["priority"]),
+            metadata=payload.get("metadata"),
+        )
+
+
+_lock = threading.Lock()
+_loaded = None
+_loaded_key = None
+
+
+def get_classifier():
+    """The model at settings.LOCAL_CLASSIFIER_PATH, reloaded when the file changes; None if absent."""
+    global _loaded, _loaded_key
+    path = settings.LOCAL_CLASSIFIER_PATH
+    if not path:
+        return None
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+    if key == _loaded_key:
+        return _loaded
+    with _lock:
+        if key != _loaded_key:
+            try:
+                _loaded = LocalClassifier.load(path)
+            except Exception as exc:
+                logger.error("Could not load local classifier from %s: %s", path, exc)
+                _loaded = None
+            _loaded_key = key
+        return _loaded
+
+
+def predict(description: str):
+    """(classification, confidence) from the local model, or (None, 0.0) without one."""
+    classifier = get_classifier()
+    if classifier is None:
+        return None, 0.0
+    return classifier.predict(description)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tickets import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move closed tickets that have not changed for --days days out of the "
+        "ticket table into the archive (see tickets/archive.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TICKET_ARCHIVE_AFTER_DAYS,
+            help="Archive closed tickets unchanged for this many days "
+            f"(default TICKET_ARCHIVE_AFTER_DAYS, {settings.TICKET_ARCHIVE_AFTER_DAYS}).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TICKET_ARCHIVE_BATCH_SIZE,
+            help="Tickets moved per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        moved = archive.archive(days=options["days"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} ticket(s)."))
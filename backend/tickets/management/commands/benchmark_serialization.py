@@ -0,0 +1,86 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from tickets import read_path, stats
+from tickets.models import Ticket
+from tickets.renderers import FastJSONRenderer
+from tickets.serializers import TicketSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time TicketSerializer + JSONRenderer against the values_list/orjson read "
+        "path on the N newest tickets, and check both produce identical bytes. "
+        "Missing rows are generated inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000],
+            help="Row counts to benchmark (default: 10000 100000).",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Best of N runs (default 3).")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._ensure_rows(max(options["rows"]))
+                self.stdout.write(f"{'rows':>8}  {'serializer':>11}  {'fast path':>10}  {'speedup':>7}")
+                for count in options["rows"]:
+                    self._benchmark(count, options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _ensure_rows(self, count):
+        missing = count - Ticket.objects.count()
+        if missing <= 0:
+            return
+        self.stdout.write(f"Generating {missing} temporary ticket(s)...")
+        for start in range(0, missing, 5000):
+            created = Ticket.objects.bulk_create(
+                Ticket(
+                    title=f"Benchmark ticket {n}",
+                    description=f"Synthetic description for benchmark ticket {n} — with “unicode”.",
+                    category=("billing", "technical", "account", "general")[n % 4],
+                    priority=("low", "medium", "high", "critical")[n % 4],
+                )
+                for n in range(start, min(start + 5000, missing))
+            )
+            stats.record_created(created)
+
+    def _benchmark(self, count, repeat):
+        queryset = Ticket.objects.order_by("-created_at", "-id")[:count]
+
+        def serializer_path():
+            return JSONRenderer().render(TicketSerializer(queryset, many=True).data)
+
+        def fast_path():
+            return FastJSONRenderer().render(read_path.represent(read_path.values(queryset)))
+
+        baseline, expected = self._time(serializer_path, repeat)
+        fast, actual = self._time(fast_path, repeat)
+        if actual != expected:
+            raise CommandError(f"Fast path output differs from TicketSerializer at {count} rows.")
+        self.stdout.write(
+            f"{count:>8}  {baseline * 1000:>9.0f}ms  {fast * 1000:>8.0f}ms  {baseline / fast:>6.1f}x"
+        )
+
+    def _time(self, run, repeat):
+        best = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            body = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
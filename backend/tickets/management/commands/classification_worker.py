@@ -0,0 +1,50 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tickets import jobs, similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the asynchronous ticket classification worker: claim queued "
+        "ClassificationJobs and write the LLM's suggestion back onto each ticket."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=2,
+            help="Number of jobs processed in parallel (default 2).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.CLASSIFICATION_WORKER_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        similarity.warm()
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write("Finishing in-flight jobs, then stopping...")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        concurrency = max(1, options["concurrency"])
+        if not options["once"]:
+            self.stdout.write(f"Classification worker started with {concurrency} thread(s).")
+        jobs.run_workers(concurrency, options["poll_interval"], stop=stop, drain=options["once"])
+        self.stdout.write(self.style.SUCCESS("Classification worker stopped."))
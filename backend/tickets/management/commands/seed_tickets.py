@@ -0,0 +1,65 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert --count synthetic tickets with COPY for scale testing: skewed "
+        "categories, priorities and statuses, created_at spread over --days days "
+        "and varied description lengths, reproducible from --seed (see tickets/seed.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, required=True, help="Number of tickets to insert.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (default 0).")
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=seed.DEFAULT_DAYS,
+            help=f"Spread created_at over this many days (default {seed.DEFAULT_DAYS}).",
+        )
+        parser.add_argument(
+            "--end",
+            type=datetime.date.fromisoformat,
+            default=None,
+            help="Tickets are created before this date, YYYY-MM-DD (default today, UTC). "
+            "The same --seed and --end always produce the same tickets.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=seed.DEFAULT_BATCH_SIZE,
+            help=f"Tickets per COPY and transaction (default {seed.DEFAULT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=seed.DEFAULT_JOBS,
+            help="Batches loaded at once, each over its own connection; about the "
+            f"database's core count (default {seed.DEFAULT_JOBS}).",
+        )
+
+    def handle(self, *args, **options):
+        if options["count"] < 0 or options["days"] < 1 or min(options["batch_size"], options["jobs"]) < 1:
+            raise CommandError("--count must be >= 0; --days, --batch-size and --jobs >= 1.")
+        started = time.monotonic()
+
+        def progress(inserted):
+            self.stdout.write(f"  {inserted}/{options['count']} ({time.monotonic() - started:.1f}s)")
+
+        inserted = seed.seed(
+            options["count"],
+            seed=options["seed"],
+            days=options["days"],
+            end=options["end"],
+            batch_size=options["batch_size"],
+            jobs=options["jobs"],
+            progress=progress,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Seeded {inserted} ticket(s) in {time.monotonic() - started:.1f}s.")
+        )
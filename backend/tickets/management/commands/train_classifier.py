@@ -0,0 +1,80 @@
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.local_classifier import LocalClassifier
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Train the local ticket classifier from each ticket's final category and "
+        "priority, report its hold-out accuracy, and write it to "
+        "LOCAL_CLASSIFIER_PATH. Running processes pick up the new file automatically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.LOCAL_CLASSIFIER_PATH,
+            help="Where to write the model (default: LOCAL_CLASSIFIER_PATH).",
+        )
+        parser.add_argument(
+            "--min-samples",
+            type=int,
+            default=100,
+            help="Refuse to train on fewer tickets than this (default 100).",
+        )
+        parser.add_argument(
+            "--holdout",
+            type=float,
+            default=0.2,
+            help="Fraction of tickets held out to report accuracy (default 0.2; 0 skips).",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Shuffle seed for the hold-out split.")
+
+    def handle(self, *args, **options):
+        if not options["output"]:
+            raise CommandError("No output path: pass --output or set LOCAL_CLASSIFIER_PATH.")
+
+        rows = list(
+            Ticket.objects.order_by("id")
+            .values_list("description", "category", "priority")
+            .iterator(chunk_size=5000)
+        )
+        if len(rows) < options["min_samples"]:
+            raise CommandError(
+                f"Only {len(rows)} ticket(s) to learn from; need at least {options['min_samples']}."
+            )
+
+        holdout = int(len(rows) * options["holdout"])
+        if holdout:
+            shuffled = list(rows)
+            random.Random(options["seed"]).shuffle(shuffled)
+            self._report(LocalClassifier.train(shuffled[holdout:]), shuffled[:holdout])
+
+        classifier = LocalClassifier.train(rows)
+        classifier.save(options["output"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Trained on {len(rows)} ticket(s); wrote {options['output']}.")
+        )
+
+    def _report(self, classifier, rows):
+        threshold = settings.LOCAL_CLASSIFIER_THRESHOLD
+        correct = confident = confident_correct = 0
+        for description, category, priority in rows:
+            result, confidence = classifier.predict(description)
+            hit = result is not None and (result["suggested_category"], result["suggested_priority"]) == (category, priority)
+            correct += hit
+            if result is not None and confidence >= threshold:
+                confident += 1
+                confident_correct += hit
+        self.stdout.write(f"Hold-out ({len(rows)} tickets): {correct / len(rows):.1%} exact match.")
+        if confident:
+            self.stdout.write(
+                f"  {confident / len(rows):.1%} reach the {threshold} threshold and would skip Groq; "
+                f"{confident_correct / confident:.1%} of those are correct."
+            )
+        else:
+            self.stdout.write(f"  None reach the {threshold} threshold; every call would go to Groq.")
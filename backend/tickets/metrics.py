@@ -0,0 +1,177 @@
+"""
+In-process request and classification metrics, exposed at GET /api/metrics in
+the Prometheus text format (version 0.0.4).
+
+MetricsMiddleware (tickets/middleware.py) times every request and counts the
+SQL it runs; classify_ticket() reports how each classification was answered.
+Recording is a bisect plus a few additions under a per-metric lock, so it is
+cheap enough to leave on in production.
+
+Every gunicorn worker keeps its own registry, and each sample carries a
+`worker` label (the process id) so the series stay monotonic whichever worker
+answers a scrape. Aggregate with e.g.
+`sum without (worker) (rate(http_request_duration_seconds_count[5m]))`.
+"""
+
+import bisect
+import math
+import os
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key, worker, extra=()):
+        pairs = [*zip(self.labelnames, key), ("worker", worker), *extra]
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self, worker):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            values = {key: self._copy(value) for key, value in self._values.items()}
+        for key in sorted(values):
+            lines.extend(self._samples(key, values[key], worker))
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _copy(self, value):
+        return value
+
+    def _samples(self, key, value, worker):
+        yield f"{self.name}{self._labels(key, worker)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Counts are stored per bucket and only made cumulative when rendered.
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def snapshot(self, **labels):
+        """(count, sum) for one label set."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return (sum(state[0]), state[1]) if state else (0, 0.0)
+
+    def _copy(self, value):
+        return [list(value[0]), value[1]]
+
+    def _samples(self, key, value, worker):
+        counts, total = value
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), counts):
+            cumulative += count
+            labels = self._labels(key, worker, [("le", _number(bound))])
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        yield f"{self.name}_sum{self._labels(key, worker)} {_number(total)}"
+        yield f"{self.name}_count{self._labels(key, worker)} {cumulative}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value)
+
+
+REGISTRY = []
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format."""
+    worker = str(os.getpid())
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render(worker))
+    return "\n".join(lines) + "\n"
+
+
+def clear():
+    for metric in REGISTRY:
+        metric.clear()
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time from the request entering the middleware stack to the response leaving it.",
+    ("view", "method", "status"),
+)
+request_queries = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request.",
+    ("view",),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+request_query_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Total time per request spent executing SQL.",
+    ("view",),
+)
+classify_duration = Histogram(
+    "classify_ticket_duration_seconds",
+    "classify_ticket() latency by how the answer was produced: local, duplicate, "
+    "cache_hit, llm, fallback (default substituted) or failed (fallback=False); `reason` says "
+    "why Groq gave no answer.",
+    ("outcome", "reason"),
+)
+groq_requests = Counter(
+    "groq_requests_total",
+    "Groq completion attempts by result: ok, timeout, api_error, error, rate_limited "
+    "(429 from Groq), breaker_open (skipped by the circuit breaker) or throttled "
+    "(skipped because the rate limiter could not fit it in before GROQ_RATE_MAX_WAIT).",
+    ("result",),
+)
+groq_rate_wait = Histogram(
+    "groq_rate_wait_seconds",
+    "Time Groq calls waited for rate-limit capacity before being sent.",
+)
@@ -0,0 +1,121 @@
+"""
+Per-request instrumentation feeding tickets/metrics.py.
+
+Each request is timed end to end, and every SQL statement it runs is counted
+and timed by an execute wrapper (`connection.execute_wrappers`) that
+install_query_timer() adds to each database connection as it opens. The
+wrapper charges the statement to the request found in a context variable, so
+it works whether the view runs in the request's thread (WSGI) or in a worker
+thread under ASGI, where sync_to_async carries the context across. Samples are
+labelled with the class name of the view that served the request (function
+views: the function name; "unmatched" when no URL matched).
+
+For streaming responses (ticket export) the timing stops once the response
+object is returned, so it covers the first query but not the rows streamed
+after it.
+
+With settings.METRICS_SERVER_TIMING on, the same numbers are also sent back in
+a `Server-Timing` header, which browser devtools show next to the request.
+"""
+
+import contextvars
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+_current_queries = contextvars.ContextVar("current_request_queries", default=None)
+
+
+class _QueryTimer:
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def _time_query(execute, sql, params, many, context):
+    timer = _current_queries.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.duration += time.perf_counter() - start
+        timer.count += 1
+
+
+def _add_wrapper(sender, connection, **kwargs):
+    # connection_created fires on every reconnect of the same wrapper object.
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def install_query_timer():
+    """Called from TicketsConfig.ready(), before any connection is opened."""
+    connection_created.connect(_add_wrapper, dispatch_uid="tickets.metrics.query_timer")
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    func = match.func
+    view_class = getattr(func, "view_class", None) or getattr(func, "cls", None)
+    return (view_class or func).__name__
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = _QueryTimer()
+        token = _current_queries.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_queries.reset(token)
+        return self._record(request, response, timer, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        token = _current_queries.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_queries.reset(token)
+        return self._record(request, response, timer, time.perf_counter() - start)
+
+    def _record(self, request, response, timer, elapsed):
+        view = _view_name(request)
+        metrics.request_duration.observe(
+            elapsed, view=view, method=request.method, status=response.status_code
+        )
+        metrics.request_queries.observe(timer.count, view=view)
+        metrics.request_query_duration.observe(timer.duration, view=view)
+
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = (
+                f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries", '
+                f"total;dur={elapsed * 1000:.1f}"
+            )
+        return response
@@ -1,7 +1,19 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 
 
-class Ticket(models.Model):
+class TicketManager(models.Manager):
+    def get_queryset(self):
+        # search_vector is only ever read by Postgres itself (via the GIN index),
+        # so never ship it to Python.
+        return super().get_queryset().defer("search_vector")
+
+
+class AbstractTicket(models.Model):
+    """The columns shared by live tickets, archived tickets and the view over both."""
+
     class Category(models.TextChoices):
         BILLING = "billing", "Billing"
         TECHNICAL = "technical", "Technical"
@@ -38,9 +50,229 @@ class Ticket(models.Model):
         default=Status.OPEN,
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Written back by the classification worker (tickets.jobs); null until then.
+    suggested_category = models.CharField(
+        max_length=20,
+        choices=Category.choices,
+        null=True,
+        blank=True,
+    )
+    suggested_priority = models.CharField(
+        max_length=10,
+        choices=Priority.choices,
+        null=True,
+        blank=True,
+    )
+    # Weighted tsvector (title = A, description = B), maintained by a database
+    # trigger on INSERT and UPDATE OF title, description — see migration 0003.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Incremented by a database trigger on every UPDATE of the row (migration
+    # 0007); the detail view's ETag. An in-memory instance may hold a stale value.
+    version = models.BigIntegerField(default=1, editable=False)
+    # Set by a database trigger to the write's clock_timestamp() on INSERT and
+    # every UPDATE (migration 0008), whatever Python sends; the change feed
+    # (tickets.changes) pages through it. Like `version`, may be stale in memory.
+    updated_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = TicketManager()
+
+    class Meta:
+        abstract = True
 
+
+class Ticket(AbstractTicket):
     class Meta:
         ordering = ["-created_at"]
+        # Every list request is "optional filters, newest first, keyset on
+        # (created_at, id)", so each index ends with that ordering.
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="ticket_recent_idx"),
+            models.Index(fields=["category", "-created_at", "-id"], name="ticket_category_recent_idx"),
+            models.Index(fields=["priority", "-created_at", "-id"], name="ticket_priority_recent_idx"),
+            models.Index(fields=["status", "-created_at", "-id"], name="ticket_status_recent_idx"),
+            models.Index(
+                fields=["status", "category", "-created_at", "-id"],
+                name="ticket_status_cat_recent_idx",
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="ticket_open_recent_idx",
+                condition=models.Q(status="open"),
+            ),
+            GinIndex(fields=["search_vector"], name="ticket_search_vector_idx"),
+            # The change feed's keyset: (updated_at, id) after the cursor.
+            models.Index(fields=["updated_at", "id"], name="ticket_updated_idx"),
+        ]
 
     def __str__(self):
         return f"[{self.priority.upper()}] {self.title}"
+
+
+class ArchivedTicket(AbstractTicket):
+    """
+    A closed ticket moved out of the ticket table by `manage.py archive_tickets`
+    (tickets.archive), with its id and every column unchanged. Archived tickets
+    are read-only and still counted by the stats tables.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="archived_recent_idx"),
+            models.Index(fields=["category", "-created_at", "-id"], name="archived_category_recent_idx"),
+            models.Index(fields=["priority", "-created_at", "-id"], name="archived_priority_recent_idx"),
+            GinIndex(fields=["search_vector"], name="archived_search_vector_idx"),
+        ]
+        constraints = [
+            # Also lets Postgres skip this table for ?status=open etc. through AnyTicket.
+            models.CheckConstraint(check=models.Q(status="closed"), name="archived_ticket_closed"),
+        ]
+
+    def __str__(self):
+        return f"[archived] {self.title}"
+
+
+class AnyTicket(AbstractTicket):
+    """
+    Live and archived tickets together, read through the tickets_anyticket view:
+    a UNION ALL of both tables (migration 0010). Postgres pushes filters and
+    ORDER BY ... LIMIT down into each table's own indexes. Read-only; the view
+    lists its columns, so it must be recreated when a column is added.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+
+    class Meta:
+        managed = False
+        db_table = "tickets_anyticket"
+
+
+class TicketTableVersion(models.Model):
+    """
+    A single row (id 1) whose `version` changes with every statement that
+    writes tickets_ticket. A statement-level trigger sets it from a sequence
+    (migration 0007), so values are never reused and a reader sees the new
+    version only once the write has committed. Conditional GETs on the list
+    and stats compare against it instead of re-running their queries.
+    """
+
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"tickets_ticket version {self.version}"
+
+
+class TicketStatsCounter(models.Model):
+    """
+    Number of tickets per (category, priority, status).
+
+    Kept in step with the ticket table by tickets.stats.apply_deltas() inside the
+    same transaction as every write, so /api/tickets/stats/ reads at most 64 rows
+    instead of aggregating the whole table.
+    """
+
+    category = models.CharField(max_length=20, choices=Ticket.Category.choices)
+    priority = models.CharField(max_length=10, choices=Ticket.Priority.choices)
+    status = models.CharField(max_length=15, choices=Ticket.Status.choices)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["category", "priority", "status"],
+                name="ticket_stats_counter_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.category}/{self.priority}/{self.status}: {self.count}"
+
+
+class TicketDailyRollup(models.Model):
+    """
+    Number of tickets created on `day` that are currently in each
+    (category, priority, status) bucket.
+
+    Maintained alongside TicketStatsCounter, so time-range queries cost one row
+    per day and bucket rather than one per ticket.
+    """
+
+    day = models.DateField()
+    category = models.CharField(max_length=20, choices=Ticket.Category.choices)
+    priority = models.CharField(max_length=10, choices=Ticket.Priority.choices)
+    status = models.CharField(max_length=15, choices=Ticket.Status.choices)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "category", "priority", "status"],
+                name="ticket_daily_rollup_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.category}/{self.priority}/{self.status}: {self.count}"
+
+
+class ClassificationJob(models.Model):
+    """
+    A queued LLM classification for a newly created ticket.
+
+    Workers (`manage.py classification_worker`) claim jobs with
+    SELECT ... FOR UPDATE SKIP LOCKED, so any number of them can drain the
+    queue without handing the same job out twice. See tickets.jobs.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+        UNCLASSIFIED = "unclassified", "Unclassified"  # nothing could classify it
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="classification_jobs")
+    status = models.CharField(max_length=12, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["run_after"],
+                name="classify_job_pending_idx",
+                condition=models.Q(status="pending"),
+            ),
+            models.Index(
+                fields=["locked_at"],
+                name="classify_job_running_idx",
+                condition=models.Q(status="running"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Classify ticket #{self.ticket_id} ({self.status})"
+
+
+class GroqRateBucket(models.Model):
+    """
+    Shared request and token budgets for outbound Groq calls, one row per model.
+
+    Every process reserves capacity here before calling Groq, under the row
+    lock, so all workers together stay within GROQ_RATE_RPM / GROQ_RATE_TPM.
+    See tickets.llm_rate.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    requests = models.FloatField()
+    tokens = models.FloatField()
+    refilled_at = models.DateTimeField()
+    blocked_until = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.requests:.1f} requests, {self.tokens:.0f} tokens"
@@ -0,0 +1,139 @@
+"""
+Keyset (cursor) pagination for the ticket list.
+
+Pages are addressed by the (created_at, id) of the last row already seen rather
+than by an OFFSET, so fetching page 1 and page 10,000 costs the same: Postgres
+seeks straight to the cursor position and reads page_size + 1 rows.
+
+Full-text searches (`?search_mode=fulltext`) are ordered by relevance first;
+their cursor carries the rank of the last row as well.
+
+The response body stays a plain JSON array — the position of the next page is
+returned in the `Link` and `X-Next-Cursor` headers — so existing callers that
+expect a list keep working unchanged.
+"""
+
+import base64
+import binascii
+
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TicketCursorPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 50
+    max_page_size = 500
+    ordering = ("-created_at", "-id")
+    rank_field = "search_rank"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        results = list(self.get_page_queryset(queryset, request))
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_page_queryset(self, queryset, request):
+        """Return the sliced queryset that fetches the requested page."""
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+
+        ranked = self.rank_field in queryset.query.annotations
+        if ranked:
+            queryset = queryset.order_by(f"-{self.rank_field}", *self.ordering)
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.cursor is not None:
+            rank, created_at, pk = self.cursor
+            if ranked != (rank is not None):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(self._before_cursor(queryset, rank, created_at, pk))
+
+        # One extra row tells us whether another page exists without a COUNT(*).
+        return queryset[: self.page_size + 1]
+
+    def get_paginated_response(self, data):
+        headers = {}
+        next_link = self.get_next_link()
+        if next_link is not None:
+            headers["Link"] = f'<{next_link}>; rel="next"'
+            headers["X-Next-Cursor"] = self.encode_cursor(self.page[-1])
+        return Response(data, headers=headers)
+
+    def get_paginated_response_schema(self, schema):
+        return schema
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except ValueError:
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    # ------------------------------------------------------------------
+    # Cursor encoding
+    # ------------------------------------------------------------------
+
+    def encode_cursor(self, ticket):
+        raw = f"{ticket.created_at.isoformat()}|{ticket.pk}"
+        rank = getattr(ticket, self.rank_field, None)
+        if rank is not None:
+            raw = f"{rank!r}|{raw}"
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            parts = raw.split("|")
+            if len(parts) == 3:
+                rank = float(parts.pop(0))
+            elif len(parts) == 2:
+                rank = None
+            else:
+                raise ValueError(raw)
+            created_at = parse_datetime(parts[0])
+            pk = int(parts[1])
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return rank, created_at, pk
+
+    def _before_cursor(self, queryset, rank, created_at, pk):
+        # A row-value comparison lets Postgres walk a (created_at, id) index
+        # from the cursor position; the equivalent OR of two predicates does not.
+        table = queryset.model._meta.db_table
+        ops = connections[queryset.db].ops
+        older = RawSQL(
+            f'("{table}"."created_at", "{table}"."id") < (%s, %s)',
+            (ops.adapt_datetimefield_value(created_at), pk),
+            output_field=BooleanField(),
+        )
+        if rank is None:
+            return older
+        # Ranked pages are bounded by the GIN match, so a plain OR is fine here.
+        return Q(**{f"{self.rank_field}__lt": rank}) | Q(older, **{self.rank_field: rank})
@@ -0,0 +1,137 @@
+"""
+Read-only fast path for GET /api/tickets/ and GET /api/tickets/<id>/.
+
+Instead of building a Ticket instance per row and walking TicketSerializer's
+field objects for each, the views fetch plain tuples with `.values_list()` and
+turn them into dicts with a row shape compiled once from the serializer:
+fields whose representation is the database value itself (strings, choices,
+integers) are copied as they are. The rest go through the serializer field's
+own to_representation() — except ISO-8601 datetimes (created_at), whose
+formatter is resolved once per response instead of looking up the current
+time zone for every row. The output is the same dict TicketSerializer would
+produce, and FastJSONRenderer renders it to the same bytes.
+`manage.py benchmark_serialization` compares the two paths.
+
+`?fields=` narrows the selected columns, so unrequested ones (typically the
+description) are never read from Postgres. The computed `description_preview`
+field selects only the first TICKET_DESCRIPTION_PREVIEW_LENGTH + 1 characters
+of the description and truncates them the way TicketCard does.
+"""
+
+from datetime import timezone as dt_timezone
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models.functions import Left
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from .serializers import TicketSerializer
+
+PREVIEW = "description_preview"
+
+# Field types whose to_representation() returns a string/int DB value unchanged.
+_PASSTHROUGH = (serializers.CharField, serializers.ChoiceField, serializers.IntegerField)
+
+# The keyset paginator reads these from every row, requested or not.
+_CURSOR_COLUMNS = ("pk", "created_at")
+
+
+@lru_cache(maxsize=None)
+def _serializer_fields():
+    return dict(TicketSerializer().fields)
+
+
+def available_fields():
+    """Everything ?fields= accepts, in output order: the serializer's fields plus the preview."""
+    names = list(_serializer_fields())
+    names.insert(names.index("description") + 1, PREVIEW)
+    return names
+
+
+def parse_fields(raw):
+    """Validate a comma-separated ?fields= value; None (all serializer fields) if absent."""
+    if raw is None or not raw.strip():
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    available = available_fields()
+    unknown = sorted(requested.difference(available))
+    if unknown:
+        raise ValidationError(
+            {"fields": [f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(available)}."]}
+        )
+    return tuple(name for name in available if name in requested)
+
+
+@lru_cache(maxsize=256)
+def _plan(fields):
+    """(output names, columns) for a parse_fields() result."""
+    names = tuple(_serializer_fields()) if fields is None else fields
+    columns = tuple("pk" if name == "id" else name for name in names)
+    return names, columns + tuple(c for c in _CURSOR_COLUMNS if c not in columns)
+
+
+def _converter(field):
+    if not isinstance(field, serializers.DateTimeField) or not settings.USE_TZ:
+        return field.to_representation
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    # Mirrors DateTimeField.enforce_timezone() + to_representation() for the
+    # aware datetimes the database returns.
+    field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if getattr(field_timezone, "key", None) == "UTC" or field_timezone is dt_timezone.utc:
+        def to_utc(value):
+            if value.tzinfo is not dt_timezone.utc:
+                value = value.astimezone(dt_timezone.utc)
+            return value.isoformat()[:-6] + "Z"
+        return to_utc
+
+    def to_zone(value):
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+    return to_zone
+
+
+def _truncate(length):
+    def preview(value):
+        return value[:length] + "…" if len(value) > length else value
+    return preview
+
+
+def values(queryset, fields=None):
+    """
+    `queryset` as named tuples: the requested fields in output order, then the
+    paginator's cursor columns and any annotations (e.g. the full-text rank).
+    """
+    names, columns = _plan(fields)
+    if PREVIEW in names:
+        length = settings.TICKET_DESCRIPTION_PREVIEW_LENGTH
+        # One extra character tells the truncation whether there was more.
+        queryset = queryset.annotate(**{PREVIEW: Left("description", length + 1)})
+    extra = [name for name in queryset.query.annotations if name not in columns]
+    return queryset.values_list(*columns, *extra, named=True)
+
+
+def represent(rows, fields=None):
+    """TicketSerializer(many=True).data for rows from values(), as plain dicts."""
+    names, _ = _plan(fields)
+    serializer_fields = _serializer_fields()
+    converters = [
+        (name, _converter(serializer_fields[name]))
+        for name in names
+        if name in serializer_fields and not isinstance(serializer_fields[name], _PASSTHROUGH)
+    ]
+    if PREVIEW in names:
+        converters.append((PREVIEW, _truncate(settings.TICKET_DESCRIPTION_PREVIEW_LENGTH)))
+    data = []
+    for row in rows:
+        item = dict(zip(names, row))   # zip stops before the trailing extra columns
+        for name, convert in converters:
+            value = item[name]
+            if value is not None:
+                item[name] = convert(value)
+        data.append(item)
+    return data
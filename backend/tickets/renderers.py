@@ -0,0 +1,39 @@
+"""
+orjson-backed drop-in for DRF's JSONRenderer on the ticket views.
+
+With DRF's default settings (UNICODE_JSON, COMPACT_JSON, STRICT_JSON) orjson
+escapes strings and lays out objects exactly as json.dumps does, so the bytes
+are identical — except for floats in exponent form ("1e16" vs "1e+16"). Ticket
+payloads carry no floats, which is why this renderer is set per view rather
+than globally. Anything orjson can't encode natively, and indented (browsable
+API) output, goes through the stock renderer.
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _reject(value):
+    raise _Unsupported(type(value).__name__)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            self.get_indent(accepted_media_type, renderer_context or {}) is not None
+            or not (api_settings.UNICODE_JSON and api_settings.COMPACT_JSON and api_settings.STRICT_JSON)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_reject, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except (_Unsupported, TypeError, orjson.JSONEncodeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same as JSONRenderer: keep the output valid inside <script> tags.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -0,0 +1,315 @@
+"""
+Synthetic tickets for scale testing: `manage.py seed_tickets --count N`.
+
+Rows are generated in Python from seeded random.Random instances, so a seed
+and an end date always produce the same tickets, and are written with COPY in
+batches of whole days, each committed with its stats deltas (tickets.stats)
+like a bulk ingest. Batches are loaded over several connections at once. The
+table's triggers still fill search_vector, version and updated_at for every
+row, so seeded tickets are indistinguishable from created ones to search, the
+change feed and `ticket_stats --check`.
+
+The data is skewed the way a real queue is:
+
+  created_at  — spread over `days` days before `end`, with volume growing
+                towards the present, weekends at 40% of a weekday and most
+                tickets in working hours. Each batch is written oldest
+                first, so ids follow created_at as they do in production
+                (across batches too with --jobs 1).
+  category    — technical and billing dominate; each category has its own
+                priority mix (technical skews high, general skews low).
+  status      — depends on age: recent tickets are mostly open or in
+                progress, tickets older than two weeks mostly closed.
+  description — one to ~40 sentences (log-normal, median about three), drawn
+                from per-category phrase pools with order numbers and error
+                codes mixed in, so search has realistic term frequencies.
+
+Seeded closed tickets get updated_at = the time of loading, like any other
+write, so `archive_tickets` only picks them up with --days 0.
+"""
+
+import datetime
+import io
+import math
+import random
+from bisect import bisect
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import stats
+from .models import Ticket
+
+DEFAULT_DAYS = 365
+DEFAULT_BATCH_SIZE = 50_000
+DEFAULT_JOBS = 4
+
+CATEGORY_WEIGHTS = {"technical": 40, "billing": 30, "account": 20, "general": 10}
+PRIORITY_WEIGHTS = {
+    "technical": {"low": 15, "medium": 40, "high": 30, "critical": 15},
+    "billing": {"low": 25, "medium": 45, "high": 22, "critical": 8},
+    "account": {"low": 30, "medium": 45, "high": 20, "critical": 5},
+    "general": {"low": 55, "medium": 35, "high": 8, "critical": 2},
+}
+# (maximum age in days, status weights), first match wins.
+STATUS_WEIGHTS_BY_AGE = [
+    (2, {"open": 60, "in_progress": 30, "resolved": 8, "closed": 2}),
+    (14, {"open": 25, "in_progress": 25, "resolved": 30, "closed": 20}),
+    (math.inf, {"open": 4, "in_progress": 2, "resolved": 22, "closed": 72}),
+]
+# Relative ticket volume per hour of the day (UTC), peaking mid-morning.
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 3, 6, 10, 12, 12, 11, 9, 10, 11, 10, 9, 7, 5, 4, 3, 2, 2, 1]
+WEEKEND_WEIGHT = 0.4
+# The newest day gets this many times the oldest day's volume.
+GROWTH = 3.0
+
+COLUMNS = ("title", "description", "category", "priority", "status", "created_at")
+
+# Phrase pools. COPY's text format treats tab, newline and backslash specially;
+# none of these strings contain them, so rows are written without escaping.
+SUBJECTS = {
+    "technical": [
+        "App crashes on startup", "Cannot upload files", "API returns 500 errors",
+        "Page loads very slowly", "Sync stuck at 99%", "Webhook not firing",
+        "Export fails with timeout", "Mobile app freezes", "Search returns no results",
+        "Integration keeps disconnecting", "Dashboard charts are empty", "SSO login loop",
+    ],
+    "billing": [
+        "Charged twice this month", "Refund not received", "Invoice shows wrong amount",
+        "Card declined at checkout", "Cannot update payment method", "Unexpected renewal charge",
+        "VAT missing from invoice", "Discount code not applied", "Downgrade still billed at old rate",
+    ],
+    "account": [
+        "Cannot reset password", "Locked out after 2FA change", "Need to change account email",
+        "Team member invite not arriving", "Please delete my account", "Ownership transfer request",
+        "Login notifications not sent", "Username already taken",
+    ],
+    "general": [
+        "Feature request", "Question about pricing plans", "Feedback on new design",
+        "Where can I find the docs", "Partnership enquiry", "Accessibility question",
+    ],
+}
+SENTENCES = {
+    "technical": [
+        "The error started right after the latest update.",
+        "I have already cleared the cache and tried a different browser.",
+        "It happens on both the desktop and mobile apps.",
+        "The request times out after about thirty seconds.",
+        "Our whole team is affected and we cannot work.",
+        "The logs show a connection reset by peer.",
+        "Restarting the app fixes it for a few minutes, then it comes back.",
+        "This worked fine until yesterday afternoon.",
+        "We are on the latest version of the client.",
+        "The spinner never stops and nothing is saved.",
+    ],
+    "billing": [
+        "My card was charged twice for the same subscription.",
+        "The invoice total does not match the plan price.",
+        "I cancelled last month but was still billed.",
+        "Please issue a refund to the original payment method.",
+        "Our finance team needs a corrected invoice.",
+        "The payment page keeps rejecting a valid card.",
+        "We were promised a discount when we upgraded.",
+        "The currency on the invoice is wrong.",
+    ],
+    "account": [
+        "The password reset email never arrives.",
+        "I no longer have access to the phone used for two-factor authentication.",
+        "I need to move the account to a new company email address.",
+        "A former employee still owns our workspace.",
+        "The verification link says it has expired.",
+        "I would like all my personal data removed.",
+        "My colleague cannot accept the invitation.",
+    ],
+    "general": [
+        "I wanted to share some feedback about the product.",
+        "Is there a plan that fits a small nonprofit?",
+        "It would be great if reports could be scheduled.",
+        "Could you point me to the documentation for this?",
+        "We are evaluating the product for a larger rollout.",
+        "Dark mode would make a big difference for us.",
+    ],
+}
+COMMON = [
+    "Thanks in advance for your help.",
+    "Please let me know if you need more details.",
+    "This is quite urgent for us.",
+    "Screenshots are available on request.",
+    "I have been a customer for several years.",
+    "Any update would be appreciated.",
+]
+REFERENCES = [
+    "Order number {} is the one affected.",
+    "The error code shown is E{}.",
+    "Our account ID is {}.",
+    "It began with ticket reference {}.",
+]
+
+
+def _cumulative(weights):
+    total, cumulative = 0, []
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+
+class TicketGenerator:
+    """
+    Reproducible synthetic ticket rows; see the module docstring for the shapes.
+
+    The tickets are cut into chunks of whole days, each drawn from its own
+    random.Random derived from `seed`, so every chunk can be generated (and
+    loaded) independently and the result does not depend on how many are
+    loaded at once.
+    """
+
+    def __init__(self, seed=0, days=DEFAULT_DAYS, end=None):
+        if days < 1:
+            raise ValueError("days must be at least 1.")
+        self.seed = seed
+        self.days = days
+        end = end or datetime.datetime.now(datetime.timezone.utc).date()
+        # Tickets fall on the `days` whole days before `end`.
+        self.start = datetime.datetime.combine(
+            end - datetime.timedelta(days=days), datetime.time(), datetime.timezone.utc
+        )
+        self._categories = list(CATEGORY_WEIGHTS)
+        self._category_cum = _cumulative(CATEGORY_WEIGHTS.values())
+        self._priorities = {
+            category: (list(weights), _cumulative(weights.values()))
+            for category, weights in PRIORITY_WEIGHTS.items()
+        }
+        self._statuses = [
+            (max_age, list(weights), _cumulative(weights.values()))
+            for max_age, weights in STATUS_WEIGHTS_BY_AGE
+        ]
+        self._hour_cum = _cumulative(HOUR_WEIGHTS)
+        self._sentences = {category: pool + COMMON for category, pool in SENTENCES.items()}
+
+    def day_counts(self, count):
+        """How many of `count` tickets fall on each day, oldest day first."""
+        weights = []
+        for day in range(self.days):
+            date = self.start + datetime.timedelta(days=day)
+            weight = 1 + (GROWTH - 1) * day / max(self.days - 1, 1)
+            weights.append(weight * (WEEKEND_WEIGHT if date.weekday() >= 5 else 1))
+        counts = [0] * self.days
+        rng = random.Random(f"{self.seed}:days")
+        for day in rng.choices(range(self.days), cum_weights=_cumulative(weights), k=count):
+            counts[day] += 1
+        return counts
+
+    def chunks(self, count, size):
+        """
+        [(chunk number, first day, [tickets per day])], oldest first, each
+        covering whole days and at least `size` tickets (bar the last).
+        """
+        chunks, days, first = [], [], 0
+        for day, n in enumerate(self.day_counts(count)):
+            days.append(n)
+            if sum(days) >= size:
+                chunks.append((len(chunks), first, days))
+                days, first = [], day + 1
+        if sum(days):
+            chunks.append((len(chunks), first, days))
+        return chunks
+
+    def rows(self, chunk):
+        """Yield one chunk's tickets as tuples in COLUMNS order, oldest created_at first."""
+        number, first_day, counts = chunk
+        rng = random.Random(f"{self.seed}:{number}")
+        for day, n in enumerate(counts, start=first_day):
+            if not n:
+                continue
+            midnight = self.start + datetime.timedelta(days=day)
+            age = self.days - day
+            _, statuses, status_cum = next(s for s in self._statuses if age <= s[0])
+            hours = rng.choices(range(24), cum_weights=self._hour_cum, k=n)
+            seconds = sorted(hour * 3600 + rng.randrange(3600) for hour in hours)
+            categories = rng.choices(self._categories, cum_weights=self._category_cum, k=n)
+            day_statuses = rng.choices(statuses, cum_weights=status_cum, k=n)
+            for offset, category, status in zip(seconds, categories, day_statuses):
+                priorities, priority_cum = self._priorities[category]
+                yield (
+                    rng.choice(SUBJECTS[category]),
+                    self._description(rng, category),
+                    category,
+                    priorities[bisect(priority_cum, rng.random() * priority_cum[-1])],
+                    status,
+                    midnight + datetime.timedelta(seconds=offset),
+                )
+
+    def _description(self, rng, category):
+        length = min(int(rng.lognormvariate(1.0, 0.8)) + 1, 40)
+        sentences = rng.choices(self._sentences[category], k=length)
+        if rng.random() < 0.3:
+            reference = rng.choice(REFERENCES).format(rng.randrange(10_000, 1_000_000))
+            sentences.insert(rng.randrange(length + 1), reference)
+        return " ".join(sentences)
+
+
+def seed(
+    count, seed=0, days=DEFAULT_DAYS, end=None, batch_size=DEFAULT_BATCH_SIZE, jobs=1, progress=None
+):
+    """
+    Insert `count` generated tickets with COPY, about `batch_size` per
+    transaction, over `jobs` connections at once. Calls progress(inserted so
+    far) after each batch; returns the number inserted.
+
+    Most of a load's time is Postgres running the search_vector trigger and
+    updating the indexes for each row, which uses one core per connection, so
+    `jobs` should roughly match the database's cores. With jobs > 1, ids follow
+    created_at only within each batch.
+    """
+    generator = TicketGenerator(seed=seed, days=days, end=end)
+    chunks = generator.chunks(count, batch_size)
+    inserted = 0
+    if jobs <= 1:
+        for chunk in chunks:
+            inserted += _copy_chunk(generator, chunk)
+            if progress:
+                progress(inserted)
+        return inserted
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_copy_chunk_in_thread, generator, chunk) for chunk in chunks]
+        try:
+            for future in as_completed(futures):
+                inserted += future.result()
+                if progress:
+                    progress(inserted)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return inserted
+
+
+def _copy_chunk(generator, chunk):
+    buffer = io.StringIO()
+    deltas = Counter()
+    # stats.bucket_key(), with the timezone looked up once rather than per row.
+    tz = timezone.get_current_timezone()
+    for title, description, category, priority, status, created_at in generator.rows(chunk):
+        buffer.write(
+            f"{title}\t{description}\t{category}\t{priority}\t{status}\t{created_at.isoformat()}\n"
+        )
+        deltas[(timezone.localdate(created_at, tz), category, priority, status)] += 1
+    buffer.seek(0)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {Ticket._meta.db_table} ({', '.join(COLUMNS)}) FROM STDIN", buffer
+        )
+        stats.apply_deltas(deltas)
+    return sum(deltas.values())
+
+
+def _copy_chunk_in_thread(generator, chunk):
+    try:
+        return _copy_chunk(generator, chunk)
+    finally:
+        # Each worker thread has its own connection; don't leave it open.
+        connection.close()
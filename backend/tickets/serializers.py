@@ -1,12 +1,19 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
+
+from . import jobs, similarity, stats
 from .models import Ticket
 
 
 class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
-        fields = "__all__"
-        read_only_fields = ["id", "created_at"]
+        exclude = ["search_vector", "version"]
+        read_only_fields = ["id", "created_at", "suggested_category", "suggested_priority"]
 
     def validate_title(self, value):
         if not value or not value.strip():
@@ -18,6 +25,92 @@ class TicketSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Description cannot be blank.")
         return value.strip()
 
+    def create(self, validated_data):
+        # Recent tickets describing the same problem (tickets.similarity). The
+        # most similar one that is already classified lends its suggestion, and
+        # then no classification job is queued.
+        duplicates = similarity.find_duplicates(validated_data["description"])
+        reused = next((suggestion for _, _, suggestion in duplicates if suggestion), None)
+        with transaction.atomic():
+            ticket = super().create({**validated_data, **(reused or {})})
+            stats.record_created([ticket])
+            if reused is None:
+                # Classified later by `manage.py classification_worker`.
+                jobs.enqueue(ticket)
+            # Set by a trigger; read back so the response matches later GETs.
+            ticket.refresh_from_db(fields=["updated_at"])
+            similarity.index_on_commit(ticket)
+        ticket.likely_duplicates = [ticket_id for ticket_id, _, _ in duplicates]
+        return ticket
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            # Re-read the bucket under a row lock: `instance` may be stale if
+            # another PATCH to the same ticket committed in the meantime.
+            old_key = stats.bucket_key(
+                *Ticket.objects.select_for_update()
+                .values_list("created_at", "category", "priority", "status")
+                .get(pk=instance.pk)
+            )
+            ticket = super().update(instance, validated_data)
+            stats.record_moved(old_key, stats.ticket_key(ticket))
+            ticket.refresh_from_db(fields=["updated_at"])
+        return ticket
+
+
+class TimeseriesQuerySerializer(serializers.Serializer):
+    """Query params for GET /api/tickets/stats/timeseries/ (?from=&to=&bucket=)."""
+
+    MAX_DAYS = 731
+    DEFAULT_DAYS = 30
+
+    from_date = serializers.DateField(required=False)
+    to = serializers.DateField(required=False)
+    bucket = serializers.ChoiceField(choices=stats.BUCKET_SIZES, default="day")
+
+    def get_fields(self):
+        # "from" is a Python keyword, so declare the field under another name.
+        fields = super().get_fields()
+        fields["from"] = fields.pop("from_date")
+        return fields
+
+    def validate(self, attrs):
+        end = attrs.get("to") or timezone.localdate()
+        start = attrs.get("from") or end - datetime.timedelta(days=self.DEFAULT_DAYS - 1)
+        if start > end:
+            raise serializers.ValidationError({"from": "Must not be after 'to'."})
+        if (end - start).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                {"from": f"Range cannot exceed {self.MAX_DAYS} days."}
+            )
+        return {"from": start, "to": end, "bucket": attrs["bucket"]}
+
 
 class ClassifyRequestSerializer(serializers.Serializer):
     description = serializers.CharField(min_length=10)
+
+
+class ClassifyBatchRequestSerializer(serializers.Serializer):
+    descriptions = serializers.ListField(
+        child=serializers.CharField(min_length=10),
+        allow_empty=False,
+        max_length=settings.LLM_BATCH_MAX_ITEMS,
+    )
+
+
+class TicketBulkUpdateSerializer(serializers.Serializer):
+    """Body of PATCH /api/tickets/bulk/: optional ids plus the fields to set."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=settings.TICKET_BULK_UPDATE_MAX_IDS,
+    )
+    status = serializers.ChoiceField(choices=Ticket.Status.choices, required=False)
+    priority = serializers.ChoiceField(choices=Ticket.Priority.choices, required=False)
+
+    def validate(self, attrs):
+        if "status" not in attrs and "priority" not in attrs:
+            raise serializers.ValidationError("Provide status and/or priority to update.")
+        return attrs
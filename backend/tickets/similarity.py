@@ -0,0 +1,327 @@
+"""
+Near-duplicate ticket detection: an in-memory MinHash / LSH index over the
+descriptions of the most recent tickets.
+
+A description is reduced to its set of character 5-gram shingles (normalised
+like the classification cache key, punctuation dropped) and summarised by a
+one-permutation MinHash signature: every shingle is hashed once into one of
+SIGNATURE_SIZE bins and each bin keeps its smallest hash. Empty bins borrow
+from the next filled one, so short descriptions still get full signatures.
+The fraction of bins two signatures agree on estimates the Jaccard
+similarity of their shingle sets.
+
+The signature is cut into BANDS bands of ROWS bins, and each band is a key in a
+hash table. Tickets sharing any band are candidates, and only those are
+scored. With 16 bands of 4, pairs at Jaccard 0.5 collide ~65% of the time and
+pairs at 0.7 ~99% of the time, while unrelated tickets almost never do. A
+lookup costs a few hundred dict operations whatever the index size, well under
+a millisecond for a typical description.
+
+Each process keeps its own index of the last TICKET_SIMILARITY_INDEX_SIZE
+tickets. It is built by a background thread that the worker starts as it boots
+(warm(), called from config/asgi.py, config/wsgi.py and the classification
+worker), which takes a few seconds at the default size; until it is done,
+lookups find nothing rather than wait. It then follows the change feed
+(tickets.changes), at most every TICKET_SIMILARITY_SYNC_INTERVAL seconds.
+That picks up tickets created by other workers and suggestions written back
+by the classification worker. Tickets created by this process are added as
+soon as they commit.
+
+Python's string hash is salted per process, so signatures are only comparable
+within one process; they are never stored or sent anywhere.
+"""
+
+import logging
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .llm_cache import normalize_description
+from .models import Ticket
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 5
+# Long descriptions are summarised by their opening, which bounds lookup time.
+MAX_CHARS = 2000
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS = SIGNATURE_SIZE // BANDS
+
+_WORD = re.compile(r"\w+")
+_MASK64 = (1 << 64) - 1
+_BIN_BITS = SIGNATURE_SIZE.bit_length() - 1
+_EMPTY = 1 << 32
+# Added per bin skipped when an empty bin borrows a neighbour's value, so
+# borrowed values rarely coincide with genuine ones.
+_BORROW_OFFSET = 0x9E3779B1
+
+_FIELDS = ("id", "description", "suggested_category", "suggested_priority")
+# Seconds between attempts when the background build fails (e.g. the database is not up yet).
+BUILD_RETRY_SECONDS = 5
+
+
+def shingles(description: str) -> set:
+    text = " ".join(_WORD.findall(normalize_description(description)))[:MAX_CHARS]
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i : i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(description: str) -> array:
+    bins = [_EMPTY] * SIGNATURE_SIZE
+    for shingle in shingles(description):
+        h = hash(shingle) & _MASK64
+        slot = h & (SIGNATURE_SIZE - 1)
+        value = (h >> _BIN_BITS) & 0xFFFFFFFF
+        if value < bins[slot]:
+            bins[slot] = value
+    if _EMPTY in bins:
+        # Rotation densification: each empty bin takes the next filled bin's value.
+        filled = list(bins)
+        for i, value in enumerate(filled):
+            if value == _EMPTY:
+                step = 1
+                while filled[(i + step) % SIGNATURE_SIZE] == _EMPTY:
+                    step += 1
+                bins[i] = (filled[(i + step) % SIGNATURE_SIZE] + step * _BORROW_OFFSET) & 0xFFFFFFFF
+    return array("I", bins)
+
+
+def similarity(a: array, b: array) -> float:
+    return sum(x == y for x, y in zip(a, b)) / SIGNATURE_SIZE
+
+
+def _band_keys(sig: array):
+    raw = sig.tobytes()
+    width = ROWS * sig.itemsize
+    return [hash((band, raw[band * width : (band + 1) * width])) for band in range(BANDS)]
+
+
+class SimilarityIndex:
+    """
+    Signatures of up to `size` tickets, oldest evicted first, with the
+    classification each one has (None until the worker has written it back).
+    """
+
+    def __init__(self, size=None):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # id -> (signature, band keys, suggestion or None)
+        self._buckets = {}              # band key -> set of ids
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, ticket_id, description, suggestion=None):
+        """Index (or re-index) one ticket."""
+        sig = signature(description)
+        keys = _band_keys(sig)
+        with self._lock:
+            self._discard(ticket_id)
+            self._entries[ticket_id] = (sig, keys, suggestion)
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(ticket_id)
+            size = self.size if self.size is not None else settings.TICKET_SIMILARITY_INDEX_SIZE
+            while len(self._entries) > size:
+                self._discard(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def _discard(self, ticket_id):
+        entry = self._entries.pop(ticket_id, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(ticket_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def signature_of(self, ticket_id):
+        entry = self._entries.get(ticket_id)
+        return entry[0] if entry else None
+
+    def query(self, sig, threshold=None, limit=10, exclude=None, classified=False):
+        """
+        [(ticket id, estimated similarity, suggestion)] for the indexed tickets
+        at or above `threshold`, most similar (then newest) first.
+        """
+        if threshold is None:
+            threshold = settings.TICKET_SIMILARITY_THRESHOLD
+        with self._lock:
+            candidates = set()
+            for key in _band_keys(sig):
+                bucket = self._buckets.get(key)
+                if bucket:
+                    candidates |= bucket
+            candidates.discard(exclude)
+            matches = []
+            for ticket_id in candidates:
+                other, _, suggestion = self._entries[ticket_id]
+                if classified and suggestion is None:
+                    continue
+                score = similarity(sig, other)
+                if score >= threshold:
+                    matches.append((ticket_id, score, suggestion))
+        matches.sort(key=lambda match: (-match[1], -match[0]))
+        return matches[:limit]
+
+
+class _Follower:
+    """Keeps `index` in step with the ticket table through the change feed."""
+
+    def __init__(self, index):
+        self.index = index
+        self._cursor = None
+        self._synced_at = None
+        self._lock = threading.Lock()
+        self._building = False
+        self._generation = 0   # bumped by reset(), so a build started before it is dropped
+
+    @property
+    def ready(self):
+        return self._cursor is not None
+
+    def reset(self):
+        with self._lock:
+            self._generation += 1
+            self.index.clear()
+            self._cursor = None
+            self._synced_at = None
+
+    def start(self):
+        """Build the index in a background thread, retrying until it succeeds."""
+        with self._lock:
+            if self._building or self.ready:
+                return
+            self._building = True
+            generation = self._generation
+        threading.Thread(
+            target=self._build_in_background, args=(generation,), name="similarity-build", daemon=True
+        ).start()
+
+    def _build_in_background(self, generation):
+        try:
+            while not self.build(generation):
+                time.sleep(BUILD_RETRY_SECONDS)
+        finally:
+            self._building = False
+            connections.close_all()
+
+    def build(self, generation=None):
+        """
+        Build the index from the most recent tickets. Returns False if that
+        failed; a build for an older `generation` than the current one stops.
+        """
+        from . import changes  # changes -> read_path -> serializers imports this module
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return True
+            try:
+                self._build(changes)
+            except Exception as exc:
+                logger.error("Could not build the near-duplicate index: %s", exc)
+                self.index.clear()
+                return False
+            self._synced_at = time.monotonic()
+            return True
+
+    def sync(self, force=False):
+        """Catch up with the change feed; does nothing until the index has been built."""
+        from . import changes
+
+        if not self.ready:
+            return
+        if not force and time.monotonic() - self._synced_at < settings.TICKET_SIMILARITY_SYNC_INTERVAL:
+            return
+        # One thread catches up at a time; the others use the index as it is.
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            while self.ready:
+                tickets, self._cursor, has_more = changes.read(self._cursor, _FIELDS)
+                for ticket in tickets:
+                    self._add(ticket)
+                if not has_more:
+                    break
+            self._synced_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def _build(self, changes):
+        # The cursor comes first, so writes during the build are replayed after it.
+        _, cursor, _ = changes.read(None)
+        recent = (
+            Ticket.objects.order_by("-id")
+            .values_list(*_FIELDS)[: settings.TICKET_SIMILARITY_INDEX_SIZE]
+        )
+        for row in reversed(list(recent)):
+            self._add(dict(zip(_FIELDS, row)))
+        self._cursor = cursor
+
+    def _add(self, ticket):
+        self.index.add(ticket["id"], ticket["description"], _suggestion(ticket))
+
+
+def _suggestion(ticket):
+    if ticket["suggested_category"] and ticket["suggested_priority"]:
+        return {
+            "suggested_category": ticket["suggested_category"],
+            "suggested_priority": ticket["suggested_priority"],
+        }
+    return None
+
+
+index = SimilarityIndex()
+follower = _Follower(index)
+
+
+def warm():
+    """Start building this process's index in the background; workers call this as they boot."""
+    if settings.TICKET_SIMILARITY_INDEX_SIZE:
+        follower.start()
+
+
+def find_duplicates(description, exclude=None, limit=10):
+    """Likely duplicates of `description` among recent tickets: [(id, similarity, suggestion)]."""
+    if not settings.TICKET_SIMILARITY_INDEX_SIZE or not follower.ready:
+        return []
+    follower.sync()
+    return index.query(signature(description), limit=limit, exclude=exclude)
+
+
+def classified_duplicate(description):
+    """The classification of the most similar classified recent ticket, or None."""
+    if not settings.TICKET_SIMILARITY_INDEX_SIZE or not follower.ready:
+        return None
+    follower.sync()
+    matches = index.query(signature(description), limit=1, classified=True)
+    return dict(matches[0][2]) if matches else None
+
+
+def similar_to(ticket_id, description, limit=10):
+    """Tickets similar to an existing one, scored against its indexed signature when it has one."""
+    if not settings.TICKET_SIMILARITY_INDEX_SIZE or not follower.ready:
+        return []
+    follower.sync()
+    sig = index.signature_of(ticket_id) or signature(description)
+    return index.query(sig, limit=limit, exclude=ticket_id)
+
+
+def index_on_commit(ticket):
+    """Add a ticket this process just created once its transaction commits."""
+    if not settings.TICKET_SIMILARITY_INDEX_SIZE:
+        return
+    fields = {name: getattr(ticket, "pk" if name == "id" else name) for name in _FIELDS}
+    transaction.on_commit(lambda: follower._add(fields))
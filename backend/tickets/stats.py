@@ -0,0 +1,284 @@
+"""
+Incrementally maintained ticket statistics.
+
+Every write that changes which bucket a ticket is in calls apply_deltas()
+inside the write's transaction, so the aggregates commit or roll back together
+with the ticket rows. A bucket is (day, category, priority, status), where day
+is the ticket's creation date; each delta updates two tables:
+
+  TicketStatsCounter — (category, priority, status) totals, at most 64 rows,
+                       answering /api/tickets/stats/.
+  TicketDailyRollup  — the same per creation day, answering avg-per-day and
+                       /api/tickets/stats/timeseries/ in time proportional to
+                       the number of days requested.
+
+Both count archived tickets too (tickets.archive): archiving moves a ticket
+between tables without changing its bucket, so it never touches them.
+
+`manage.py ticket_stats` rebuilds (backfills) or validates both tables against
+the live and archived ticket tables.
+"""
+
+import datetime
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Trunc, TruncDate
+from django.utils import timezone
+
+from .models import (
+    AnyTicket,
+    ArchivedTicket,
+    Ticket,
+    TicketDailyRollup,
+    TicketStatsCounter,
+    TicketTableVersion,
+)
+
+PRIORITIES = [p for p, _ in Ticket.Priority.choices]
+CATEGORIES = [c for c, _ in Ticket.Category.choices]
+STATUSES = [s for s, _ in Ticket.Status.choices]
+
+BUCKET_SIZES = ("day", "week")
+
+
+def bucket_key(created_at, category, priority, status):
+    return (timezone.localdate(created_at), category, priority, status)
+
+
+def ticket_key(ticket):
+    return bucket_key(ticket.created_at, ticket.category, ticket.priority, ticket.status)
+
+
+def apply_deltas(deltas):
+    """
+    Add {(day, category, priority, status): delta} to the counters and the
+    daily rollup.
+
+    Must run inside the transaction that wrote the tickets. Each upsert takes a
+    row lock per key, so concurrent writers serialise on the buckets they touch
+    rather than on the whole table.
+    """
+    daily = {key: delta for key, delta in deltas.items() if delta}
+    if not daily:
+        return
+    _upsert(TicketStatsCounter, ("category", "priority", "status"), _totals(daily))
+    _upsert(TicketDailyRollup, ("day", "category", "priority", "status"), daily)
+
+
+def _upsert(model, key_fields, deltas):
+    rows = [(*key, delta) for key, delta in deltas.items() if delta]
+    if not rows:
+        return
+    # Lock keys in a fixed order so two multi-key writers cannot deadlock.
+    rows.sort()
+    table = model._meta.db_table
+    columns = ", ".join(key_fields)
+    placeholders = ", ".join(["%s"] * (len(key_fields) + 1))
+    values = ", ".join([f"({placeholders})"] * len(rows))
+    params = [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}, count) VALUES {values} "
+            f"ON CONFLICT ({columns}) "
+            f"DO UPDATE SET count = {table}.count + EXCLUDED.count",
+            params,
+        )
+
+
+def record_created(tickets):
+    apply_deltas(Counter(ticket_key(t) for t in tickets))
+
+
+def record_moved(old_key, new_key):
+    if old_key != new_key:
+        apply_deltas({old_key: -1, new_key: 1})
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def summarize(rows):
+    """Build the /stats/ payload fields from (category, priority, status, count) rows."""
+    total_tickets = 0
+    open_tickets = 0
+    priority_breakdown = {p: 0 for p in PRIORITIES}
+    category_breakdown = {c: 0 for c in CATEGORIES}
+    for category, priority, status, count in rows:
+        total_tickets += count
+        if status == Ticket.Status.OPEN:
+            open_tickets += count
+        priority_breakdown[priority] += count
+        category_breakdown[category] += count
+    return {
+        "total_tickets": total_tickets,
+        "open_tickets": open_tickets,
+        "priority_breakdown": priority_breakdown,
+        "category_breakdown": category_breakdown,
+    }
+
+
+def read_counters():
+    return summarize(
+        TicketStatsCounter.objects.filter(count__gt=0).values_list(
+            "category", "priority", "status", "count"
+        )
+    )
+
+
+def days_with_tickets():
+    return (
+        TicketDailyRollup.objects.filter(count__gt=0)
+        .order_by()
+        .values("day")
+        .distinct()
+        .count()
+    )
+
+
+def timeseries(start, end, bucket="day"):
+    """
+    Tickets created per day (or ISO week) between start and end inclusive,
+    broken down by their current category, priority and status.
+
+    Buckets with no tickets are included with zero counts.
+    """
+    rows = TicketDailyRollup.objects.filter(day__gte=start, day__lte=end, count__gt=0).order_by()
+    if bucket == "week":
+        rows = rows.annotate(bucket=Trunc("day", "week", output_field=DateField()))
+        step = datetime.timedelta(weeks=1)
+        first = start - datetime.timedelta(days=start.weekday())
+    else:
+        rows = rows.annotate(bucket=F("day"))
+        step = datetime.timedelta(days=1)
+        first = start
+    rows = rows.values_list("bucket", "category", "priority", "status").annotate(n=Sum("count"))
+
+    series = {}
+    day = first
+    while day <= end:
+        series[day] = {
+            "date": day.isoformat(),
+            "total": 0,
+            "category": {c: 0 for c in CATEGORIES},
+            "priority": {p: 0 for p in PRIORITIES},
+            "status": {s: 0 for s in STATUSES},
+        }
+        day += step
+    for day, category, priority, status, n in rows:
+        point = series[day]
+        point["total"] += n
+        point["category"][category] += n
+        point["priority"][priority] += n
+        point["status"][status] += n
+    return list(series.values())
+
+
+# ---------------------------------------------------------------------------
+# Validation / rebuild
+# ---------------------------------------------------------------------------
+
+def actual_counts():
+    """{(day, category, priority, status): count} from live and archived tickets (full scan)."""
+    rows = (
+        AnyTicket.objects.order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values_list("day", "category", "priority", "status")
+        .annotate(n=Count("id"))
+    )
+    return {(d, c, p, s): n for d, c, p, s, n in rows.iterator()}
+
+
+def _totals(daily):
+    totals = Counter()
+    for (_day, *key), n in daily.items():
+        totals[tuple(key)] += n
+    return {key: n for key, n in totals.items() if n}
+
+
+def _diff(stored, actual):
+    return {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in stored.keys() | actual.keys()
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+
+
+def find_drift():
+    """
+    Compare both aggregate tables with the ticket table.
+
+    Returns {"counters": {key: (stored, actual)}, "daily": {...}} containing only
+    the tables that disagree — an empty dict means everything matches.
+    """
+    with transaction.atomic():
+        _lock_tickets()
+        actual = actual_counts()
+        stored_counters = {
+            (c, p, s): n
+            for c, p, s, n in TicketStatsCounter.objects.values_list(
+                "category", "priority", "status", "count"
+            )
+            if n
+        }
+        stored_daily = {
+            (d, c, p, s): n
+            for d, c, p, s, n in TicketDailyRollup.objects.values_list(
+                "day", "category", "priority", "status", "count"
+            ).iterator()
+            if n
+        }
+    drift = {
+        "counters": _diff(stored_counters, _totals(actual)),
+        "daily": _diff(stored_daily, actual),
+    }
+    return {table: keys for table, keys in drift.items() if keys}
+
+
+def rebuild():
+    """
+    Replace both aggregate tables with a fresh count from the ticket table, and
+    bump the table version so cached stats responses are refetched.
+    """
+    with transaction.atomic():
+        _lock_tickets()
+        _bump_table_version()
+        actual = actual_counts()
+        TicketStatsCounter.objects.all().delete()
+        TicketDailyRollup.objects.all().delete()
+        TicketStatsCounter.objects.bulk_create(
+            TicketStatsCounter(category=c, priority=p, status=s, count=n)
+            for (c, p, s), n in _totals(actual).items()
+        )
+        TicketDailyRollup.objects.bulk_create(
+            (
+                TicketDailyRollup(day=d, category=c, priority=p, status=s, count=n)
+                for (d, c, p, s), n in actual.items()
+            ),
+            batch_size=1000,
+        )
+    return actual
+
+
+def _bump_table_version():
+    # The stats ETag is the ticket table's version (tickets.conditional), which
+    # only the table's own triggers move; the rebuilt counts are new content too.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {TicketTableVersion._meta.db_table} (id, version)
+            VALUES (1, nextval('tickets_ticket_table_version_seq'))
+            ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version
+            """
+        )
+
+
+def _lock_tickets():
+    # SHARE mode lets readers through but holds back writers, so the aggregates
+    # and the table are compared (or rebuilt) at a single consistent point.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"LOCK TABLE {Ticket._meta.db_table}, {ArchivedTicket._meta.db_table} IN SHARE MODE"
+        )
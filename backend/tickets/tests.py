@@ -0,0 +1,1521 @@
+"""
+Backend tests, run against PostgreSQL (`python manage.py test tickets`).
+
+They cover query plans, the aggregate tables, the job queue, the Groq
+integration (against a local stub server) and the API views, the latter
+through DRF's APIClient and Django's AsyncClient where a view's behaviour
+depends on the database or on ASGI. The repository-level test.py script
+exercises the running API end to end over HTTP.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.db import InterfaceError, connection, transaction
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import changes, facets, ingest, jobs, llm, local_classifier, metrics, seed, similarity, stats
+from .llm_cache import cache_key, classification_cache
+from .llm_client import breaker, get_client
+from .llm_rate import RateLimiter
+from .models import ArchivedTicket, ClassificationJob, GroqRateBucket, Ticket
+from .serializers import TicketSerializer
+from .views import TicketBulkView, TicketListCreateView
+
+SEED_ROWS = 50_000
+DESCRIPTIONS = [
+    "Seeded ticket used for query-plan checks.",
+    "Please send a copy of last month's invoice.",
+    "I would like a refund for the duplicate charge.",
+    "The dashboard crashes when exporting a report.",
+    "Password reset email never arrives.",
+]
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are PostgreSQL-specific")
+class TicketQueryPlanTests(TestCase):
+    """
+    Fail if a ticket list query falls back to a sequential scan on a large table.
+
+    Each case is built by the real view (filter backends + keyset paginator),
+    so a change that stops a filter combination from matching an index shows up
+    here rather than in production.
+    """
+
+    LIST_PARAMS = [
+        {},
+        {"category": "technical"},
+        {"priority": "critical"},
+        {"status": "open"},
+        {"status": "in_progress", "category": "billing"},
+        {"category": "account", "priority": "high"},
+        {"search": "invoice", "search_mode": "fulltext"},
+        {"search": "refu", "search_mode": "fulltext", "status": "open"},
+        {"status": "resolved", "created_before": "2000-01-01T00:00:00Z"},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(1234)
+        categories = [c for c, _ in Ticket.Category.choices]
+        priorities = [p for p, _ in Ticket.Priority.choices]
+        statuses = [s for s, _ in Ticket.Status.choices]
+        Ticket.objects.bulk_create(
+            (
+                Ticket(
+                    title=f"Ticket {i}",
+                    description=rng.choice(DESCRIPTIONS),
+                    category=rng.choice(categories),
+                    priority=rng.choice(priorities),
+                    status=rng.choice(statuses),
+                )
+                for i in range(SEED_ROWS)
+            ),
+            batch_size=5_000,
+        )
+        table = Ticket._meta.db_table
+        with connection.cursor() as cursor:
+            # Spread created_at out so recency ordering is meaningful.
+            cursor.execute(
+                f"UPDATE {table} SET created_at = now() - (id * interval '1 minute')"
+            )
+            cursor.execute(f"ANALYZE {table}")
+
+    def _page_queryset(self, params, cursor=None):
+        if cursor is not None:
+            params = {**params, "cursor": cursor}
+        request = Request(APIRequestFactory().get("/api/tickets/", params))
+        view = TicketListCreateView()
+        view.setup(request)
+        view.request = request
+        view.format_kwarg = None
+        queryset = view.filter_queryset(view.get_queryset())
+        return view.paginator.get_page_queryset(queryset, request)
+
+    def assertNoSeqScan(self, queryset, label):
+        plan = queryset.explain()
+        self.assertNotIn(
+            f"Seq Scan on {Ticket._meta.db_table}",
+            plan,
+            f"{label} fell back to a sequential scan:\n{plan}",
+        )
+
+    def test_first_page_uses_index(self):
+        for params in self.LIST_PARAMS:
+            with self.subTest(params=params):
+                self.assertNoSeqScan(self._page_queryset(params), f"first page {params}")
+
+    def test_deep_page_uses_index(self):
+        paginator = TicketListCreateView.pagination_class()
+        middle = Ticket.objects.order_by("-created_at", "-id")[SEED_ROWS // 2]
+        cursor = paginator.encode_cursor(middle)
+        for params in self.LIST_PARAMS:
+            if "search" in params:
+                continue  # ranked cursors are covered by test_fulltext_deep_page_uses_index
+            with self.subTest(params=params):
+                self.assertNoSeqScan(self._page_queryset(params, cursor), f"deep page {params}")
+
+    def test_fulltext_deep_page_uses_index(self):
+        params = {"search": "invoice", "search_mode": "fulltext"}
+        middle = list(self._page_queryset({**params, "page_size": 500}))[-1]
+        cursor = TicketListCreateView.pagination_class().encode_cursor(middle)
+        self.assertNoSeqScan(self._page_queryset(params, cursor), "fulltext deep page")
+
+
+@skipUnless(connection.vendor == "postgresql", "counter upserts are PostgreSQL-specific")
+class TicketStatsCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def _create(self, **fields):
+        payload = {"title": "Counter test", "description": "Counter test ticket", **fields}
+        response = self.client.post("/api/tickets/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def test_counters_follow_create_and_patch(self):
+        first = self._create(category="billing", priority="high")
+        self._create(category="technical", priority="low")
+        self.client.patch(f"/api/tickets/{first}/", {"status": "closed"}, format="json")
+        self.client.patch(f"/api/tickets/{first}/", {"title": "Renamed"}, format="json")
+
+        self.assertEqual(stats.find_drift(), {})
+        body = self.client.get("/api/tickets/stats/").json()
+        self.assertEqual(body["total_tickets"], 2)
+        self.assertEqual(body["open_tickets"], 1)
+        self.assertEqual(body["category_breakdown"]["billing"], 1)
+
+    def test_rejected_patch_leaves_counters_alone(self):
+        ticket = self._create()
+        response = self.client.patch(f"/api/tickets/{ticket}/", {"status": "pending"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(stats.find_drift(), {})
+
+    def test_find_drift_and_rebuild(self):
+        self._create(category="account")
+        Ticket.objects.update(status="closed")  # bypasses the serializer on purpose
+        drift = stats.find_drift()
+        self.assertIn(("account", "medium", "open"), drift["counters"])
+        self.assertEqual(len(drift["daily"]), 2)
+        stats.rebuild()
+        self.assertEqual(stats.find_drift(), {})
+
+
+@mock.patch.dict("os.environ", {"GROQ_API_KEY": "test-key"})
+class ClassificationCacheTests(TestCase):
+    ANSWER = {"suggested_category": "billing", "suggested_priority": "high"}
+
+    def setUp(self):
+        classification_cache.clear()
+        similarity.follower.reset()
+        classification_cache.shared.clear()
+
+    @mock.patch.object(llm, "_request_classification", return_value=ANSWER)
+    def test_repeat_and_near_identical_descriptions_hit(self, request):
+        llm.classify_ticket("I was charged twice this month")
+        llm.classify_ticket("I was charged twice this month")
+        result = llm.classify_ticket("  i was CHARGED   twice this month\n")
+        self.assertEqual(result, self.ANSWER)
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(classification_cache.stats()["local_hits"], 2)
+
+    @mock.patch.object(llm, "_request_classification", return_value=ANSWER)
+    def test_shared_tier_serves_other_workers(self, request):
+        llm.classify_ticket("Password reset link has expired")
+        classification_cache.local.clear()  # as seen from a fresh worker
+        llm.classify_ticket("Password reset link has expired")
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(classification_cache.stats()["shared_hits"], 1)
+
+    @mock.patch.object(llm, "_request_classification", return_value=None)
+    def test_fallbacks_are_not_cached(self, request):
+        self.assertEqual(llm.classify_ticket("Dashboard is down again"), llm._default_response())
+        llm.classify_ticket("Dashboard is down again")
+        self.assertEqual(request.call_count, 2)
+
+    def test_key_covers_model_and_prompt_version(self):
+        base = cache_key("Refund please", "model-a", "1")
+        self.assertNotEqual(base, cache_key("Refund please", "model-b", "1"))
+        self.assertNotEqual(base, cache_key("Refund please", "model-a", "2"))
+        self.assertEqual(base, cache_key(" refund  PLEASE ", "model-a", "1"))
+
+
+class _GroqStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+    def do_POST(self):
+        stub = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with stub.lock:
+            stub.requests += 1
+            stub.in_flight += 1
+            stub.peak_in_flight = max(stub.peak_in_flight, stub.in_flight)
+        stub.peers.add(self.client_address)
+        time.sleep(stub.delay)
+        with stub.lock:
+            stub.in_flight -= 1
+        content = stub.content
+        if callable(content):
+            content = content(request["messages"][0]["content"])
+        status = stub.status
+        if stub.rate_limited:
+            stub.rate_limited -= 1
+            status = 429
+        if status == 200:
+            body = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": llm.GROQ_MODEL,
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": content},
+                    }
+                ],
+            }
+        else:
+            body = {"error": {"message": "stub failure", "type": "server_error"}}
+        payload = json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(status)
+            if status == 429:
+                self.send_header("retry-after", stub.retry_after)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (deadline tests)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GroqStubServer(ThreadingHTTPServer):
+    """A local stand-in for the Groq chat completions API."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _GroqStubHandler)
+        self.delay = 0
+        self.status = 200
+        self.rate_limited = 0      # answer this many requests with 429 first
+        self.retry_after = "0.3"
+        self.content = '{"category": "billing", "priority": "high"}'
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0    # most requests being answered at once
+        self.lock = threading.Lock()
+        self.peers = set()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class GroqStubMixin:
+    """
+    Runs a GroqStubServer for the test class, with GROQ_BASE_URL pointing at it
+    and `stub_settings` overridden, and starts every test with a fresh stub and
+    empty classification tiers (breaker, caches, near-duplicate index).
+    """
+
+    stub_settings = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = GroqStubServer()
+        threading.Thread(target=cls.stub.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(GROQ_BASE_URL=cls.stub.url, **cls.stub_settings)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.stub.shutdown()
+        cls.stub.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.stub.delay, self.stub.status, self.stub.requests = 0, 200, 0
+        self.stub.peak_in_flight = 0
+        self.stub.rate_limited, self.stub.retry_after = 0, "0.3"
+        self.stub.peers.clear()
+        breaker.reset()
+        classification_cache.clear()
+        similarity.follower.reset()
+        classification_cache.shared.clear()
+
+
+@mock.patch.dict("os.environ", {"GROQ_API_KEY": "test-key"})
+class GroqClientTests(GroqStubMixin, TestCase):
+    stub_settings = dict(
+        GROQ_RATE_RPM=0,
+        GROQ_RATE_TPM=0,
+        GROQ_TIMEOUT=0.3,
+        GROQ_BREAKER_THRESHOLD=2,
+        GROQ_BREAKER_COOLDOWN=0.5,
+        LLM_COALESCE_WINDOW_MS=0,
+    )
+
+    def test_client_and_connection_are_reused(self):
+        for i in range(3):
+            result = llm.classify_ticket(f"Charged twice on invoice {i}")
+            self.assertEqual(result, {"suggested_category": "billing", "suggested_priority": "high"})
+        self.assertEqual(self.stub.requests, 3)
+        self.assertEqual(len(self.stub.peers), 1)
+        self.assertIs(get_client("test-key"), get_client("test-key"))
+
+    def test_deadline_returns_default(self):
+        metrics.clear()
+        self.stub.delay = 1.0
+        self.assertEqual(llm.classify_ticket("Slow upstream ticket"), llm._default_response())
+        # The client gave up at GROQ_TIMEOUT rather than waiting for the answer.
+        self.assertEqual(metrics.groq_requests.value(result="timeout"), 1)
+        self.assertEqual(metrics.groq_requests.value(result="ok"), 0)
+
+    def test_breaker_opens_and_recovers(self):
+        self.stub.status = 500
+        llm.classify_ticket("Failure one")
+        llm.classify_ticket("Failure two")
+        self.assertEqual(breaker.state, breaker.OPEN)
+
+        llm.classify_ticket("Short-circuited")
+        self.assertEqual(self.stub.requests, 2)
+
+        self.stub.status = 200
+        time.sleep(0.6)
+        self.assertEqual(breaker.state, breaker.HALF_OPEN)
+        self.assertEqual(llm.classify_ticket("Trial call")["suggested_category"], "billing")
+        self.assertEqual(breaker.state, breaker.CLOSED)
+        self.assertEqual(self.stub.requests, 3)
+
+    def test_batch_runs_concurrently_in_input_order(self):
+        categories = ["billing", "technical", "account", "general"]
+
+        def answer(prompt):
+            number = int(prompt.rsplit("number ", 1)[1].split()[0])
+            return json.dumps({"category": categories[number], "priority": "low"})
+
+        self.stub.delay = 0.15
+        descriptions = [f"Batch ticket number {i}" for i in range(4)] + ["Batch ticket number 0"]
+        with self.settings(LLM_BATCH_CONCURRENCY=4), mock.patch.object(self.stub, "content", answer):
+            results = llm.classify_tickets(descriptions)
+
+        self.assertEqual([r["suggested_category"] for r in results], categories + ["billing"])
+        self.assertEqual(self.stub.requests, 4)  # the duplicate is classified once
+        self.assertGreaterEqual(self.stub.peak_in_flight, 2)  # sequential calls never overlap
+
+    def test_batch_item_failures_fall_back_individually(self):
+        answer = {"suggested_category": "account", "suggested_priority": "low"}
+
+        def flaky(api_key, description):
+            if "bad" in description:
+                raise RuntimeError("boom")
+            return answer
+
+        with mock.patch.object(llm, "_request_classification", side_effect=flaky):
+            results = llm.classify_tickets(["good ticket text", "bad ticket text"])
+        self.assertEqual(results, [answer, llm._default_response()])
+
+
+@mock.patch.dict("os.environ", {"GROQ_API_KEY": "test-key"})
+class AsyncClassifyTests(GroqStubMixin, TestCase):
+    """ClassifyView under ASGI: waiting on Groq must not hold up other requests."""
+
+    stub_settings = dict(
+        GROQ_RATE_RPM=0,
+        GROQ_RATE_TPM=0,
+        GROQ_TIMEOUT=2,
+        LLM_COALESCE_WINDOW_MS=0,
+        LOCAL_CLASSIFIER_THRESHOLD=2,
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.stub.delay = 1
+
+    async def test_slow_classify_calls_overlap_and_leave_lists_unblocked(self):
+        client = AsyncClient()
+        finished = []
+
+        async def request(name, coroutine):
+            response = await coroutine
+            finished.append(name)
+            return response
+
+        classify = [
+            request(
+                f"classify-{n}",
+                client.post(
+                    "/api/tickets/classify/",
+                    {"description": f"Charged twice on invoice {n}"},
+                    content_type="application/json",
+                ),
+            )
+            for n in range(4)
+        ]
+        lists = [request(f"list-{n}", client.get("/api/tickets/")) for n in range(3)]
+        responses = await asyncio.gather(*classify, *lists)
+
+        self.assertTrue(all(response.status_code == 200 for response in responses))
+        self.assertEqual(responses[0].json(), ClassificationCacheTests.ANSWER)
+        self.assertEqual(self.stub.requests, 4)
+        # Serialized calls would never overlap at the stub, and the lists
+        # would queue behind them.
+        self.assertGreaterEqual(self.stub.peak_in_flight, 2)
+        self.assertEqual(sorted(finished[:3]), ["list-0", "list-1", "list-2"])
+
+    async def test_async_path_uses_the_cache(self):
+        client = AsyncClient()
+        for _ in range(2):
+            response = await client.post(
+                "/api/tickets/classify/",
+                {"description": "Charged twice on invoice"},
+                content_type="application/json",
+            )
+            self.assertEqual(response.json(), ClassificationCacheTests.ANSWER)
+        self.assertEqual(self.stub.requests, 1)
+        self.assertEqual(classification_cache.stats()["local_hits"], 1)
+
+    def test_wsgi_requests_take_the_sync_path(self):
+        with mock.patch.object(llm, "get_async_client") as get_async_client:
+            response = self.client.post(
+                "/api/tickets/classify/",
+                {"description": "Charged twice on invoice"},
+                content_type="application/json",
+            )
+        self.assertEqual(response.json(), ClassificationCacheTests.ANSWER)
+        self.assertEqual(self.stub.requests, 1)
+        get_async_client.assert_not_called()
+
+
+def _answer_batch(prompt):
+    """Stub responder: classify numbered tickets by keyword, in reverse order."""
+    answers = []
+    for block in prompt.split("Ticket ")[1:]:
+        number, _, text = block.partition(":\n")
+        if not number.isdigit():
+            continue
+        category = "billing" if "invoice" in text.lower() else "technical"
+        priority = "bogus" if "garbage" in text else "low"
+        answers.append({"ticket": int(number), "category": category, "priority": priority})
+    return json.dumps(answers[::-1])
+
+
+@mock.patch.dict("os.environ", {"GROQ_API_KEY": "test-key"})
+class CoalescedClassificationTests(GroqStubMixin, TestCase):
+    stub_settings = dict(
+        GROQ_RATE_RPM=0,
+        GROQ_RATE_TPM=0,
+        GROQ_TIMEOUT=2,
+        LLM_COALESCE_WINDOW_MS=200,
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub.content = _answer_batch
+
+    def _classify_concurrently(self, descriptions):
+        results = [None] * len(descriptions)
+
+        def run(index):
+            results[index] = llm.classify_ticket(descriptions[index])
+            connection.close()
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(descriptions))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_prompt(self):
+        descriptions = [
+            "Wrong amount on my invoice",
+            "Server crashes on upload",
+            "Invoice PDF is missing",
+            "garbage answer expected here",
+        ]
+        results = self._classify_concurrently(descriptions)
+
+        self.assertEqual(self.stub.requests, 1)
+        self.assertEqual(
+            [r["suggested_category"] for r in results[:3]],
+            ["billing", "technical", "billing"],
+        )
+        # An out-of-range element only costs its own caller.
+        self.assertEqual(results[3], llm._default_response())
+
+    def test_batches_are_capped(self):
+        with self.settings(LLM_COALESCE_MAX_BATCH=2):
+            self._classify_concurrently([f"Invoice question number {i}" for i in range(5)])
+        self.assertEqual(self.stub.requests, 3)
+
+
+@mock.patch.dict("os.environ", {"GROQ_API_KEY": "test-key"})
+class GroqRateLimitTests(GroqStubMixin, TransactionTestCase):
+    """The shared rate limiter in front of Groq: reservations, queueing and 429s."""
+
+    stub_settings = dict(
+        GROQ_TIMEOUT=2,
+        GROQ_RATE_RPM=600,
+        GROQ_RATE_TPM=0,
+        GROQ_RATE_MAX_WAIT=2,
+        LLM_COALESCE_WINDOW_MS=0,
+        LOCAL_CLASSIFIER_THRESHOLD=2,
+    )
+
+    def setUp(self):
+        super().setUp()
+        metrics.clear()
+
+    def test_reservations_queue_and_refuse_past_max_wait(self):
+        limiter = RateLimiter("test-model", rpm=0, tpm=600)
+        self.assertEqual(limiter.reserve(600, max_wait=1), 0)
+        self.assertAlmostEqual(limiter.reserve(100, max_wait=30), 10, delta=0.5)
+        self.assertAlmostEqual(limiter.reserve(100, max_wait=30), 20, delta=0.5)
+        self.assertIsNone(limiter.reserve(100, max_wait=25))
+        # A refused reservation takes nothing from the budget.
+        self.assertAlmostEqual(limiter.reserve(100, max_wait=40), 30, delta=0.5)
+
+    def test_concurrent_callers_get_consecutive_slots(self):
+        GroqRateBucket.objects.create(name="test-model", requests=0, tokens=0, refilled_at=timezone.now())
+        limiter = RateLimiter("test-model", rpm=60, tpm=0)
+        waits = []
+
+        def reserve():
+            waits.append(limiter.reserve(0, max_wait=30))
+            connection.close()
+
+        threads = [threading.Thread(target=reserve) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # One request a second: every caller gets its own slot, none is handed out twice.
+        self.assertEqual([round(wait) for wait in sorted(waits)], list(range(1, 9)))
+
+    def test_limiter_failures_let_the_call_go_unmetered(self):
+        # A closed connection is an InterfaceError, which is not a DatabaseError.
+        with mock.patch.object(RateLimiter, "reserve", side_effect=InterfaceError("connection already closed")):
+            self.assertEqual(llm.classify_ticket("Charged twice on my invoice"), ClassificationCacheTests.ANSWER)
+        with mock.patch.object(llm.limiter, "acquire", side_effect=InterfaceError("connection already closed")):
+            self.assertEqual(llm.classify_ticket("Refund missing for my invoice"), ClassificationCacheTests.ANSWER)
+        self.assertEqual(self.stub.requests, 2)
+
+    def test_429_is_retried_after_its_retry_after(self):
+        self.stub.rate_limited = 1
+        started = time.monotonic()
+        result = llm.classify_ticket("Charged twice on my invoice")
+        self.assertEqual(result, ClassificationCacheTests.ANSWER)
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        self.assertEqual(self.stub.requests, 2)
+        self.assertEqual(metrics.groq_requests.value(result="rate_limited"), 1)
+        self.assertEqual(breaker.state, breaker.CLOSED)
+
+    def test_long_retry_after_holds_every_caller_back(self):
+        self.stub.rate_limited, self.stub.retry_after = 1, "30"
+        started = time.monotonic()
+        self.assertEqual(llm.classify_ticket("Charged twice on my invoice"), llm._default_response())
+        self.assertIsNone(llm.classify_ticket("Invoice shows the wrong amount", fallback=False))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.stub.requests, 1)
+        self.assertEqual(metrics.groq_requests.value(result="throttled"), 2)
+
+    def test_coalesced_calls_stay_metered_after_the_database_drops_connections(self):
+        with self.settings(LLM_COALESCE_WINDOW_MS=50):
+            for n in range(2):
+                with self.assertNoLogs("tickets.llm_rate", level="ERROR"):
+                    result = llm.classify_ticket(f"Charged twice on invoice {n}")
+                self.assertEqual(result, ClassificationCacheTests.ANSWER)
+                # As a database restart or idle timeout would, for the batch pool's threads.
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+                    )
+        self.assertEqual(self.stub.requests, 2)
+        self.assertEqual(metrics.groq_rate_wait.snapshot()[0], 2)
+
+
+@skipUnless(connection.vendor == "postgresql", "SKIP LOCKED is PostgreSQL-specific")
+@override_settings(CLASSIFICATION_JOB_MAX_ATTEMPTS=3, CLASSIFICATION_JOB_RETRY_DELAY=10)
+class ClassificationJobTests(TransactionTestCase):
+    ANSWER = {"suggested_category": "billing", "suggested_priority": "high"}
+
+    def setUp(self):
+        self.client = APIClient()
+        similarity.follower.reset()
+
+    def _create(self, description="Charged twice for my plan"):
+        response = self.client.post(
+            "/api/tickets/", {"title": "Queued", "description": description}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def test_create_enqueues_and_worker_applies_suggestion(self):
+        body = self._create()
+        self.assertIsNone(body["suggested_category"])
+        job = ClassificationJob.objects.get(ticket_id=body["id"])
+        self.assertEqual(job.status, ClassificationJob.Status.PENDING)
+
+        with mock.patch.object(jobs, "classify_ticket", return_value=self.ANSWER) as classify:
+            call_command("classification_worker", "--once", stdout=io.StringIO())
+        classify.assert_called_once_with("Charged twice for my plan", fallback=False)
+
+        ticket = Ticket.objects.get(pk=body["id"])
+        self.assertEqual((ticket.suggested_category, ticket.suggested_priority), ("billing", "high"))
+        self.assertEqual(ClassificationJob.objects.get(pk=job.pk).status, "done")
+
+    @mock.patch.dict("os.environ", {"GROQ_API_KEY": "test-key"})
+    def test_failures_back_off_then_give_up(self):
+        ticket_id = self._create()["id"]
+        job = ClassificationJob.objects.get(ticket_id=ticket_id)
+        with mock.patch.object(jobs, "classify_ticket", return_value=None):
+            for attempt in range(1, 4):
+                # Make the retry due now rather than waiting out the backoff.
+                ClassificationJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+                claimed = jobs.claim_next()
+                self.assertEqual((claimed.pk, claimed.attempts), (job.pk, attempt))
+                before = timezone.now()
+                jobs.process(claimed)
+                job.refresh_from_db()
+                if attempt < 3:
+                    self.assertEqual(job.status, "pending")
+                    delay = (job.run_after - before).total_seconds()
+                    self.assertAlmostEqual(delay, 10 * 2 ** (attempt - 1), delta=1)
+        self.assertEqual(job.status, "failed")
+        self.assertTrue(job.last_error)
+        self.assertIsNone(jobs.claim_next())
+        self.assertIsNone(Ticket.objects.get(pk=ticket_id).suggested_category)
+
+    def test_claim_skips_locked_jobs_and_reclaims_stale_ones(self):
+        first, second = self._create()["id"], self._create()["id"]
+        claimed = []
+        with transaction.atomic():
+            ClassificationJob.objects.select_for_update().get(ticket_id=first)
+            worker = threading.Thread(target=lambda: (claimed.append(jobs.claim_next()), connection.close()))
+            worker.start()
+            worker.join()
+        self.assertEqual(claimed[0].ticket_id, second)
+
+        ClassificationJob.objects.filter(ticket_id=first).update(
+            status="running", locked_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(jobs.claim_next().ticket_id, first)
+        self.assertIsNone(jobs.claim_next())
+
+    def test_stale_job_on_its_last_attempt_fails_instead_of_rerunning(self):
+        ticket_id = self._create()["id"]
+        ClassificationJob.objects.filter(ticket_id=ticket_id).update(
+            status="running", attempts=3, locked_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertIsNone(jobs.claim_next())
+        job = ClassificationJob.objects.get(ticket_id=ticket_id)
+        self.assertEqual((job.status, job.attempts), ("failed", 3))
+        self.assertTrue(job.last_error)
+
+    @override_settings(LOCAL_CLASSIFIER_PATH="")
+    @mock.patch.dict("os.environ", {"GROQ_API_KEY": ""})
+    def test_without_api_key_or_model_jobs_end_unclassified(self):
+        ticket_id = self._create()["id"]
+        call_command("classification_worker", "--once", stdout=io.StringIO())
+        job = ClassificationJob.objects.get(ticket_id=ticket_id)
+        self.assertEqual((job.status, job.attempts), ("unclassified", 1))
+        self.assertIsNone(Ticket.objects.get(pk=ticket_id).suggested_category)
+
+
+TRAINING_TICKETS = [
+    ("I was charged twice on my invoice this month", "billing", "high"),
+    ("Please refund the duplicate subscription charge", "billing", "high"),
+    ("Where can I download an invoice for my payment", "billing", "low"),
+    ("The app crashes with an error when I upload a file", "technical", "critical"),
+    ("API requests time out and the server returns errors", "technical", "critical"),
+    ("Export to PDF shows an error message", "technical", "medium"),
+    ("I cannot log in, password reset email never arrives", "account", "high"),
+    ("How do I change my profile username and password", "account", "low"),
+    ("What are your office hours", "general", "low"),
+    ("Do you have a newsletter I can subscribe to", "general", "low"),
+]
+
+
+class LocalClassifierTests(TestCase):
+    ANSWER = {"suggested_category": "general", "suggested_priority": "low"}
+
+    def setUp(self):
+        classification_cache.clear()
+        similarity.follower.reset()
+        Ticket.objects.bulk_create(
+            Ticket(title="Training", description=description, category=category, priority=priority)
+            for _ in range(3)
+            for description, category, priority in TRAINING_TICKETS
+        )
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "model.json.gz")
+        call_command(
+            "train_classifier", output=self.path, min_samples=10, holdout=0, stdout=io.StringIO()
+        )
+        self.settings_override = self.settings(LOCAL_CLASSIFIER_PATH=self.path)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_model_round_trips_and_predicts_fast(self):
+        classifier = local_classifier.get_classifier()
+        self.assertEqual(classifier.metadata["samples"], 30)
+        result, confidence = classifier.predict("Refund the duplicate charge on my invoice")
+        self.assertEqual(result, {"suggested_category": "billing", "suggested_priority": "high"})
+        self.assertGreater(confidence, 0.5)
+        self.assertEqual(classifier.predict("zzz qqq"), (None, 0.0))
+
+        description = "The server crashes with an error every time I upload a large file " * 3
+        start = time.perf_counter()
+        for _ in range(1000):
+            classifier.predict(description)
+        self.assertLess((time.perf_counter() - start) / 1000, 0.001)
+
+    @mock.patch.dict("os.environ", {"GROQ_API_KEY": "test-key"})
+    @mock.patch.object(llm, "_request_classification", return_value=ANSWER)
+    def test_confident_predictions_skip_groq(self, request):
+        with self.settings(LOCAL_CLASSIFIER_THRESHOLD=0.5, LLM_COALESCE_WINDOW_MS=0):
+            result = llm.classify_ticket("I was charged twice, please refund the charge")
+            self.assertEqual(result["suggested_category"], "billing")
+            request.assert_not_called()
+        with self.settings(LOCAL_CLASSIFIER_THRESHOLD=1.1, LLM_COALESCE_WINDOW_MS=0):
+            self.assertEqual(llm.classify_ticket("I was charged twice, please refund the charge"), self.ANSWER)
+            request.assert_called_once()
+
+    @mock.patch.dict("os.environ", {"GROQ_API_KEY": ""})
+    def test_local_prediction_replaces_default_fallback(self):
+        with self.settings(LOCAL_CLASSIFIER_THRESHOLD=1.1):
+            result = llm.classify_ticket("The app crashes with an error on upload")
+            self.assertEqual(result["suggested_category"], "technical")
+            self.assertIsNone(llm.classify_ticket("The app crashes on upload", fallback=False))
+            self.assertEqual(llm.classify_ticket("zzz qqq"), llm._default_response())
+
+
+@skipUnless(connection.vendor == "postgresql", "counter upserts are PostgreSQL-specific")
+@override_settings(TICKET_BULK_BATCH_SIZE=2, TICKET_BULK_MAX_ERRORS=2)
+class BulkIngestTests(TestCase):
+    ROWS = [
+        {"title": "Bulk one", "description": "Imported ticket", "category": "billing"},
+        {"title": "  ", "description": "Blank title"},
+        {"title": "Bulk two", "description": "Imported ticket", "priority": "urgent"},
+        {"title": "Bulk three", "description": "Imported ticket \u00e9\u20ac", "status": "closed"},
+        ["not", "an", "object"],
+        {"title": "Bulk four", "description": "Imported ticket"},
+    ]
+
+    def test_json_array_elements_split_across_reads(self):
+        body = json.dumps(self.ROWS, ensure_ascii=False).encode("utf-8")
+        rows = list(ingest.iter_json_array(io.BytesIO(body), read_size=3))
+        self.assertEqual(rows, list(enumerate(self.ROWS, start=1)))
+        self.assertEqual(list(ingest.iter_json_array(io.BytesIO(b" [ 1 , 22 ] "), read_size=1)), [(1, 1), (2, 22)])
+
+        with self.assertRaises(ingest.MalformedBody):
+            list(ingest.iter_json_array(io.BytesIO(b'[{"title": "x"}, {"tit'), read_size=4))
+
+    def test_ndjson_rows_are_validated_and_inserted_in_batches(self):
+        body = "\n".join(json.dumps(row) for row in self.ROWS) + "\n\n{broken\n"
+        summary = ingest.ingest(ingest.iter_ndjson(io.BytesIO(body.encode("utf-8"))))
+
+        self.assertEqual((summary["created"], summary["failed"]), (3, 4))
+        self.assertEqual([error["row"] for error in summary["errors"]], [2, 3])
+        self.assertIn("title", summary["errors"][0]["errors"])
+        self.assertIn("priority", summary["errors"][1]["errors"])
+        self.assertTrue(summary["errors_truncated"])
+
+        self.assertEqual(
+            sorted(Ticket.objects.values_list("title", flat=True)),
+            ["Bulk four", "Bulk one", "Bulk three"],
+        )
+        self.assertEqual(stats.find_drift(), {})
+        self.assertFalse(ClassificationJob.objects.exists())
+
+
+    def test_chunked_upload_without_content_length(self):
+        body = "\n".join(json.dumps(row) for row in self.ROWS[:4]).encode("utf-8")
+        request = RequestFactory().post("/api/tickets/bulk/", body, content_type="application/x-ndjson")
+        # What gunicorn hands over for Transfer-Encoding: chunked.
+        del request.META["CONTENT_LENGTH"]
+        request.META.update({"wsgi.input": io.BytesIO(body), "wsgi.input_terminated": True})
+        response = TicketBulkView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 2))
+
+
+@override_settings(TICKET_EXPORT_CHUNK_SIZE=2)
+class TicketExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Ticket.objects.bulk_create(
+            Ticket(title=f"Export {n}", description='Says "hi", then\nleaves', category=category)
+            for n, category in enumerate(["billing", "technical", "billing", "billing", "account"])
+        )
+
+    def test_csv_streams_header_first_then_chunks(self):
+        response = self.client.get("/api/tickets/export/", {"format": "csv", "category": "billing"})
+        self.assertTrue(response.streaming)
+        chunks = iter(response.streaming_content)
+        with self.assertNumQueries(0):
+            header = next(chunks).decode()
+        self.assertTrue(header.startswith("id,title,description,"))
+
+        rest = list(chunks)
+        self.assertEqual(len(rest), 2)  # three rows in chunks of two
+        rows = list(csv.DictReader(io.StringIO(header + b"".join(rest).decode())))
+        self.assertEqual([row["title"] for row in rows], ["Export 3", "Export 2", "Export 0"])
+        self.assertEqual(rows[0]["description"], 'Says "hi", then\nleaves')
+
+    def test_ndjson_matches_list_representation(self):
+        response = self.client.get("/api/tickets/export/", {"format": "ndjson", "search": "export 4"})
+        exported = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        listed = self.client.get("/api/tickets/", {"search": "export 4"}).json()
+        self.assertEqual(exported, listed)
+
+    @override_settings(TICKET_EXPORT_CHUNK_SIZE=2)
+    async def test_asgi_export_streams_chunk_by_chunk(self):
+        response = await AsyncClient().get("/api/tickets/export/", {"format": "ndjson"})
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([len(chunk.splitlines()) for chunk in chunks], [2, 2, 1])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get("/api/tickets/export/", {"format": "xml"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("format", response.json())
+
+
+class ReadPathTests(TestCase):
+    """The values_list/orjson read path must match TicketSerializer + JSONRenderer byte for byte."""
+
+    def setUp(self):
+        self.client = APIClient()
+        Ticket.objects.bulk_create(
+            Ticket(title=title, description=description, category=category)
+            for title, description, category in [
+                ("Plain", "Nothing special here", "general"),
+                ("Ünïcødé “quotes” €", "Emoji \U0001F600 and CJK 漢字", "billing"),
+                ('Escapes "\\" \t', "Line\nbreaks\r\n and \x01 control \u2028\u2029 separators", "technical"),
+            ]
+        )
+        Ticket.objects.filter(title="Plain").update(suggested_category="account", suggested_priority="low")
+
+    def _expected(self, queryset, many=True):
+        return JSONRenderer().render(TicketSerializer(queryset, many=many).data)
+
+    def test_list_and_detail_bodies_are_identical(self):
+        response = self.client.get("/api/tickets/")
+        self.assertEqual(response.content, self._expected(Ticket.objects.order_by("-created_at", "-id")))
+
+        response = self.client.get("/api/tickets/", {"search": "emoji", "search_mode": "fulltext", "page_size": 1})
+        self.assertEqual(response.content, self._expected(Ticket.objects.filter(title__startswith="Ü")))
+
+        for ticket in Ticket.objects.all():
+            response = self.client.get(f"/api/tickets/{ticket.pk}/")
+            self.assertEqual(response.content, self._expected(ticket, many=False))
+        self.assertEqual(self.client.get("/api/tickets/0/").status_code, 404)
+
+    @override_settings(TICKET_DESCRIPTION_PREVIEW_LENGTH=10)
+    def test_sparse_fieldset_never_reads_the_description(self):
+        Ticket.objects.filter(title="Plain").update(description="x" * 50_000)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/tickets/", {"fields": "status,description_preview,title", "page_size": 2}
+            )
+        self.assertEqual(response.status_code, 200)
+        # The only read of the description is the 11-character prefix.
+        sql = queries[-1]["sql"]
+        self.assertIn('LEFT("tickets_ticket"."description", 11)', sql)
+        self.assertNotIn('"tickets_ticket"."description"', sql.replace('LEFT("tickets_ticket"."description", 11)', ""))
+
+        first, second = response.json()
+        self.assertEqual(list(first), ["title", "description_preview", "status"])
+        self.assertEqual(first["description_preview"], "Line\nbreak…")
+        self.assertEqual(second["description_preview"], "Emoji \U0001F600 an…")
+
+        # The cursor still works although neither id nor created_at was requested.
+        rest = self.client.get(
+            "/api/tickets/", {"fields": "title,description_preview", "cursor": response["X-Next-Cursor"]}
+        ).json()
+        self.assertEqual(rest, [{"title": "Plain", "description_preview": "x" * 10 + "…"}])
+
+        response = self.client.get("/api/tickets/", {"fields": "title,secret"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("secret", response.json()["fields"][0])
+
+    def test_only_the_keyset_ordering_is_accepted(self):
+        newest_first = self.client.get("/api/tickets/")
+        self.assertEqual(self.client.get("/api/tickets/", {"ordering": "-created_at"}).content, newest_first.content)
+        for url in ("/api/tickets/", "/api/tickets/export/"):
+            response = self.client.get(url, {"ordering": "title"})
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn("ordering", response.json())
+
+    def test_non_utc_time_zone_matches(self):
+        with timezone.override("Asia/Kolkata"):
+            response = self.client.get("/api/tickets/")
+            self.assertIn(b"+05:30", response.content)
+            self.assertEqual(response.content, self._expected(Ticket.objects.order_by("-created_at", "-id")))
+
+
+@skipUnless(connection.vendor == "postgresql", "the bulk UPDATE is PostgreSQL-specific")
+class BulkUpdateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for n, (status_, priority) in enumerate(
+            [("resolved", "low"), ("resolved", "high"), ("open", "low"), ("resolved", "low")]
+        ):
+            response = self.client.post(
+                "/api/tickets/",
+                {"title": f"Sweep {n}", "description": "Bulk update ticket", "priority": priority},
+                format="json",
+            )
+            Ticket.objects.filter(pk=response.json()["id"]).update(status=status_)
+        stats.rebuild()
+        self.ids = list(Ticket.objects.order_by("id").values_list("id", flat=True))
+        # The oldest two tickets are a week old.
+        Ticket.objects.filter(pk__in=self.ids[:2]).update(created_at=timezone.now() - timedelta(days=8))
+        stats.rebuild()
+
+    def _patch(self, body, **params):
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        return self.client.patch(f"/api/tickets/bulk/?{query}", body, format="json")
+
+    def test_filter_sweep_is_one_update(self):
+        cutoff = (timezone.now() - timedelta(days=7)).strftime("%Y-%m-%dT%H:%M:%S")
+        with CaptureQueriesContext(connection) as queries:
+            response = self._patch({"status": "closed"}, status="resolved", created_before=cutoff)
+        self.assertEqual(response.json(), {"updated": 2})
+        # One statement touches the ticket table; the rest are counter upserts.
+        self.assertEqual(len([q for q in queries if re.search(r"\btickets_ticket\b", q["sql"])]), 1)
+        self.assertEqual(
+            list(Ticket.objects.order_by("id").values_list("status", flat=True)),
+            ["closed", "closed", "open", "resolved"],
+        )
+        self.assertEqual(stats.find_drift(), {})
+
+    def test_ids_and_filters_combine_and_unchanged_rows_are_skipped(self):
+        response = self._patch({"ids": self.ids, "priority": "low"}, status="resolved")
+        self.assertEqual(response.json(), {"updated": 1})  # the other two resolved ones are already low
+        response = self._patch({"ids": self.ids[2:], "status": "in_progress", "priority": "critical"})
+        self.assertEqual(response.json(), {"updated": 2})
+        self.assertEqual(stats.find_drift(), {})
+
+    def test_requests_without_a_target_or_change_are_rejected(self):
+        self.assertEqual(self._patch({"status": "closed"}).status_code, 400)
+        self.assertEqual(self._patch({"status": "closed"}, search="").status_code, 400)
+        self.assertEqual(self._patch({"ids": self.ids}).status_code, 400)
+        self.assertEqual(self._patch({"ids": self.ids, "status": "pending"}).status_code, 400)
+        self.assertEqual(Ticket.objects.filter(status="closed").count(), 0)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        metrics.clear()
+        classification_cache.clear()
+        similarity.follower.reset()
+
+    def test_requests_are_timed_and_their_queries_counted(self):
+        self.client.get("/api/tickets/stats/")
+        self.client.get("/api/tickets/99999/")
+        self.client.get("/api/no-such-path/")
+
+        count, total = metrics.request_duration.snapshot(view="TicketStatsView", method="GET", status=200)
+        self.assertEqual(count, 1)
+        self.assertGreater(total, 0)
+        self.assertEqual(metrics.request_duration.snapshot(view="TicketDetailView", method="GET", status=404)[0], 1)
+        self.assertEqual(metrics.request_duration.snapshot(view="unmatched", method="GET", status=404)[0], 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/tickets/")
+        self.assertEqual(metrics.request_queries.snapshot(view="TicketListCreateView"), (1, len(queries)))
+        self.assertGreater(metrics.request_query_duration.snapshot(view="TicketListCreateView")[1], 0)
+
+        body = self.client.get("/api/metrics").content.decode()
+        worker = f'worker="{os.getpid()}"'
+        self.assertIn(
+            f'http_request_db_queries_bucket{{view="TicketListCreateView",{worker},le="+Inf"}} 1', body
+        )
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+
+    @override_settings(LOCAL_CLASSIFIER_THRESHOLD=2, LLM_COALESCE_WINDOW_MS=0)
+    @mock.patch.object(llm, "_request_classification", return_value=ClassificationCacheTests.ANSWER)
+    def test_classify_outcomes(self, request):
+        with mock.patch.dict(os.environ, {"GROQ_API_KEY": ""}):
+            llm.classify_ticket("No key configured for this one")
+        with mock.patch.dict(os.environ, {"GROQ_API_KEY": "test-key"}):
+            llm.classify_ticket("Charged twice on my card")
+            llm.classify_ticket("Charged twice on my card")
+            request.return_value = None
+            llm.classify_ticket("Upstream is failing", fallback=False)
+
+        self.assertEqual(metrics.classify_duration.snapshot(outcome="fallback", reason="no_api_key")[0], 1)
+        self.assertEqual(metrics.classify_duration.snapshot(outcome="llm")[0], 1)
+        self.assertEqual(metrics.classify_duration.snapshot(outcome="cache_hit")[0], 1)
+        self.assertEqual(metrics.classify_duration.snapshot(outcome="failed", reason="llm_error")[0], 1)
+
+    @override_settings(METRICS_SERVER_TIMING=True)
+    def test_server_timing_header_is_opt_in(self):
+        response = self.client.get("/api/tickets/stats/")
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+        with override_settings(METRICS_SERVER_TIMING=False):
+            self.assertNotIn("Server-Timing", self.client.get("/api/tickets/stats/"))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.ids = [
+            self.client.post(
+                "/api/tickets/", {"title": f"Cached {n}", "description": "Conditional GET ticket"}, format="json"
+            ).json()["id"]
+            for n in range(2)
+        ]
+
+    def _revalidate(self, url, tag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=tag)
+
+    def test_matching_etag_skips_the_main_query(self):
+        for url in ("/api/tickets/", f"/api/tickets/{self.ids[0]}/", "/api/tickets/stats/"):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(first["Cache-Control"], "no-cache")
+            with CaptureQueriesContext(connection) as queries:
+                response = self._revalidate(url, first["ETag"])
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response["ETag"], first["ETag"])
+            self.assertEqual(response.content, b"")
+            self.assertEqual(len(queries), 1, [q["sql"] for q in queries])
+            # Weak and list forms of If-None-Match match too.
+            self.assertEqual(self._revalidate(url, f'"other", W/{first["ETag"]}').status_code, 304)
+
+    def test_writes_change_the_etags(self):
+        list_tag = self.client.get("/api/tickets/")["ETag"]
+        stats_tag = self.client.get("/api/tickets/stats/")["ETag"]
+        first_tag = self.client.get(f"/api/tickets/{self.ids[0]}/")["ETag"]
+        second_tag = self.client.get(f"/api/tickets/{self.ids[1]}/")["ETag"]
+
+        self.client.patch(f"/api/tickets/{self.ids[0]}/", {"status": "closed"}, format="json")
+        self.assertEqual(self._revalidate("/api/tickets/", list_tag).status_code, 200)
+        self.assertEqual(self._revalidate("/api/tickets/stats/", stats_tag).status_code, 200)
+        self.assertEqual(self._revalidate(f"/api/tickets/{self.ids[0]}/", first_tag).status_code, 200)
+        self.assertEqual(self._revalidate(f"/api/tickets/{self.ids[1]}/", second_tag).status_code, 304)
+
+        # Set-based writes go through the same triggers.
+        list_tag = self.client.get("/api/tickets/")["ETag"]
+        self.client.patch("/api/tickets/bulk/", {"ids": [self.ids[1]], "priority": "high"}, format="json")
+        self.assertEqual(self._revalidate("/api/tickets/", list_tag).status_code, 200)
+        self.assertEqual(self._revalidate(f"/api/tickets/{self.ids[1]}/", second_tag).status_code, 200)
+
+        list_tag = self.client.get("/api/tickets/")["ETag"]
+        self.client.post("/api/tickets/", {"title": "New", "description": "Another one"}, format="json")
+        self.assertEqual(self._revalidate("/api/tickets/", list_tag).status_code, 200)
+
+    def test_stats_rebuild_changes_the_stats_etag(self):
+        stats_tag = self.client.get("/api/tickets/stats/")["ETag"]
+        stats.rebuild()
+        self.assertEqual(self._revalidate("/api/tickets/stats/", stats_tag).status_code, 200)
+
+    def test_etag_depends_on_the_query_string(self):
+        plain = self.client.get("/api/tickets/")["ETag"]
+        sparse = self.client.get("/api/tickets/?fields=id,title")["ETag"]
+        self.assertNotEqual(plain, sparse)
+        self.assertEqual(self._revalidate("/api/tickets/?fields=id,title", plain).status_code, 200)
+
+    def test_missing_ticket_is_still_a_404(self):
+        response = self._revalidate("/api/tickets/99999/", "*")
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("ETag", response)
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.ids = [self._create(f"Feed {n}")["id"] for n in range(3)]
+
+    def _create(self, title):
+        return self.client.post(
+            "/api/tickets/", {"title": title, "description": "Change feed ticket"}, format="json"
+        ).json()
+
+    def _changes(self, since, **params):
+        response = self.client.get("/api/tickets/changes/", {"since": since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_returns_only_tickets_written_after_the_cursor(self):
+        start = self.client.get("/api/tickets/changes/").json()
+        self.assertEqual((start["tickets"], start["has_more"]), ([], False))
+
+        patched = self.client.patch(f"/api/tickets/{self.ids[1]}/", {"status": "closed"}, format="json").json()
+        created = self._create("Feed new")
+        self.client.patch("/api/tickets/bulk/", {"ids": [self.ids[0]], "priority": "high"}, format="json")
+
+        feed = self._changes(start["cursor"])
+        self.assertEqual([t["id"] for t in feed["tickets"]], [self.ids[1], created["id"], self.ids[0]])
+        self.assertEqual(feed["tickets"][0], patched)
+        self.assertEqual(feed["tickets"][2]["priority"], "high")
+        self.assertEqual(self._changes(feed["cursor"])["tickets"], [])
+
+        sparse = self._changes(start["cursor"], fields="id,status")
+        self.assertEqual(sparse["tickets"][0], {"id": self.ids[1], "status": "closed"})
+
+    @override_settings(TICKET_CHANGES_PAGE_SIZE=2)
+    def test_pages_through_a_large_backlog(self):
+        since = changes.encode_cursor((timezone.now() - timedelta(days=1), 0))
+        seen = []
+        while True:
+            feed = self._changes(since, fields="id")
+            seen += [t["id"] for t in feed["tickets"]]
+            since = feed["cursor"]
+            if not feed["has_more"]:
+                break
+        self.assertEqual(seen, self.ids)
+
+    def test_open_transactions_hold_the_feed_back(self):
+        start = self.client.get("/api/tickets/changes/").json()["cursor"]
+        # Another session with a transaction open from before the write.
+        other = connection.get_new_connection(connection.get_connection_params())
+        try:
+            with other.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            self.client.patch(f"/api/tickets/{self.ids[0]}/", {"status": "closed"}, format="json")
+            held = self._changes(start)
+            self.assertEqual(held["tickets"], [])
+            other.rollback()
+            self.assertEqual([t["id"] for t in self._changes(held["cursor"])["tickets"]], [self.ids[0]])
+        finally:
+            other.close()
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.client.get("/api/tickets/changes/", {"since": "nope"}).status_code, 404)
+        self.assertEqual(self.client.get("/api/tickets/changes/", {"fields": "bogus"}).status_code, 400)
+
+
+@override_settings(TICKET_CHANGES_HEARTBEAT=0.2, TICKET_CHANGES_STREAM_SECONDS=5)
+class ChangeStreamTests(TransactionTestCase):
+    """The stream needs committed writes: NOTIFY is only delivered on commit."""
+
+    def _create(self, title):
+        return APIClient().post(
+            "/api/tickets/", {"title": title, "description": "Streamed ticket"}, format="json"
+        ).json()["id"]
+
+    @staticmethod
+    def _event(chunk):
+        fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+        return fields["id"], json.loads(fields["data"])
+
+    @staticmethod
+    async def _next_event(events):
+        chunk = (await anext(events)).decode()
+        while chunk.startswith(":"):  # keep-alive
+            chunk = (await anext(events)).decode()
+        return ChangeStreamTests._event(chunk)
+
+    @staticmethod
+    def _listeners():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND query = %s",
+                [f"LISTEN {changes.CHANNEL}"],
+            )
+            return cursor.fetchone()[0]
+
+    def test_wsgi_asks_clients_to_poll(self):
+        response = APIClient().get("/api/tickets/changes/stream/")
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(response.json()["poll"], "/api/tickets/changes/")
+
+    async def test_writes_are_pushed_and_reconnects_resume(self):
+        response = await AsyncClient().get("/api/tickets/changes/stream/?fields=id,title")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b"retry: 1000\n\n")
+        start, first = await self._next_event(events)
+        self.assertEqual(first["tickets"], [])
+
+        ticket_id = await sync_to_async(self._create)("Pushed")
+        self.assertEqual((await self._next_event(events))[1]["tickets"], [{"id": ticket_id, "title": "Pushed"}])
+        await events.aclose()
+
+        resumed = await AsyncClient().get(
+            "/api/tickets/changes/stream/?fields=id", headers={"Last-Event-ID": start}
+        )
+        events = aiter(resumed.streaming_content)
+        await anext(events)
+        self.assertEqual((await self._next_event(events))[1]["tickets"], [{"id": ticket_id}])
+        await events.aclose()
+
+    @override_settings(TICKET_CHANGES_STREAM_SECONDS=1)
+    async def test_streams_share_one_listener_connection(self):
+        streams = []
+        for _ in range(3):
+            response = await AsyncClient().get("/api/tickets/changes/stream/?fields=id")
+            events = aiter(response.streaming_content)
+            await anext(events)
+            await self._next_event(events)
+            streams.append(events)
+        self.assertEqual(await sync_to_async(self._listeners)(), 1)
+
+        ticket_id = await sync_to_async(self._create)("Fanned out")
+        for events in streams:
+            self.assertEqual((await self._next_event(events))[1]["tickets"], [{"id": ticket_id}])
+        for events in streams:
+            async for _ in events:  # until the streams end
+                pass
+
+        # The listener is closed once no stream is left.
+        deadline = time.monotonic() + 3 * changes.IDLE_CHECK_SECONDS
+        while await sync_to_async(self._listeners)() and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        self.assertEqual(await sync_to_async(self._listeners)(), 0)
+
+
+@override_settings(LOCAL_CLASSIFIER_THRESHOLD=2, LLM_COALESCE_WINDOW_MS=0, TICKET_SIMILARITY_SYNC_INTERVAL=0)
+class SimilarityTests(TestCase):
+    OUTAGE = "Checkout page returns a 500 error when I try to pay with my Visa card since this morning."
+    # Jaccard 0.87 with OUTAGE: LSH misses such a pair about once in a million.
+    REPHRASED = "Checkout page returns a 500 error whenever I try to pay with my Visa card, since this morning."
+    UNRELATED = "I would like a refund for the duplicate charge on last month's invoice."
+
+    def setUp(self):
+        self.client = APIClient()
+        classification_cache.clear()
+        similarity.follower.reset()
+        similarity.follower.build()
+        metrics.clear()
+
+    def _create(self, description):
+        response = self.client.post("/api/tickets/", {"title": "Outage", "description": description}, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def test_signatures_estimate_jaccard_similarity(self):
+        a, b = similarity.shingles(self.OUTAGE), similarity.shingles(self.REPHRASED)
+        jaccard = len(a & b) / len(a | b)
+        estimate = similarity.similarity(similarity.signature(self.OUTAGE), similarity.signature(self.REPHRASED))
+        self.assertAlmostEqual(estimate, jaccard, delta=0.2)
+        unrelated = similarity.similarity(similarity.signature(self.OUTAGE), similarity.signature(self.UNRELATED))
+        self.assertLess(unrelated, 0.2)
+
+        index = similarity.SimilarityIndex(size=2)
+        for ticket_id, description in enumerate([self.OUTAGE, self.UNRELATED, self.REPHRASED]):
+            index.add(ticket_id, description)
+        self.assertEqual(len(index), 2)  # the oldest was evicted
+        self.assertEqual([m[0] for m in index.query(similarity.signature(self.OUTAGE))], [2])
+
+    def test_create_reports_duplicates_and_reuses_their_classification(self):
+        first = self._create(self.OUTAGE)
+        self.assertEqual(first["likely_duplicates"], [])
+        self._create(self.UNRELATED)
+        second = self._create(self.REPHRASED)
+        self.assertEqual(second["likely_duplicates"], [first["id"]])
+        self.assertIsNone(second["suggested_category"])  # nothing classified to copy yet
+
+        # The worker classifies the first ticket...
+        Ticket.objects.filter(pk=first["id"]).update(suggested_category="billing", suggested_priority="critical")
+        third = self._create(self.OUTAGE + " Please help!")
+        self.assertEqual((third["suggested_category"], third["suggested_priority"]), ("billing", "critical"))
+        self.assertFalse(ClassificationJob.objects.filter(ticket_id=third["id"]).exists())
+
+        # ...and the job queued for the second one reuses it instead of calling Groq.
+        job = ClassificationJob.objects.get(ticket_id=second["id"])
+        with mock.patch.dict(os.environ, {"GROQ_API_KEY": "test-key"}), mock.patch.object(
+            llm, "_request_classification"
+        ) as request:
+            jobs.process(job)
+        request.assert_not_called()
+        self.assertEqual(Ticket.objects.get(pk=second["id"]).suggested_priority, "critical")
+        self.assertEqual(metrics.classify_duration.snapshot(outcome="duplicate")[0], 1)
+
+    def test_similar_endpoint(self):
+        first = self._create(self.OUTAGE)
+        self._create(self.UNRELATED)
+        second = self._create(self.REPHRASED)
+
+        response = self.client.get(f"/api/tickets/{first['id']}/similar/")
+        self.assertEqual(response.status_code, 200)
+        [match] = response.json()
+        self.assertEqual(match["id"], second["id"])
+        self.assertEqual(match["title"], "Outage")
+        self.assertGreaterEqual(match["similarity"], 0.5)
+
+        self.assertEqual(self.client.get("/api/tickets/99999/similar/").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/tickets/{first['id']}/similar/?limit=x").status_code, 400)
+
+
+@override_settings(LOCAL_CLASSIFIER_THRESHOLD=2, LLM_COALESCE_WINDOW_MS=0, TICKET_SIMILARITY_SYNC_INTERVAL=0)
+class SimilarityWarmupTests(TransactionTestCase):
+    """The background build reads on its own connection, so it needs committed tickets."""
+
+    def setUp(self):
+        similarity.follower.reset()
+        self.addCleanup(similarity.follower.reset)
+
+    def _create(self, description):
+        return APIClient().post(
+            "/api/tickets/", {"title": "Outage", "description": description}, format="json"
+        ).json()
+
+    def test_index_is_built_in_the_background_not_on_a_request(self):
+        first = self._create(SimilarityTests.OUTAGE)
+        second = self._create(SimilarityTests.REPHRASED)
+        self.assertEqual(second["likely_duplicates"], [])  # not built yet: nothing, and no waiting
+        self.assertFalse(similarity.follower.ready)
+
+        similarity.warm()
+        deadline = time.monotonic() + 5
+        while not similarity.follower.ready and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertTrue(similarity.follower.ready)
+        third = self._create(SimilarityTests.OUTAGE + " Please help!")
+        self.assertEqual(sorted(third["likely_duplicates"]), [first["id"], second["id"]])
+
+
+class FacetTests(TestCase):
+    ROWS = [
+        {
+            "title": f"Facet {n}",
+            "description": f"{'Refund requested' if n % 3 == 0 else 'App crashes'} in report {n}",
+            "category": stats.CATEGORIES[n % 4],
+            "priority": stats.PRIORITIES[n % 3],
+            "status": stats.STATUSES[n % 2],
+        }
+        for n in range(12)
+    ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.post("/api/tickets/bulk/", self.ROWS, format="json")
+
+    def _expected(self, params):
+        search = params.get("search", "").lower()
+        rows = [
+            row
+            for row in self.ROWS
+            if all(row[key] == params[key] for key in facets.FACETS if key in params)
+            and search in row["description"].lower()
+        ]
+        counts = {
+            name: {choice: sum(row[name] == choice for row in rows) for choice in choices}
+            for name, choices in facets.FACETS.items()
+        }
+        return len(rows), counts
+
+    def test_counts_cover_the_filtered_set_in_one_query(self):
+        for params in (
+            {},
+            {"priority": "low"},
+            {"status": "open", "search": "refund"},
+            {"search": "refund", "search_mode": "fulltext"},
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    "/api/tickets/", {**params, "facets": "status,category,priority", "page_size": 2}
+                )
+            body = response.json()
+            count, counts = self._expected(params)
+            self.assertEqual(body["count"], count, params)
+            self.assertEqual(body["facets"], counts, params)
+            self.assertEqual(len(body["results"]), min(count, 2))
+            self.assertEqual("X-Next-Cursor" in response, count > 2)
+            # Table version, the page, and all facets at once (unfiltered: an
+            # empty-archive check, then the counters).
+            self.assertEqual(len(queries), 3 if params else 4, [q["sql"] for q in queries])
+
+    def test_facets_are_optional_and_validated(self):
+        self.assertIsInstance(self.client.get("/api/tickets/").json(), list)
+        self.assertEqual(list(self.client.get("/api/tickets/?facets=status").json()["facets"]), ["status"])
+        self.assertEqual(self.client.get("/api/tickets/?facets=status,title").status_code, 400)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.ids = [
+            self.client.post(
+                "/api/tickets/",
+                {"title": f"Archive {n}", "description": f"Printer jammed again, case {n}"},
+                format="json",
+            ).json()["id"]
+            for n in range(4)
+        ]
+        # The two oldest are closed.
+        for pk in self.ids[:2]:
+            self.client.patch(f"/api/tickets/{pk}/", {"status": "closed"}, format="json")
+
+    def _ids(self, url, **params):
+        body = self.client.get(url, {"fields": "id", **params}).json()
+        return [ticket["id"] for ticket in (body["results"] if "facets" in params else body)]
+
+    def test_closed_tickets_move_and_stats_still_count_them(self):
+        before = Ticket.objects.filter(pk=self.ids[0]).values_list(
+            "title", "created_at", "updated_at", "version"
+        ).get()
+        call_command("archive_tickets", days=1, stdout=io.StringIO())
+        self.assertFalse(ArchivedTicket.objects.exists())
+
+        call_command("archive_tickets", days=0, batch_size=1, stdout=io.StringIO())
+        self.assertEqual(sorted(Ticket.objects.values_list("pk", flat=True)), self.ids[2:])
+        self.assertEqual(sorted(ArchivedTicket.objects.values_list("pk", flat=True)), self.ids[:2])
+        self.assertFalse(ClassificationJob.objects.filter(ticket_id__in=self.ids[:2]).exists())
+        archived = ArchivedTicket.objects.filter(pk=self.ids[0])
+        self.assertEqual(archived.values_list("title", "created_at", "updated_at", "version").get(), before)
+        self.assertTrue(archived.filter(search_vector__isnull=False).exists())
+
+        self.assertEqual(stats.find_drift(), {})
+        self.assertEqual(self.client.get("/api/tickets/stats/").json()["total_tickets"], 4)
+
+    def test_reads_include_the_archive_only_on_request(self):
+        call_command("archive_tickets", days=0, stdout=io.StringIO())
+        newest_first = self.ids[::-1]
+
+        self.assertEqual(self._ids("/api/tickets/"), newest_first[:2])
+        self.assertEqual(self._ids("/api/tickets/", include_archived=1), newest_first)
+        page = self.client.get("/api/tickets/", {"include_archived": 1, "page_size": 3})
+        rest = self._ids("/api/tickets/", include_archived=1, cursor=page["X-Next-Cursor"])
+        self.assertEqual([t["id"] for t in page.json()] + rest, newest_first)
+        self.assertEqual(self._ids("/api/tickets/", include_archived=1, status="closed"), newest_first[2:])
+        self.assertEqual(
+            self._ids("/api/tickets/", include_archived=1, search="jammed", search_mode="fulltext"),
+            newest_first,
+        )
+        self.assertEqual(self.client.get("/api/tickets/", {"facets": "status"}).json()["count"], 2)
+        facets = self.client.get("/api/tickets/", {"facets": "status", "include_archived": 1}).json()["facets"]
+        self.assertEqual(facets["status"]["closed"], 2)
+
+        url = f"/api/tickets/{self.ids[0]}/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        archived = self.client.get(url, {"include_archived": 1})
+        self.assertEqual((archived.status_code, archived.json()["status"]), (200, "closed"))
+        patch = self.client.patch(f"{url}?include_archived=1", {"status": "open"}, format="json")
+        self.assertEqual(patch.status_code, 404)
+
+        export = self.client.get("/api/tickets/export/", {"format": "ndjson", "include_archived": 1})
+        self.assertEqual(len(b"".join(export.streaming_content).splitlines()), 4)
+
+
+class SeedTicketsTests(TransactionTestCase):
+    # Committed, so that seed()'s worker threads (own connections) see the schema and counters.
+    END = date(2026, 1, 1)
+
+    def test_seed_copies_skewed_tickets_and_keeps_stats_exact(self):
+        out = io.StringIO()
+        call_command(
+            "seed_tickets", count=3000, seed=7, days=30, end=self.END, batch_size=500, jobs=1, stdout=out
+        )
+        self.assertIn("Seeded 3000 ticket(s)", out.getvalue())
+
+        tickets = list(Ticket.objects.order_by("pk").values_list("category", "status", "created_at"))
+        self.assertEqual(len(tickets), 3000)
+        created = [row[2] for row in tickets]
+        self.assertEqual(created, sorted(created))  # one job: ids follow created_at
+        self.assertGreaterEqual(created[0].date(), self.END - timedelta(days=30))
+        self.assertLess(created[-1].date(), self.END)
+
+        categories = [row[0] for row in tickets]
+        self.assertGreater(categories.count("technical"), 2 * categories.count("general"))
+        old = [status for _, status, at in tickets if at.date() < self.END - timedelta(days=14)]
+        self.assertGreater(old.count("closed"), old.count("open") * 5)
+        self.assertEqual(stats.find_drift(), {})
+        self.assertFalse(Ticket.objects.filter(search_vector__isnull=True).exists())
+        self.assertTrue(Ticket.objects.filter(search_vector="refund").exists())
+
+    def test_parallel_load_is_reproducible_from_the_seed(self):
+        generator = seed.TicketGenerator(seed=11, days=20, end=self.END)
+        expected = sorted(row for chunk in generator.chunks(1200, 100) for row in generator.rows(chunk))
+
+        self.assertEqual(seed.seed(1200, seed=11, days=20, end=self.END, batch_size=100, jobs=3), 1200)
+        loaded = Ticket.objects.values_list("title", "description", "category", "priority", "status", "created_at")
+        self.assertEqual(sorted(loaded), expected)
+        self.assertEqual(stats.find_drift(), {})
@@ -1,9 +1,32 @@
 from django.urls import path
-from .views import ClassifyView, TicketDetailView, TicketListCreateView, TicketStatsView
+from .views import (
+    ClassifyBatchView,
+    ClassifyCacheStatsView,
+    ClassifyView,
+    MetricsView,
+    TicketBulkView,
+    TicketChangesStreamView,
+    TicketChangesView,
+    TicketDetailView,
+    TicketExportView,
+    TicketListCreateView,
+    TicketSimilarView,
+    TicketStatsView,
+    TicketTimeseriesView,
+)
 
 urlpatterns = [
     path("tickets/", TicketListCreateView.as_view(), name="ticket-list-create"),
+    path("tickets/bulk/", TicketBulkView.as_view(), name="ticket-bulk"),
+    path("tickets/export/", TicketExportView.as_view(), name="ticket-export"),
+    path("tickets/changes/", TicketChangesView.as_view(), name="ticket-changes"),
+    path("tickets/changes/stream/", TicketChangesStreamView.as_view(), name="ticket-changes-stream"),
     path("tickets/stats/", TicketStatsView.as_view(), name="ticket-stats"),
+    path("tickets/stats/timeseries/", TicketTimeseriesView.as_view(), name="ticket-stats-timeseries"),
     path("tickets/classify/", ClassifyView.as_view(), name="ticket-classify"),
+    path("tickets/classify/batch/", ClassifyBatchView.as_view(), name="ticket-classify-batch"),
+    path("tickets/classify/cache/", ClassifyCacheStatsView.as_view(), name="ticket-classify-cache"),
     path("tickets/<int:pk>/", TicketDetailView.as_view(), name="ticket-detail"),
+    path("tickets/<int:pk>/similar/", TicketSimilarView.as_view(), name="ticket-similar"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
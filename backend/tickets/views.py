@@ -1,122 +1,491 @@
-from django.db.models import Count, Avg, F, ExpressionWrapper, FloatField
-from django.db.models.functions import TruncDate
+import asyncio
+import os
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.views import View
 from rest_framework import status
 from rest_framework.decorators import api_view
-from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.generics import ListCreateAPIView, RetrieveUpdateAPIView
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import (
+    GenericAPIView,
+    ListCreateAPIView,
+    RetrieveUpdateAPIView,
+    get_object_or_404,
+)
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .llm import classify_ticket
+from . import (
+    archive,
+    bulk_update,
+    changes,
+    conditional,
+    export,
+    facets,
+    ingest,
+    metrics,
+    read_path,
+    similarity,
+    stats,
+)
+from .filters import TicketFilterSet, TicketOrderingFilter, TicketSearchFilter
+from .llm import aclassify_ticket, classify_ticket, classify_tickets
+from .llm_cache import classification_cache
 from .models import Ticket
-from .serializers import ClassifyRequestSerializer, TicketSerializer
+from .pagination import TicketCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import (
+    ClassifyBatchRequestSerializer,
+    ClassifyRequestSerializer,
+    TicketBulkUpdateSerializer,
+    TicketSerializer,
+    TimeseriesQuerySerializer,
+)
 
 
 class TicketListCreateView(ListCreateAPIView):
     """
-    GET  /api/tickets/  — list all tickets (newest first), with optional filters.
-    POST /api/tickets/  — create a new ticket, returns 201 on success.
+    GET  /api/tickets/  — list tickets (newest first), one keyset page at a time.
+    POST /api/tickets/  — create a new ticket, returns 201 on success with the
+                          ids of likely duplicates. The suggestion is copied
+                          from a classified duplicate, or filled in
+                          asynchronously by the classification worker.
 
-    Supported query params: ?category=, ?priority=, ?status=, ?search=
+    Supported query params: ?category=, ?priority=, ?status=,
+    ?created_before=, ?created_after=, ?search=,
+    ?search_mode=contains|fulltext, ?cursor=, ?page_size=,
+    ?fields=id,title,description_preview,... (sparse fieldset),
+    ?facets=category,priority,status, ?include_archived=1,
+    ?ordering=-created_at (the only order; anything else is a 400)
+    The next page's cursor is returned in the Link / X-Next-Cursor headers.
+    With ?facets= the body is { "count", "results", "facets" }: the page plus
+    per-choice counts over every ticket matching the filters (tickets.facets).
+    GETs carry an ETag; If-None-Match gets a 304 while no ticket has changed.
     """
 
     serializer_class = TicketSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ["category", "priority", "status"]
+    pagination_class = TicketCursorPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    filter_backends = [DjangoFilterBackend, TicketSearchFilter, TicketOrderingFilter]
+    filterset_class = TicketFilterSet
     search_fields = ["title", "description"]
-    ordering = ["-created_at"]
 
     def get_queryset(self):
-        return Ticket.objects.all().order_by("-created_at")
+        return archive.model_for(self.request).objects.all().order_by("-created_at", "-id")
+
+    def list(self, request, *args, **kwargs):
+        tag = conditional.etag(request, conditional.table_version())
+        return conditional.respond(request, tag, self._list_page)
+
+    def _list_page(self):
+        # Tuples in, serializer-identical dicts out; see read_path.py.
+        request = self.request
+        fields = read_path.parse_fields(request.query_params.get("fields"))
+        facet_names = facets.parse_facets(request.query_params.get("facets"))
+        filtered = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(read_path.values(filtered, fields))
+        results = read_path.represent(page, fields)
+        if facet_names is None:
+            return self.get_paginated_response(results)
+        count, facet_counts = facets.counts(filtered, facet_names)
+        return self.get_paginated_response(
+            {"count": count, "results": results, "facets": facet_counts}
+        )
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        data = {**serializer.data, "likely_duplicates": serializer.instance.likely_duplicates}
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class TicketExportView(GenericAPIView):
+    """
+    GET /api/tickets/export/?format=csv|ndjson
+    Streams every ticket matching the list view's filters (?category=,
+    ?priority=, ?status=, ?created_before=, ?created_after=, ?search=,
+    ?search_mode=, ?include_archived=1) in the list order, without pagination.
+    Memory use is constant in the number of rows.
+    """
+
+    filter_backends = TicketListCreateView.filter_backends
+    filterset_class = TicketListCreateView.filterset_class
+    search_fields = TicketListCreateView.search_fields
+
+    def get_queryset(self):
+        return archive.model_for(self.request).objects.all().order_by("-created_at", "-id")
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= picks the export format below, not a DRF renderer; errors are JSON.
+        renderer = JSONRenderer()
+        return renderer, renderer.media_type
+
+    def get(self, request):
+        fmt = request.query_params.get("format", "csv")
+        if fmt not in export.FORMATS:
+            return Response(
+                {"format": [f"Must be one of: {', '.join(export.FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        chunks = export.STREAMS[fmt](queryset, settings.TICKET_EXPORT_CHUNK_SIZE)
+        if isinstance(request._request, ASGIRequest):
+            chunks = export.as_async(chunks)
+        response = StreamingHttpResponse(chunks, content_type=export.FORMATS[fmt])
+        filename = f"tickets-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class TicketChangesView(APIView):
+    """
+    GET /api/tickets/changes/?since=<cursor>
+    Tickets created or modified after the cursor, oldest change first, and the
+    cursor to send next time; without ?since= only a starting cursor. Takes
+    ?fields= like the list. See tickets/changes.py.
+    """
+
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def get(self, request):
+        fields = read_path.parse_fields(request.query_params.get("fields"))
+        since = changes.decode_cursor(request.query_params.get("since"))
+        return Response(changes.page(*changes.read(since, fields)))
+
+
+class TicketChangesStreamView(APIView):
+    """
+    GET /api/tickets/changes/stream/?since=<cursor>
+    The same feed as Server-Sent Events, pushed as writes commit: one `tickets`
+    event per page, with the cursor as its id. A reconnecting EventSource
+    resumes from its Last-Event-ID header. ASGI only: under WSGI it answers
+    501 and clients poll GET /api/tickets/changes/ instead.
+    """
+
+    def perform_content_negotiation(self, request, force=False):
+        # Errors are JSON; the stream itself is not rendered by DRF.
+        renderer = JSONRenderer()
+        return renderer, renderer.media_type
+
+    def get(self, request):
+        fields = read_path.parse_fields(request.query_params.get("fields"))
+        since = changes.decode_cursor(
+            request.META.get("HTTP_LAST_EVENT_ID") or request.query_params.get("since")
+        )
+        if not isinstance(request._request, ASGIRequest):
+            # A sync worker would be tied up for the stream's whole life.
+            return Response(
+                {
+                    "detail": "Streaming needs the ASGI server; poll /api/tickets/changes/ instead.",
+                    "poll": "/api/tickets/changes/",
+                },
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+        response = StreamingHttpResponse(changes.astream(since, fields), content_type=changes.CONTENT_TYPE)
+        response["Cache-Control"] = "no-cache"
+        # Tell nginx-style proxies not to buffer the stream.
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class TicketBulkView(GenericAPIView):
+    """
+    POST /api/tickets/bulk/
+    Body: NDJSON (Content-Type: application/x-ndjson, one ticket object per
+    line) or a JSON array of ticket objects (application/json), streamed.
+    Returns: { "created": n, "failed": n, "errors": [{ "row": n, "errors": {...} }],
+               "errors_truncated": bool }
+    Rows are validated like POST /api/tickets/; invalid rows are skipped and
+    reported without failing the rest. Imported tickets are not queued for LLM
+    classification.
+
+    PATCH /api/tickets/bulk/?<list filters>
+    Body: { "ids": [1, 2, ...], "status": "...", "priority": "..." }
+    Returns: { "updated": n }
+    Sets status and/or priority on every ticket matching the ids and/or the
+    list view's query-string filters, with one set-based UPDATE. At least one of
+    ids or a filter is required, so an empty request cannot touch every ticket.
+    """
+
+    filter_backends = TicketListCreateView.filter_backends
+    filterset_class = TicketListCreateView.filterset_class
+    search_fields = TicketListCreateView.search_fields
+
+    FILTER_PARAMS = {*TicketFilterSet.base_filters, "search"}
+
+    NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+    def post(self, request):
+        content_type = request.content_type.split(";")[0].strip().lower()
+        if content_type in self.NDJSON_TYPES:
+            parse = ingest.iter_ndjson
+        elif content_type == "application/json":
+            parse = ingest.iter_json_array
+        else:
+            return Response(
+                {"error": "Send application/x-ndjson or a JSON array as application/json."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        return Response(ingest.ingest(parse(self._body(request._request))))
+
+    @staticmethod
+    def _body(request):
+        # DRF's request.stream is None without a Content-Length, which is how a
+        # chunked upload arrives, so read the Django request instead. Under WSGI
+        # Django also caps the body at Content-Length (0 when absent); servers
+        # that de-chunk the input themselves (gunicorn) set wsgi.input_terminated.
+        meta = request.META
+        if "CONTENT_LENGTH" not in meta and meta.get("wsgi.input_terminated"):
+            return meta["wsgi.input"]
+        return request
+
+    def patch(self, request):
+        serializer = TicketBulkUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        filtered = [name for name in self.FILTER_PARAMS if request.query_params.get(name)]
+        if "ids" not in data and not filtered:
+            return Response(
+                {"error": "Provide ids and/or at least one filter (e.g. ?status=resolved)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(Ticket.objects.all())
+        if "ids" in data:
+            queryset = queryset.filter(pk__in=data["ids"])
+        changes = {field: data[field] for field in ("status", "priority") if field in data}
+        return Response({"updated": bulk_update.apply(queryset, changes)})
 
 
 class TicketDetailView(RetrieveUpdateAPIView):
     """
-    GET   /api/tickets/<id>/  — retrieve a single ticket.
-    PATCH /api/tickets/<id>/  — partial update (status, category, priority, etc.).
+    GET   /api/tickets/<id>/  — retrieve a single ticket (ETag from the row's version);
+                                archived tickets too with ?include_archived=1.
+    PATCH /api/tickets/<id>/  — partial update (status, category, priority, etc.);
+                                archived tickets are read-only (404).
     """
 
     serializer_class = TicketSerializer
     queryset = Ticket.objects.all()
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     http_method_names = ["get", "patch", "head", "options"]
 
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = self.kwargs[lookup_url_kwarg]
+        model = archive.model_for(request)
+        version = conditional.ticket_version(lookup, model)
+        if version is None:
+            raise NotFound()
+
+        def build():
+            queryset = read_path.values(self.filter_queryset(model.objects.all()))
+            row = get_object_or_404(queryset, **{self.lookup_field: lookup})
+            return Response(read_path.represent([row])[0])
+
+        return conditional.respond(request, conditional.etag(request, version), build)
+
     def update(self, request, *args, **kwargs):
         kwargs["partial"] = True
         return super().update(request, *args, **kwargs)
 
 
+class TicketSimilarView(APIView):
+    """
+    GET /api/tickets/<id>/similar/?limit=10
+    Recent tickets whose descriptions look like this one's, most similar
+    first, each with its estimated `similarity` (see tickets/similarity.py).
+    """
+
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    max_limit = 100
+
+    def get(self, request, pk):
+        description = Ticket.objects.filter(pk=pk).values_list("description", flat=True).first()
+        if description is None:
+            raise NotFound()
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), self.max_limit)
+        except ValueError:
+            return Response({"limit": ["Must be an integer."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        matches = similarity.similar_to(pk, description, limit=limit)
+        scores = {ticket_id: score for ticket_id, score, _ in matches}
+        rows = read_path.values(Ticket.objects.filter(pk__in=scores))
+        tickets = {ticket["id"]: ticket for ticket in read_path.represent(rows)}
+        return Response(
+            [
+                {**tickets[ticket_id], "similarity": round(score, 3)}
+                for ticket_id, score in scores.items()
+                if ticket_id in tickets
+            ]
+        )
+
+
 class TicketStatsView(APIView):
     """
     GET /api/tickets/stats/
-    Returns aggregated metrics computed entirely at the database level.
+    Totals and breakdowns come from the incrementally maintained counter table,
+    the per-day average from the daily rollup (tickets.stats) — neither read
+    grows with the number of tickets. Answers If-None-Match with 304 until a
+    ticket is written.
     """
 
     def get(self, request):
-        qs = Ticket.objects.all()
+        tag = conditional.etag(request, conditional.table_version())
+        return conditional.respond(request, tag, self._stats)
 
-        total_tickets = qs.count()
-        open_tickets = qs.filter(status="open").count()
+    def _stats(self):
+        counters = stats.read_counters()
 
-        # Average tickets per day — use DB-level aggregation
-        daily_counts = (
-            qs.annotate(day=TruncDate("created_at"))
-            .values("day")
-            .annotate(count=Count("id"))
-        )
-        if daily_counts.exists():
-            total_days = daily_counts.count()
-            total_for_avg = sum(d["count"] for d in daily_counts)
-            avg_tickets_per_day = round(total_for_avg / total_days, 1)
+        # Average tickets per day over the days that have tickets.
+        total_days = stats.days_with_tickets()
+        if total_days:
+            avg_tickets_per_day = round(counters["total_tickets"] / total_days, 1)
         else:
             avg_tickets_per_day = 0.0
 
-        priority_qs = (
-            qs.values("priority")
-            .annotate(count=Count("id"))
+        return Response(
+            {
+                "total_tickets": counters["total_tickets"],
+                "open_tickets": counters["open_tickets"],
+                "avg_tickets_per_day": avg_tickets_per_day,
+                "priority_breakdown": counters["priority_breakdown"],
+                "category_breakdown": counters["category_breakdown"],
+            }
         )
-        priority_breakdown = {p: 0 for p in ["low", "medium", "high", "critical"]}
-        for row in priority_qs:
-            priority_breakdown[row["priority"]] = row["count"]
 
-        category_qs = (
-            qs.values("category")
-            .annotate(count=Count("id"))
-        )
-        category_breakdown = {c: 0 for c in ["billing", "technical", "account", "general"]}
-        for row in category_qs:
-            category_breakdown[row["category"]] = row["count"]
 
+class TicketTimeseriesView(APIView):
+    """
+    GET /api/tickets/stats/timeseries/?from=YYYY-MM-DD&to=YYYY-MM-DD&bucket=day|week
+    Tickets created per bucket with category/priority/status breakdowns, read
+    from the daily rollup. Defaults to the last 30 days, bucketed by day.
+    """
+
+    def get(self, request):
+        serializer = TimeseriesQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = serializer.validated_data
         return Response(
             {
-                "total_tickets": total_tickets,
-                "open_tickets": open_tickets,
-                "avg_tickets_per_day": avg_tickets_per_day,
-                "priority_breakdown": priority_breakdown,
-                "category_breakdown": category_breakdown,
+                "from": params["from"],
+                "to": params["to"],
+                "bucket": params["bucket"],
+                "series": stats.timeseries(params["from"], params["to"], params["bucket"]),
             }
         )
 
 
-class ClassifyView(APIView):
+class AsyncAPIView(APIView):
+    """
+    An APIView whose handlers are coroutines (DRF's own dispatch is sync-only).
+    Under ASGI the request is served on the event loop, so awaiting I/O in a
+    handler holds no thread. Authentication is off: SessionAuthentication would
+    query the session table from the event loop, and the API is open anyway.
+    """
+
+    authentication_classes = []
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return markcoroutinefunction(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Mirrors APIView.dispatch(), awaiting the handler.
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class ClassifyView(AsyncAPIView):
     """
     POST /api/tickets/classify/
     Body: { "description": "..." }
     Returns: { "suggested_category": "...", "suggested_priority": "..." }
+    Async: while Groq is thinking, the worker keeps serving other requests.
+    Under WSGI there is no loop to share, so the sync path is used instead.
     """
 
-    def post(self, request):
+    async def post(self, request):
         serializer = ClassifyRequestSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         description = serializer.validated_data["description"]
-        result = classify_ticket(description)
+        if isinstance(request._request, ASGIRequest):
+            result = await aclassify_ticket(description)
+        else:
+            # async_to_sync gives every WSGI request a fresh event loop, which
+            # would build (and leak) an AsyncGroq client and pool per call.
+            result = await sync_to_async(classify_ticket)(description)
         return Response(result)
+
+
+class ClassifyBatchView(APIView):
+    """
+    POST /api/tickets/classify/batch/
+    Body: { "descriptions": ["...", "..."] }
+    Returns: { "results": [{ "suggested_category": ..., "suggested_priority": ... }, ...] }
+    Results are in input order; each item falls back to the defaults on its own.
+    """
+
+    def post(self, request):
+        serializer = ClassifyBatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = classify_tickets(serializer.validated_data["descriptions"])
+        return Response({"results": results})
+
+
+class ClassifyCacheStatsView(APIView):
+    """
+    GET /api/tickets/classify/cache/
+    Hit/miss counters for the classification cache in the worker that serves
+    the request (each gunicorn worker keeps its own counters).
+    """
+
+    def get(self, request):
+        return Response({"pid": os.getpid(), **classification_cache.stats()})
+
+
+class MetricsView(View):
+    """
+    GET /api/metrics
+    Request latency, SQL query count/time per view and classify_ticket outcomes
+    for the worker that serves the scrape, in the Prometheus text format.
+    """
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
@@ -7,8 +7,13 @@ const api = axios.create({
 
 export const ticketsApi = {
   list: (params = {}) => api.get("/tickets/", { params }),
+  get: (id, params = {}) => api.get(`/tickets/${id}/`, { params }),
   create: (data) => api.post("/tickets/", data),
   update: (id, data) => api.patch(`/tickets/${id}/`, data),
   stats: () => api.get("/tickets/stats/"),
   classify: (description) => api.post("/tickets/classify/", { description }),
+  // One page of created/updated tickets after a cursor (no `since`: a starting cursor).
+  changesPage: (params = {}) => api.get("/tickets/changes/", { params }),
+  // Server-Sent Events: a "tickets" event for every batch of created/updated tickets.
+  changes: (params = {}) => new EventSource(`/api/tickets/changes/stream/?${new URLSearchParams(params)}`),
 };
@@ -4,8 +4,10 @@ const CATEGORIES = ["", "billing", "technical", "account", "general"];
 const PRIORITIES = ["", "low", "medium", "high", "critical"];
 const STATUSES = ["", "open", "in_progress", "resolved", "closed"];
 
-export default function FilterBar({ filters, onChange }) {
+export default function FilterBar({ filters, facets, onChange }) {
   const handle = (key) => (e) => onChange({ ...filters, [key]: e.target.value });
+  // Matching tickets per option, from the list response's facets.
+  const count = (key, value) => (facets?.[key] ? ` (${facets[key][value]})` : "");
 
   return (
     <div className="filter-bar">
@@ -23,23 +25,32 @@ export default function FilterBar({ filters, onChange }) {
       <select className="form-select" value={filters.category} onChange={handle("category")}>
         <option value="">All Categories</option>
         {CATEGORIES.filter(Boolean).map((c) => (
-          <option key={c} value={c}>{c.charAt(0).toUpperCase() + c.slice(1)}</option>
+          <option key={c} value={c}>{c.charAt(0).toUpperCase() + c.slice(1)}{count("category", c)}</option>
         ))}
       </select>
 
       <select className="form-select" value={filters.priority} onChange={handle("priority")}>
         <option value="">All Priorities</option>
         {PRIORITIES.filter(Boolean).map((p) => (
-          <option key={p} value={p}>{p.charAt(0).toUpperCase() + p.slice(1)}</option>
+          <option key={p} value={p}>{p.charAt(0).toUpperCase() + p.slice(1)}{count("priority", p)}</option>
         ))}
       </select>
 
       <select className="form-select" value={filters.status} onChange={handle("status")}>
         <option value="">All Statuses</option>
         {STATUSES.filter(Boolean).map((s) => (
-          <option key={s} value={s}>{s.replace("_", " ")}</option>
+          <option key={s} value={s}>{s.replace("_", " ")}{count("status", s)}</option>
         ))}
       </select>
+
+      <label style={{ display: "flex", alignItems: "center", gap: 6, color: "var(--text-muted)", fontSize: "0.85rem" }}>
+        <input
+          type="checkbox"
+          checked={filters.include_archived === "1"}
+          onChange={(e) => onChange({ ...filters, include_archived: e.target.checked ? "1" : "" })}
+        />
+        Include archived
+      </label>
     </div>
   );
 }
@@ -15,15 +15,35 @@ function formatDate(iso) {
   });
 }
 
+function preview(text) {
+  return text.slice(0, 160) + (text.length > 160 ? "…" : "");
+}
+
 export default function TicketCard({ ticket, onUpdated }) {
   const [expanded, setExpanded] = useState(false);
   const [updating, setUpdating] = useState(false);
+  const [description, setDescription] = useState(ticket.description ?? null);
+
+  const toggleExpanded = async () => {
+    setExpanded((v) => !v);
+    // The list only ships a preview; fetch the full text the first time.
+    if (description === null) {
+      try {
+        // The card may be showing an archived ticket ("Include archived").
+        const { data } = await ticketsApi.get(ticket.id, { include_archived: 1 });
+        setDescription(data.description);
+      } catch {
+        toast.error("Failed to load ticket.");
+      }
+    }
+  };
 
   const handleStatusChange = async (e) => {
     const newStatus = e.target.value;
     setUpdating(true);
     try {
       const { data } = await ticketsApi.update(ticket.id, { status: newStatus });
+      setDescription(data.description);
       onUpdated(data);
       toast.success("Status updated.");
     } catch {
@@ -36,7 +56,7 @@ export default function TicketCard({ ticket, onUpdated }) {
   return (
     <div
       className={`ticket-card ${expanded ? "expanded" : ""}`}
-      onClick={() => setExpanded((v) => !v)}
+      onClick={toggleExpanded}
     >
       <div className="ticket-card-header">
         <div className="ticket-title">{ticket.title}</div>
@@ -49,7 +69,9 @@ export default function TicketCard({ ticket, onUpdated }) {
       </div>
 
       <div className="ticket-description">
-        {expanded ? ticket.description : ticket.description.slice(0, 160) + (ticket.description.length > 160 ? "…" : "")}
+        {expanded && description !== null
+          ? description
+          : ticket.description_preview ?? preview(description ?? "")}
       </div>
 
       <div className="ticket-footer">
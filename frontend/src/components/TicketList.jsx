@@ -1,35 +1,129 @@
-import { useState, useEffect, useCallback } from "react";
+import { useState, useEffect, useCallback, useRef } from "react";
 import { Loader } from "lucide-react";
 import { ticketsApi } from "../api/tickets";
 import FilterBar from "./FilterBar";
 import TicketCard from "./TicketCard";
 
-const INITIAL_FILTERS = { search: "", category: "", priority: "", status: "" };
+const INITIAL_FILTERS = { search: "", category: "", priority: "", status: "", include_archived: "" };
+// Cards start collapsed, so fetch a preview; TicketCard loads the full description on expand.
+const LIST_FIELDS = "id,title,description_preview,category,priority,status,created_at";
+const FILTER_KEYS = ["category", "priority", "status"];
+// Counts for the filter dropdowns come back with the first page (one request).
+const FACETS = FILTER_KEYS.join(",");
+const POLL_INTERVAL_MS = 5000;
+
+const newestFirst = (a, b) => b.created_at.localeCompare(a.created_at) || b.id - a.id;
+
+// Merge pushed tickets into the loaded list: update the ones shown, drop those
+// that stopped matching the filters, and slot in new matches that fall within
+// the loaded pages. Searches aren't re-run here, so they only get updates.
+function applyChanges(tickets, changed, filters, complete) {
+  const matches = (t) => FILTER_KEYS.every((key) => !filters[key] || t[key] === filters[key]);
+  const pending = new Map(changed.map((t) => [t.id, t]));
+  const next = tickets.flatMap((t) => {
+    const update = pending.get(t.id);
+    if (!update) return [t];
+    pending.delete(t.id);
+    return matches(update) ? [update] : [];
+  });
+  if (filters.search) return next;
+  const oldest = tickets[tickets.length - 1];
+  const added = [...pending.values()].filter(
+    (t) => matches(t) && (complete || !oldest || newestFirst(t, oldest) < 0)
+  );
+  return added.length ? [...next, ...added].sort(newestFirst) : next;
+}
 
 export default function TicketList({ refreshSignal }) {
   const [tickets, setTickets] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
   const [filters, setFilters] = useState(INITIAL_FILTERS);
+  const [total, setTotal] = useState(null);
+  const [facets, setFacets] = useState(null);
+  // Read by the change stream, which stays open across filter changes.
+  const view = useRef({ filters, complete: true });
+  view.current = { filters, complete: !nextCursor };
+
+  const activeParams = useCallback(() => {
+    const params = Object.fromEntries(Object.entries(filters).filter(([, v]) => v !== ""));
+    params.fields = LIST_FIELDS;
+    // Indexed word/prefix search — cheap enough to run on every keystroke.
+    if (params.search) params.search_mode = "fulltext";
+    return params;
+  }, [filters]);
 
   const fetchTickets = useCallback(async () => {
     setLoading(true);
     try {
-      const params = Object.fromEntries(
-        Object.entries(filters).filter(([, v]) => v !== "")
-      );
-      const { data } = await ticketsApi.list(params);
-      setTickets(data);
+      const { data, headers } = await ticketsApi.list({ ...activeParams(), facets: FACETS });
+      setTickets(data.results);
+      setTotal(data.count);
+      setFacets(data.facets);
+      setNextCursor(headers["x-next-cursor"] || null);
     } catch {
       // errors shown via toast from API layer
     } finally {
       setLoading(false);
     }
-  }, [filters]);
+  }, [activeParams]);
+
+  const fetchMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const { data, headers } = await ticketsApi.list({ ...activeParams(), cursor: nextCursor });
+      setTickets((prev) => [...prev, ...data]);
+      setNextCursor(headers["x-next-cursor"] || null);
+    } catch {
+      // errors shown via toast from API layer
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => {
     fetchTickets();
   }, [fetchTickets, refreshSignal]);
 
+  useEffect(() => {
+    const apply = (changed) => {
+      if (!changed.length) return;
+      const { filters: current, complete } = view.current;
+      setTickets((prev) => applyChanges(prev, changed, current, complete));
+    };
+    let timer = null;
+    let cursor = null;
+    // Without a stream (the server answers 501 under WSGI), poll /changes/ instead.
+    const poll = async () => {
+      let again = POLL_INTERVAL_MS;
+      try {
+        const { data } = await ticketsApi.changesPage({ fields: LIST_FIELDS, since: cursor ?? "" });
+        if (cursor) apply(data.tickets);
+        cursor = data.cursor;
+        if (data.has_more) again = 0;
+      } catch {
+        // errors shown via toast from API layer
+      }
+      if (timer !== null) timer = setTimeout(poll, again);
+    };
+
+    const source = ticketsApi.changes({ fields: LIST_FIELDS });
+    source.addEventListener("tickets", (event) => apply(JSON.parse(event.data).tickets));
+    source.addEventListener("error", () => {
+      // EventSource retries on its own unless the response was not a stream.
+      if (source.readyState !== EventSource.CLOSED || timer !== null) return;
+      timer = 0;
+      poll();
+    });
+    return () => {
+      source.close();
+      clearTimeout(timer);
+      timer = null;
+    };
+  }, []);
+
   const handleUpdated = (updated) => {
     setTickets((prev) => prev.map((t) => (t.id === updated.id ? updated : t)));
   };
@@ -38,10 +132,12 @@ export default function TicketList({ refreshSignal }) {
     <div>
       <div className="page-header">
         <div className="page-title">All Tickets</div>
-        <div className="page-subtitle">{tickets.length} ticket{tickets.length !== 1 ? "s" : ""} found</div>
+        <div className="page-subtitle">
+          {total ?? tickets.length} ticket{(total ?? tickets.length) !== 1 ? "s" : ""} found
+        </div>
       </div>
 
-      <FilterBar filters={filters} onChange={setFilters} />
+      <FilterBar filters={filters} facets={facets} onChange={setFilters} />
 
       {loading ? (
         <div style={{ display: "flex", justifyContent: "center", padding: "3rem" }}>
@@ -58,6 +154,13 @@ export default function TicketList({ refreshSignal }) {
           {tickets.map((ticket) => (
             <TicketCard key={ticket.id} ticket={ticket} onUpdated={handleUpdated} />
           ))}
+          {nextCursor && (
+            <div style={{ display: "flex", justifyContent: "center", padding: "1rem" }}>
+              <button className="btn btn-ghost btn-sm" onClick={fetchMore} disabled={loadingMore}>
+                {loadingMore ? <Loader size={14} className="spinner" /> : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -1,5 +1,6 @@
 import requests
 import json
+import uuid
 
 BASE = "http://localhost:8000/api"
 passed = 0
@@ -51,6 +52,40 @@ for t in tickets:
     if r.status_code == 201:
         created_ids.append(r.json()["id"])
 
+# A description unlike any earlier ticket, so no classified duplicate lends its suggestion.
+unique = {"title": "Read-only fields", "description": f"Read-only check {uuid.uuid4().hex}", "suggested_category": "billing"}
+r = requests.post(f"{BASE}/tickets/", json=unique)
+check("POST returns before classification (suggested_* null, read-only)",
+      r.status_code == 201 and r.json().get("suggested_category") is None and "suggested_priority" in r.json())
+if r.status_code == 201:
+    created_ids.append(r.json()["id"])
+
+# Mostly random text, so this run's pair is not similar to earlier runs' tickets.
+outage = f"Checkout outage {uuid.uuid4().hex} {uuid.uuid4().hex}"
+r = requests.post(f"{BASE}/tickets/", json={"title": "Outage", "description": outage})
+original_id = r.json().get("id") if r.status_code == 201 else None
+r = requests.post(f"{BASE}/tickets/", json={"title": "Outage", "description": outage + " again"})
+duplicate_id = r.json().get("id") if r.status_code == 201 else None
+check("POST near-duplicate → likely_duplicates lists the original",
+      r.status_code == 201 and r.json().get("likely_duplicates") == [original_id], f"got {r.json()}")
+r = requests.get(f"{BASE}/tickets/{original_id}/similar/")
+check("GET /tickets/<id>/similar/ → the near-duplicate with a similarity score",
+      r.status_code == 200 and [t["id"] for t in r.json()] == [duplicate_id] and r.json()[0]["similarity"] >= 0.5)
+created_ids += [i for i in (original_id, duplicate_id) if i]
+
+ndjson = "\n".join(json.dumps(row) for row in [
+    {"title": "Imported: refund request", "description": "Legacy helpdesk ticket about a refund", "category": "billing"},
+    {"title": "", "description": "Row with a blank title"},
+    {"title": "Imported: outage", "description": "Legacy helpdesk ticket about an outage", "priority": "urgent"},
+])
+r = requests.post(f"{BASE}/tickets/bulk/", data=ndjson, headers={"Content-Type": "application/x-ndjson"})
+check("POST /tickets/bulk/ (NDJSON) → 1 created, 2 per-row errors",
+      r.status_code == 200 and r.json()["created"] == 1 and [e["row"] for e in r.json()["errors"]] == [2, 3])
+r = requests.post(f"{BASE}/tickets/bulk/", json=[{"title": "Imported: array row", "description": "Sent as a JSON array"}])
+check("POST /tickets/bulk/ (JSON array) → 1 created", r.status_code == 200 and r.json()["created"] == 1)
+r = requests.post(f"{BASE}/tickets/bulk/", data="x", headers={"Content-Type": "text/plain"})
+check("POST /tickets/bulk/ with other content type → 415", r.status_code == 415)
+
 # ── 2. VALIDATION ─────────────────────────────────────────────────────────────
 section("2. Input Validation")
 
@@ -77,6 +112,19 @@ check(f"Returns {len(tickets)} tickets", len(data) >= len(tickets), f"got {len(d
 if len(data) >= 2:
     check("Newest first (descending created_at)", data[0]["id"] > data[1]["id"])
 
+r = requests.get(f"{BASE}/tickets/", params={"page_size": 2})
+check("?page_size=2 → 2 tickets", r.status_code == 200 and len(r.json()) == 2, f"got {len(r.json())}")
+cursor = r.headers.get("X-Next-Cursor")
+check("Next cursor returned in headers", bool(cursor) and 'rel="next"' in r.headers.get("Link", ""))
+if cursor:
+    r2 = requests.get(f"{BASE}/tickets/", params={"page_size": 2, "cursor": cursor})
+    check("?cursor= returns the following page", r2.status_code == 200 and len(r2.json()) >= 1)
+    if r2.status_code == 200 and r2.json():
+        check("Pages don't overlap and stay newest first", r2.json()[0]["id"] < r.json()[-1]["id"])
+
+r = requests.get(f"{BASE}/tickets/", params={"cursor": "not-a-cursor"})
+check("Invalid cursor → 404", r.status_code == 404)
+
 # ── 4. FILTERS ────────────────────────────────────────────────────────────────
 section("4. Filters & Search")
 
@@ -95,6 +143,15 @@ check("?search=login finds ticket", r.status_code == 200 and len(r.json()) >= 1)
 r = requests.get(f"{BASE}/tickets/", params={"search": "charged"})
 check("?search=charged finds ticket", r.status_code == 200 and len(r.json()) >= 1)
 
+r = requests.get(f"{BASE}/tickets/", params={"search": "charg", "search_mode": "fulltext"})
+check("?search=charg&search_mode=fulltext prefix-matches", r.status_code == 200 and len(r.json()) >= 1)
+
+r = requests.get(f"{BASE}/tickets/", params={"search": "xyznonexistent", "search_mode": "fulltext"})
+check("fulltext search nonexistent → empty list", r.status_code == 200 and r.json() == [])
+
+r = requests.get(f"{BASE}/tickets/", params={"search": "login", "search_mode": "bogus"})
+check("invalid search_mode → 400", r.status_code == 400)
+
 r = requests.get(f"{BASE}/tickets/", params={"category": "technical", "priority": "high"})
 check("?category=technical&priority=high combined", r.status_code == 200)
 
@@ -104,9 +161,44 @@ check("?category=billing&status=open combined", r.status_code == 200)
 r = requests.get(f"{BASE}/tickets/", params={"search": "xyznonexistent"})
 check("?search=nonexistent → empty list", r.status_code == 200 and r.json() == [])
 
+r = requests.get(f"{BASE}/tickets/", params={"fields": "id,title,description_preview", "page_size": 5})
+check("?fields=id,title,description_preview → only those keys",
+      r.status_code == 200 and len(r.json()) > 0 and all(list(t) == ["id", "title", "description_preview"] for t in r.json()))
+r = requests.get(f"{BASE}/tickets/", params={"fields": "title,nope"})
+check("?fields= with an unknown name → 400", r.status_code == 400 and "fields" in r.json())
+
+r = requests.get(f"{BASE}/tickets/", params={"category": "billing", "facets": "status,priority", "page_size": 1})
+body = r.json()
+check("?facets=status,priority → page + counts over the filtered set",
+      r.status_code == 200 and len(body["results"]) == 1 and set(body["facets"]) == {"status", "priority"}
+      and sum(body["facets"]["status"].values()) == body["count"] == sum(body["facets"]["priority"].values()))
+r = requests.get(f"{BASE}/tickets/", params={"facets": "title"})
+check("?facets= with an unknown name → 400", r.status_code == 400 and "facets" in r.json())
+
+r = requests.get(f"{BASE}/tickets/", params={"include_archived": 1, "status": "open", "fields": "id"})
+live = requests.get(f"{BASE}/tickets/", params={"status": "open", "fields": "id"})
+check("?include_archived=1&status=open → same as live (only closed tickets are archived)",
+      r.status_code == 200 and r.json() == live.json())
+
+r = requests.get(f"{BASE}/tickets/export/", params={"format": "csv", "category": "billing"})
+lines = r.text.splitlines()
+check("GET /tickets/export/?format=csv → header + filtered rows",
+      r.status_code == 200 and r.headers["Content-Type"].startswith("text/csv")
+      and lines[0].startswith("id,title,") and len(lines) > 1 and all(",billing," in l for l in lines[1:]))
+r = requests.get(f"{BASE}/tickets/export/", params={"format": "ndjson", "priority": "critical"})
+check("GET /tickets/export/?format=ndjson → one JSON object per line",
+      r.status_code == 200 and all(json.loads(l)["priority"] == "critical" for l in r.text.splitlines()))
+r = requests.get(f"{BASE}/tickets/export/", params={"format": "xml"})
+check("GET /tickets/export/?format=xml → 400", r.status_code == 400)
+
 # ── 5. STATUS TRANSITIONS ─────────────────────────────────────────────────────
 section("5. Status Transitions (PATCH)")
 
+r = requests.get(f"{BASE}/tickets/changes/")
+changes_cursor = r.json().get("cursor") if r.status_code == 200 else None
+check("GET /tickets/changes/ → starting cursor, no tickets",
+      r.status_code == 200 and r.json()["tickets"] == [] and bool(changes_cursor))
+
 if created_ids:
     tid = created_ids[0]
     for status in ["in_progress", "resolved", "closed", "open"]:
@@ -117,6 +209,30 @@ if created_ids:
     r = requests.patch(f"{BASE}/tickets/{tid}/", json={"category": "billing", "priority": "critical"})
     check("PATCH override category + priority", r.status_code == 200 and r.json()["category"] == "billing")
 
+r = requests.patch(f"{BASE}/tickets/bulk/", json={"ids": created_ids[:2], "priority": "critical"})
+check("PATCH /tickets/bulk/ by ids → updated count", r.status_code == 200 and "updated" in r.json())
+r = requests.get(f"{BASE}/tickets/{created_ids[0]}/")
+check("Bulk-updated ticket has the new priority", r.json().get("priority") == "critical")
+r = requests.patch(f"{BASE}/tickets/bulk/", params={"status": "open", "created_before": "2000-01-01T00:00:00Z"},
+                   json={"status": "closed"})
+check("PATCH /tickets/bulk/ by filters → 0 matched in the past", r.status_code == 200 and r.json() == {"updated": 0})
+r = requests.patch(f"{BASE}/tickets/bulk/", json={"status": "closed"})
+check("PATCH /tickets/bulk/ without ids or filters → 400", r.status_code == 400)
+
+r = requests.get(f"{BASE}/tickets/changes/", params={"since": changes_cursor, "fields": "id"})
+changed = [t["id"] for t in r.json().get("tickets", [])] if r.status_code == 200 else []
+check("GET /tickets/changes/?since= → includes the ticket patched above",
+      r.status_code == 200 and bool(created_ids) and created_ids[0] in changed, f"got {changed}")
+with requests.get(f"{BASE}/tickets/changes/stream/", stream=True, timeout=10) as r:
+    if r.status_code == 501:  # WSGI server (runserver, APP_SERVER=wsgi): clients poll instead
+        head = r.json()
+        ok = head.get("poll") == "/api/tickets/changes/"
+    else:
+        lines = r.iter_lines(chunk_size=1, decode_unicode=True)
+        head = [next(lines) for _ in range(5)]
+        ok = r.headers.get("Content-Type") == "text/event-stream" and "event: tickets" in head
+check("GET /tickets/changes/stream/ → event stream (ASGI) or 501 pointing at /changes/ (WSGI)", ok, f"got {head}")
+
 # ── 6. STATS ──────────────────────────────────────────────────────────────────
 section("6. Stats Endpoint")
 
@@ -137,6 +253,27 @@ if r.status_code == 200:
     print(f"\n  📊 total={s['total_tickets']} | open={s['open_tickets']} | avg/day={s['avg_tickets_per_day']}")
     print(f"  📊 priority={s['priority_breakdown']}")
     print(f"  📊 category={s['category_breakdown']}")
+    r = requests.get(f"{BASE}/tickets/stats/", headers={"If-None-Match": r.headers.get("ETag", "")})
+    check("GET /tickets/stats/ with If-None-Match → 304", r.status_code == 304, f"got {r.status_code}")
+
+r = requests.get(f"{BASE}/tickets/stats/timeseries/")
+check("GET /tickets/stats/timeseries/ → 200", r.status_code == 200)
+if r.status_code == 200:
+    ts = r.json()
+    check("Defaults to 30 daily buckets", ts["bucket"] == "day" and len(ts["series"]) == 30, f"got {len(ts['series'])}")
+    check("Today's bucket counts the new tickets", ts["series"][-1]["total"] >= len(tickets))
+    point = ts["series"][-1]
+    check("Bucket breakdowns sum to its total",
+          sum(point["category"].values()) == sum(point["priority"].values()) == sum(point["status"].values()) == point["total"])
+
+r = requests.get(f"{BASE}/tickets/stats/timeseries/", params={"bucket": "week"})
+check("?bucket=week → 200", r.status_code == 200 and r.json()["bucket"] == "week")
+
+r = requests.get(f"{BASE}/tickets/stats/timeseries/", params={"from": "2030-01-02", "to": "2030-01-01"})
+check("timeseries from > to → 400", r.status_code == 400)
+
+r = requests.get(f"{BASE}/tickets/stats/timeseries/", params={"bucket": "month"})
+check("timeseries invalid bucket → 400", r.status_code == 400)
 
 # ── 7. LLM CLASSIFY ───────────────────────────────────────────────────────────
 section("7. LLM Classification")
@@ -162,6 +299,24 @@ for expected_cat, desc in classify_cases:
             skip(f"AI accuracy for '{expected_cat}'", "GROQ_API_KEY not active")
         print(f"  → {d.get('suggested_category')} / {d.get('suggested_priority')}")
 
+r = requests.post(f"{BASE}/tickets/classify/batch/", json={"descriptions": [desc for _, desc in classify_cases]})
+check("classify/batch → 200", r.status_code == 200)
+if r.status_code == 200:
+    results = r.json()["results"]
+    check("batch returns one result per description", len(results) == len(classify_cases))
+    check("batch results are valid choices", all(
+        x["suggested_category"] in {"billing","technical","account","general"} and
+        x["suggested_priority"] in {"low","medium","high","critical"} for x in results))
+
+r = requests.post(f"{BASE}/tickets/classify/batch/", json={"descriptions": []})
+check("classify/batch empty list → 400", r.status_code == 400)
+
+r = requests.post(f"{BASE}/tickets/classify/batch/", json={"descriptions": ["long enough description", "short"]})
+check("classify/batch with a too-short item → 400", r.status_code == 400)
+
+r = requests.get(f"{BASE}/tickets/classify/cache/")
+check("GET /tickets/classify/cache/ → 200", r.status_code == 200 and {"local_hits", "shared_hits", "misses"} <= r.json().keys())
+
 # Validation
 r = requests.post(f"{BASE}/tickets/classify/", json={"description": "short"})
 check("classify too short → 400", r.status_code == 400)
@@ -181,6 +336,16 @@ check("PATCH non-existent → 404", r.status_code == 404)
 r = requests.get(f"{BASE}/tickets/", params={"category": "billing", "priority": "critical", "status": "open", "search": "charged"})
 check("All 4 filters combined → 200", r.status_code == 200)
 
+r = requests.get(f"{BASE}/metrics")
+# Each worker reports its own requests, so don't assume which views it served.
+check(
+    "GET /metrics → Prometheus text with per-view histograms",
+    r.status_code == 200
+    and r.headers.get("Content-Type", "").startswith("text/plain")
+    and "# TYPE http_request_duration_seconds histogram" in r.text
+    and 'http_request_db_queries_bucket{view="' in r.text,
+)
+
 # ── SUMMARY ───────────────────────────────────────────────────────────────────
 total = passed + failed
 print(f"\n{'='*50}")